@@ -0,0 +1,77 @@
+const API_URL = "http://127.0.0.1:5000/api";
+const EVENT_TYPES = ["result.created", "followup.created"];
+const RETRY_MS = 3000;
+
+// Opens the staff event stream and keeps it open until the returned function is called.
+// The stream is authenticated with a ticket that expires after a minute, so the browser's
+// own reconnect (same URL, same ticket) would get 401. Every (re)connect therefore fetches
+// a fresh ticket and passes the last event id it saw, and the server replays what was missed.
+export function openEventStream({ types = EVENT_TYPES, onEvent, onStatus = () => {} }) {
+    let source = null;
+    let timer = null;
+    let lastEventId = null;
+    let closed = false;
+
+    const schedule = () => {
+        if (!closed) {
+            timer = setTimeout(connect, RETRY_MS);
+        }
+    };
+
+    const connect = async () => {
+        if (closed) {
+            return;
+        }
+        try {
+            const res = await fetch(`${API_URL}/staff/events/ticket`, {
+                method: "POST",
+                headers: { Authorization: `Bearer ${localStorage.getItem("token")}` }
+            });
+            if (res.status === 401 || res.status === 403) {
+                onStatus("unauthorized");
+                return;
+            }
+            if (!res.ok) {
+                throw new Error(`Ticket request failed with ${res.status}`);
+            }
+            const { ticket } = await res.json();
+            if (closed) {
+                return;
+            }
+
+            const params = new URLSearchParams({ ticket, types: types.join(",") });
+            if (lastEventId) {
+                params.set("last_event_id", lastEventId);
+            }
+            source = new EventSource(`${API_URL}/staff/events?${params}`);
+            source.onopen = () => onStatus("open");
+            types.forEach((type) => {
+                source.addEventListener(type, (event) => {
+                    lastEventId = event.lastEventId;
+                    onEvent(type, JSON.parse(event.data));
+                });
+            });
+            source.onerror = () => {
+                // Closed by the server after EVENT_STREAM_SECONDS, or the connection dropped:
+                // reconnect with a new ticket rather than letting EventSource reuse this one.
+                source.close();
+                source = null;
+                onStatus("reconnecting");
+                schedule();
+            };
+        } catch {
+            onStatus("reconnecting");
+            schedule();
+        }
+    };
+
+    connect();
+
+    return () => {
+        closed = true;
+        clearTimeout(timer);
+        if (source) {
+            source.close();
+        }
+    };
+}
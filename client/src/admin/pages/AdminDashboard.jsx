@@ -1,7 +1,36 @@
+import { useEffect, useState } from "react";
+
+import { openEventStream } from "../eventStream.js";
+
+const MAX_EVENTS = 20;
+
+const describe = (type, data) => {
+    if (type === "result.created") {
+        return `New result for ${data.email}: ${data.disability_likelihood} likelihood`;
+    }
+    return `Follow-up flagged for ${data.student_email}${data.notes ? `: ${data.notes}` : ""}`;
+};
+
 const AdminDashboard = () => {
+    const [events, setEvents] = useState([]);
+    const [status, setStatus] = useState("connecting");
+
+    useEffect(() => openEventStream({
+        onEvent: (type, data) => setEvents((previous) => [{ type, data }, ...previous].slice(0, MAX_EVENTS)),
+        onStatus: setStatus
+    }), []);
+
     return (
          <div className="bg-gray-100 p-4">
             <h1 className="text-2xl font-bold">Welcome to the Admin Dashboard</h1>
+            <h2 className="text-xl font-semibold mt-4">Live activity <span className="text-sm text-gray-500">({status})</span></h2>
+            <ul className="mt-2">
+                {events.map(({ type, data }, index) => (
+                    <li key={`${type}-${index}-${data.result_id || data.followup_id}`} className="py-1">
+                        {describe(type, data)}
+                    </li>
+                ))}
+            </ul>
         </div>
     );
 }
@@ -1,21 +1,59 @@
+import time
+
+_import_started = time.perf_counter()
+
+import click
 from flask import Flask
 from flask_cors import CORS
 
 from app.config import Config
-from app.extensions import db
-from app.routes import router_bp
+from app.extensions import db, init_migrate
+from app import storage, instrumentation, admission
+from app.services import archive, classification
+from app.startup import StartupReport
+from app.cli import register_commands
+
+_import_seconds = time.perf_counter() - _import_started
 
 def create_app():
-    app = Flask(__name__)
-    app.config.from_object(Config)
+    report = StartupReport()
+    report.record("imports", _import_seconds)
+
+    with report.phase("config"):
+        app = Flask(__name__)
+        app.config.from_object(Config)
+        storage.configure(app)
+
+    with report.phase("extensions"):
+        from app.models import model  # noqa: F401 (registers the tables)
+
+        CORS(app, origins=["http://localhost:5173"])
+
+        db.init_app(app)
+        storage.install_pragmas(app)
+        archive.install(app)
+        # Only CLI commands such as `flask db upgrade` need migrations.
+        if click.get_current_context(silent=True) is not None:
+            init_migrate(app)
+        instrumentation.init_app(app)
+        admission.init_app(app)
 
-    CORS(app, origins=["http://localhost:5173"])  
+    # Production databases are created and upgraded once with `flask db upgrade` instead.
+    if app.config["AUTO_CREATE_SCHEMA"]:
+        with report.phase("schema"):
+            with app.app_context():
+                db.create_all()
 
-    db.init_app(app)
+    with report.phase("blueprints"):
+        from app.routes import router_bp
 
-    with app.app_context():
-        db.create_all()
+        app.register_blueprint(router_bp)
+        register_commands(app)
 
-    app.register_blueprint(router_bp)
+    # CLI commands do not serve requests; a preloaded gunicorn master leaves this to post_fork.
+    if (app.config["CLASSIFICATION_ASYNC"] and app.config["CLASSIFICATION_AUTOSTART"]
+            and click.get_current_context(silent=True) is None):
+        classification.worker.start(app)
 
+    report.finish(app)
     return app
@@ -0,0 +1,259 @@
+"""
+Admission control for traffic spikes at the start of a test window.
+
+Two layers run before every request:
+
+- Token buckets per client IP and per signed-in user, limiting request rate.
+  The buckets live in a small memory-mapped file (ADMISSION_BUCKET_FILE)
+  shared by every worker on the host, with an fcntl lock per slot, so a
+  client cannot multiply its allowance by landing on different workers.
+  Requests over the rate get 429.
+- Concurrency limits per endpoint class (read, auth, write, staff) within a
+  worker, derived from its thread count so that auth, write and staff
+  together always leave threads for reads. A request over its class limit
+  waits in a short bounded queue for a slot; if the queue is full or the
+  wait runs out it gets 503. A waiting request holds its thread, so the
+  queues are part of the same thread budget. Expensive classes such as
+  password hashing and submits therefore cannot take the threads that cheap
+  reads need.
+
+Rejections carry a Retry-After with random jitter so rejected clients do not
+all come back in the same second. In-flight requests, queue depth and
+rejections are published through the metrics registry.
+"""
+import hashlib
+import math
+import mmap
+import os
+import random
+import struct
+import threading
+import time
+
+import jwt
+from flask import g, jsonify, request
+
+from app import instrumentation
+from app.services import tokens
+
+try:
+    import fcntl
+except ImportError:  # Windows: buckets are kept per process instead
+    fcntl = None
+
+# Exact endpoints and blueprint prefixes mapped to a class; anything else is
+# 'read' for GET/HEAD and 'write' otherwise.
+ENDPOINT_CLASSES = {
+    "router.auth_router.login_route": "auth",
+    "router.auth_router.signup_route": "auth",
+    "router.auth_router.check_email_route": "read",
+    "router.auth_router.check_username_route": "read",
+    "router.auth_router.check_availability_route": "read",
+    # Long-lived streams are capped by EVENT_MAX_CLIENTS rather than a gate
+    "router.staff_bp.events": "stream",
+}
+BLUEPRINT_CLASSES = {
+    "router.staff_bp.": "staff",
+    "router.report_bp.": "staff",
+    "router.export_bp.": "staff",
+}
+EXEMPT_PREFIXES = ("router.metrics_bp.",)
+
+_SLOT = struct.Struct("<Qdd")  # key fingerprint, tokens, last refill (unix time)
+
+
+class SharedBuckets:
+    """
+    Fixed-size table of token buckets in a memory-mapped file. Keys are hashed
+    to a slot; a different key landing on an occupied slot takes it over with
+    a full bucket, which only ever errs on the side of admitting.
+    """
+
+    def __init__(self, path, slots):
+        self.path = path
+        self.slots = slots
+        self._pid = None
+        self._fd = None
+        self._map = None
+        self._local = {}
+        self._lock = threading.Lock()
+
+    def _open(self):
+        if self._pid == os.getpid():
+            return
+        size = self.slots * _SLOT.size
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        if os.fstat(fd).st_size < size:
+            os.ftruncate(fd, size)
+        self._fd = fd
+        self._map = mmap.mmap(fd, size)
+        self._pid = os.getpid()
+
+    def take(self, key, rate, burst):
+        """
+        Takes one token from the bucket of key. Returns 0 if admitted, or the
+        seconds until a token will be available.
+        """
+        fingerprint = int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "little")
+        now = time.time()
+        with self._lock:
+            if fcntl is None:
+                stored = self._local.get(key)
+                tokens_left, last = stored if stored else (burst, now)
+                tokens_left, wait = _refill(tokens_left, last, now, rate, burst)
+                self._local[key] = (tokens_left, now)
+                return wait
+
+            self._open()
+            offset = (fingerprint % self.slots) * _SLOT.size
+            fcntl.lockf(self._fd, fcntl.LOCK_EX, _SLOT.size, offset)
+            try:
+                stored, tokens_left, last = _SLOT.unpack_from(self._map, offset)
+                if stored != fingerprint:
+                    tokens_left, last = burst, now
+                tokens_left, wait = _refill(tokens_left, last, now, rate, burst)
+                _SLOT.pack_into(self._map, offset, fingerprint, tokens_left, now)
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN, _SLOT.size, offset)
+        return wait
+
+
+def _refill(tokens_left, last, now, rate, burst):
+    tokens_left = min(burst, tokens_left + max(now - last, 0) * rate)
+    if tokens_left >= 1:
+        return tokens_left - 1, 0
+    return tokens_left, (1 - tokens_left) / rate
+
+
+class Gate:
+    """
+    Concurrency limit with a bounded wait queue for one endpoint class in one worker.
+    """
+
+    def __init__(self, name, limit, queue_size):
+        self.name = name
+        self.limit = limit
+        self.queue_size = queue_size
+        self.in_flight = 0
+        self.waiting = 0
+        self._condition = threading.Condition()
+
+    def _publish(self):
+        labels = {"class": self.name}
+        instrumentation.registry.set("admission_in_flight", labels, self.in_flight)
+        instrumentation.registry.set("admission_queue_depth", labels, self.waiting)
+
+    def acquire(self, timeout):
+        """
+        Returns None once a slot is held, or the rejection reason.
+        """
+        with self._condition:
+            if self.in_flight >= self.limit:
+                if self.waiting >= self.queue_size:
+                    return "queue_full"
+                self.waiting += 1
+                self._publish()
+                instrumentation.registry.inc("admission_queued_total", {"class": self.name})
+                deadline = time.monotonic() + timeout
+                try:
+                    while self.in_flight >= self.limit:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            return "queue_timeout"
+                        self._condition.wait(remaining)
+                finally:
+                    self.waiting -= 1
+                    self._publish()
+            self.in_flight += 1
+            self._publish()
+            return None
+
+    def release(self):
+        with self._condition:
+            self.in_flight -= 1
+            self._publish()
+            self._condition.notify()
+
+
+def endpoint_class(endpoint, method):
+    if endpoint in ENDPOINT_CLASSES:
+        return ENDPOINT_CLASSES[endpoint]
+    for prefix, name in BLUEPRINT_CLASSES.items():
+        if endpoint.startswith(prefix):
+            return name
+    return "read" if method in ("GET", "HEAD") else "write"
+
+
+def client_ip(proxy_hops):
+    """
+    The client address as seen by the outermost of `proxy_hops` trusted
+    proxies. Entries left of that hop were sent by the client and can be
+    anything, so they are never used.
+    """
+    forwarded = [value.strip() for value in request.headers.get("X-Forwarded-For", "").split(",") if value.strip()]
+    if proxy_hops and len(forwarded) >= proxy_hops:
+        return forwarded[-proxy_hops]
+    return request.remote_addr or "unknown"
+
+
+def _reject(status, reason, name, wait, jitter):
+    instrumentation.registry.inc("admission_rejected_total", {"class": name, "reason": reason})
+    retry_after = max(1, math.ceil(wait + random.uniform(0, jitter)))
+    message = "Too many requests, please slow down." if status == 429 else "The server is busy, please try again shortly."
+    response = jsonify({"error": message})
+    response.status_code = status
+    response.headers["Retry-After"] = str(retry_after)
+    return response
+
+
+def init_app(app):
+    """
+    Installs the admission checks. Call after instrumentation.init_app so
+    rejected requests are still measured.
+    """
+    config = app.config
+    if not config["ADMISSION_ENABLED"]:
+        return
+    buckets = SharedBuckets(config["ADMISSION_BUCKET_FILE"], config["ADMISSION_BUCKET_SLOTS"])
+    gates = {
+        name: Gate(name, limit, config["ADMISSION_QUEUE"].get(name, 0))
+        for name, limit in config["ADMISSION_LIMITS"].items()
+    }
+    jitter = config["ADMISSION_RETRY_JITTER"]
+
+    @app.before_request
+    def admit():
+        endpoint = request.endpoint
+        if endpoint is None or request.method == "OPTIONS" or endpoint.startswith(EXEMPT_PREFIXES):
+            return None
+        name = endpoint_class(endpoint, request.method)
+
+        wait = buckets.take(f"ip:{client_ip(config['ADMISSION_PROXY_HOPS'])}",
+                            config["ADMISSION_IP_RATE"], config["ADMISSION_IP_BURST"])
+        if wait:
+            return _reject(429, "ip_rate", name, wait, jitter)
+        token = tokens.request_token()
+        try:
+            identity = tokens.verify_request_token(token) if token else None
+        except jwt.InvalidTokenError:
+            identity = None  # the route itself answers 401 if it needs a user
+        if identity:
+            wait = buckets.take(f"user:{identity['uid']}",
+                                config["ADMISSION_USER_RATE"], config["ADMISSION_USER_BURST"])
+            if wait:
+                return _reject(429, "user_rate", name, wait, jitter)
+
+        gate = gates.get(name)
+        if gate is None:
+            return None
+        reason = gate.acquire(config["ADMISSION_QUEUE_TIMEOUT"])
+        if reason:
+            return _reject(503, reason, name, 0, jitter)
+        g._admission_gate = gate
+        return None
+
+    @app.teardown_request
+    def release(exc):
+        gate = g.pop("_admission_gate", None)
+        if gate is not None:
+            gate.release()
@@ -0,0 +1,142 @@
+import click
+from flask.cli import AppGroup
+
+reports_cli = AppGroup('reports', help='Reporting maintenance commands.')
+
+@reports_cli.command('rebuild')
+def rebuild_reports():
+    """Recompute the report summary tables from all test results."""
+    from app.services import analytics
+
+    count = analytics.rebuild()
+    click.echo(f"Rebuilt report summaries from {count} results.")
+
+json_fields_cli = AppGroup('json-fields', help='Extracted JSON field maintenance.')
+
+@json_fields_cli.command('rebuild')
+def rebuild_json_fields():
+    """Re-extract the JSON_FIELDS paths from all surveys and results."""
+    from app.services import json_fields
+
+    count = json_fields.rebuild()
+    click.echo(f"Extracted {count} JSON field values.")
+
+content_cli = AppGroup('content', help='Test content management.')
+
+@content_cli.command('import')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'fmt', type=click.Choice(['json', 'csv']), help='Defaults to the file extension.')
+@click.option('--append', is_flag=True, help='Add questions to tests that already exist.')
+@click.option('--dry-run', is_flag=True, help='Only validate the file.')
+def import_content(path, fmt, append, dry_run):
+    """Bulk-import tests, questions and answer options from JSON or CSV."""
+    from app.services import content_import
+
+    fmt = fmt or ('csv' if path.lower().endswith('.csv') else 'json')
+    with open(path, newline='', encoding='utf-8') as handle:
+        try:
+            tests = content_import.load(handle, fmt)
+        except ValueError as e:
+            raise click.ClickException(f"Could not parse {path}: {e}")
+
+    errors = content_import.validate(tests)
+    if dry_run or errors:
+        for error in errors:
+            click.echo(error, err=True)
+        if errors:
+            raise click.ClickException(f"{len(errors)} problem(s) found; nothing was imported.")
+        click.echo(f"{path} is valid: {len(tests)} test(s).")
+        return
+
+    try:
+        counts = content_import.import_tests(tests, append=append)
+    except content_import.InvalidContent as e:
+        for error in e.errors:
+            click.echo(error, err=True)
+        raise click.ClickException(f"{e}; nothing was imported.")
+    click.echo("Imported {} test(s), {} question(s) and {} option(s).".format(*counts))
+
+seed_cli = AppGroup('seed', help='Synthetic data for load and sizing tests.')
+
+@seed_cli.command('cohort')
+@click.option('--students', default=5000, show_default=True, help='Number of students to create.')
+@click.option('--staff', default=20, show_default=True, help='Number of staff accounts.')
+@click.option('--days', default=120, show_default=True, help='Spread test sittings over this many past days.')
+@click.option('--test-id', 'test_ids', multiple=True, help='Tests to sit (default: every test with questions).')
+@click.option('--seed', type=int, help='Random seed for a reproducible cohort.')
+def seed_cohort(students, staff, days, test_ids, seed):
+    """Generate a synthetic cohort with sessions, answers, results, surveys and follow-ups."""
+    import time
+    from app.services.synthetic import CohortGenerator, CohortExists, PASSWORD
+
+    start = time.perf_counter()
+    try:
+        counts = CohortGenerator(students, staff, days, seed).generate(list(test_ids))
+    except (LookupError, CohortExists) as e:
+        raise click.ClickException(str(e))
+    click.echo(", ".join(f"{count} {name.replace('_', '-')}" for name, count in counts.items()))
+    click.echo(f"Done in {time.perf_counter() - start:.1f}s. Every synthetic account uses the password {PASSWORD}.")
+
+startup_cli = AppGroup('startup', help='Startup diagnostics.')
+
+@startup_cli.command('report')
+def startup_report():
+    """Show how long each phase of create_app took."""
+    from flask import current_app
+
+    for line in current_app.extensions["startup_report"].lines():
+        click.echo(line)
+
+@startup_cli.command('warm')
+def warm():
+    """Build the in-memory caches once and report how long it took."""
+    import time
+    from flask import current_app
+    from app.startup import warm_caches
+
+    start = time.perf_counter()
+    warm_caches(current_app._get_current_object())
+    click.echo(f"Warmed caches in {(time.perf_counter() - start) * 1000:.1f} ms.")
+
+archive_cli = AppGroup('archive', help='Hot/cold archival of completed sessions.')
+
+@archive_cli.command('run')
+@click.option('--older-than', 'days', type=int, help='Archive sessions that ended this many days ago (default ARCHIVE_AFTER_DAYS).')
+@click.option('--batch-size', type=int, help='Sessions moved per transaction (default ARCHIVE_BATCH_SIZE).')
+@click.option('--dry-run', is_flag=True, help='Only count the sessions that would be archived.')
+@click.option('--vacuum', is_flag=True, help='Compact the live database afterwards (blocks writers while it runs).')
+def run_archive(days, batch_size, dry_run, vacuum):
+    """Move completed sessions past the cutoff, with their answers and results, into the archive."""
+    import time
+    from app.services import archive
+
+    before = archive.cutoff(days)
+    if dry_run:
+        click.echo(f"{archive.pending(before)} completed session(s) ended before {before:%Y-%m-%d %H:%M}.")
+        return
+
+    start = time.perf_counter()
+    counts = archive.archive_sessions(before, batch_size)
+    click.echo(", ".join(f"{count} {name}" for name, count in counts.items()) + f" archived in {time.perf_counter() - start:.1f}s.")
+    if vacuum:
+        archive.vacuum()
+        click.echo("Compacted the live database.")
+
+@archive_cli.command('status')
+def archive_status():
+    """List archived sessions per term."""
+    from app.services import archive
+
+    rows = archive.terms()
+    if not rows:
+        click.echo("The archive is empty.")
+    for term, count, first, last in rows:
+        click.echo(f"{term}: {count} session(s), {first:%Y-%m-%d} to {last:%Y-%m-%d}")
+
+def register_commands(app):
+    app.cli.add_command(reports_cli)
+    app.cli.add_command(json_fields_cli)
+    app.cli.add_command(content_cli)
+    app.cli.add_command(seed_cli)
+    app.cli.add_command(startup_cli)
+    app.cli.add_command(archive_cli)
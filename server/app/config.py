@@ -1,3 +1,4 @@
+import json
 import os
 
 class Config:
@@ -5,4 +6,143 @@ class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY', 'acdd6a4ed3cbaa196149e1fab515d1b56b6f6c43d66f42c8ea2829bf3cbf2bd0')
     DB_PATH = os.environ.get('DB_PATH', os.path.join(BASE_DIR, 'instance', 'database.db'))
     SQLALCHEMY_DATABASE_URI = f'sqlite:///{DB_PATH}'
-    SQLALCHEMY_TRACK_MODIFICATIONS = False
\ No newline at end of file
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # 'development' or 'production'; see app/storage.py for what each profile sets
+    STORAGE_PROFILE = os.environ.get('STORAGE_PROFILE', 'development')
+    SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000))
+    SQLITE_MMAP_SIZE = int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))
+    SQLITE_CACHE_SIZE = int(os.environ.get('SQLITE_CACHE_SIZE', -64000)) # negative means KiB
+    SQLITE_POOL_SIZE = int(os.environ.get('SQLITE_POOL_SIZE', 8))
+    SQLITE_POOL_OVERFLOW = int(os.environ.get('SQLITE_POOL_OVERFLOW', 4))
+    SQLITE_POOL_TIMEOUT = int(os.environ.get('SQLITE_POOL_TIMEOUT', 10))
+
+    # Seconds a worker trusts its cached test content versions before re-reading them, so
+    # another worker's question edits reach its answer key and question cache within this
+    TEST_CONTENT_VERSION_TTL = float(os.environ.get('TEST_CONTENT_VERSION_TTL', 5))
+
+    # Share of a part's questions a student must answer correctly to count as a pass in reports
+    REPORT_PASS_MARK = float(os.environ.get('REPORT_PASS_MARK', 0.5))
+
+    # PDF exports are built in memory before they are sent, so they are capped
+    EXPORT_PDF_MAX_ROWS = int(os.environ.get('EXPORT_PDF_MAX_ROWS', 5000))
+
+    # Password hashing runs in a bounded process pool; 0 workers hashes inline
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'scrypt')
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', min(2, os.cpu_count() or 1)))
+    PASSWORD_HASH_QUEUE = int(os.environ.get('PASSWORD_HASH_QUEUE', 32))
+    PASSWORD_HASH_WAIT = float(os.environ.get('PASSWORD_HASH_WAIT', 2.0))
+
+    # Issued tokens and the per-worker cache of verified tokens
+    TOKEN_TTL_HOURS = int(os.environ.get('TOKEN_TTL_HOURS', 12))
+    TOKEN_CACHE_SIZE = int(os.environ.get('TOKEN_CACHE_SIZE', 4096))
+    TOKEN_CACHE_TTL = int(os.environ.get('TOKEN_CACHE_TTL', 300))
+    # Single-purpose tickets for URLs, e.g. opening the staff event stream
+    TICKET_TTL_SECONDS = int(os.environ.get('TICKET_TTL_SECONDS', 60))
+    # Bumped on every logout so each worker reloads the revoked token ids
+    TOKEN_REVOCATION_STAMP = os.environ.get('TOKEN_REVOCATION_STAMP', os.path.join(os.path.dirname(DB_PATH), 'revoked_tokens.stamp'))
+
+    # In-memory email/username existence index; the stamp file signals new signups to other workers
+    USER_INDEX_STAMP = os.environ.get('USER_INDEX_STAMP', os.path.join(os.path.dirname(DB_PATH), 'user_index.stamp'))
+    USER_INDEX_CAPACITY = int(os.environ.get('USER_INDEX_CAPACITY', 100000))
+    USER_INDEX_REFRESH = int(os.environ.get('USER_INDEX_REFRESH', 600))
+    USER_INDEX_BATCH_LIMIT = int(os.environ.get('USER_INDEX_BATCH_LIMIT', 50))
+
+    # Request/SQL instrumentation; each worker writes its registry to METRICS_DIR for /api/metrics
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', '1') == '1'
+    METRICS_DIR = os.environ.get('METRICS_DIR', os.path.join(os.path.dirname(DB_PATH), 'metrics'))
+    METRICS_FLUSH_INTERVAL = float(os.environ.get('METRICS_FLUSH_INTERVAL', 5.0))
+    METRICS_SLOW_QUERY_MS = float(os.environ.get('METRICS_SLOW_QUERY_MS', 100))
+    METRICS_N_PLUS_ONE_THRESHOLD = int(os.environ.get('METRICS_N_PLUS_ONE_THRESHOLD', 10))
+    # Client addresses that may scrape /api/metrics without a staff token
+    METRICS_ALLOWED_IPS = frozenset(
+        ip.strip() for ip in os.environ.get('METRICS_ALLOWED_IPS', '127.0.0.1,::1').split(',') if ip.strip()
+    )
+
+    # Background classification of submitted sessions
+    CLASSIFICATION_ASYNC = os.environ.get('CLASSIFICATION_ASYNC', '1') == '1'
+    CLASSIFICATION_WORKERS = int(os.environ.get('CLASSIFICATION_WORKERS', 2))
+    CLASSIFICATION_PROCESSES = int(os.environ.get('CLASSIFICATION_PROCESSES', 0)) # >0 scores in a process pool
+    CLASSIFICATION_POLL_INTERVAL = float(os.environ.get('CLASSIFICATION_POLL_INTERVAL', 1.0))
+    CLASSIFICATION_LEASE_SECONDS = int(os.environ.get('CLASSIFICATION_LEASE_SECONDS', 60))
+    CLASSIFICATION_MAX_ATTEMPTS = int(os.environ.get('CLASSIFICATION_MAX_ATTEMPTS', 3))
+    CLASSIFICATION_RETRY_BACKOFF = float(os.environ.get('CLASSIFICATION_RETRY_BACKOFF', 5.0)) # seconds, doubled per attempt
+    CLASSIFICATION_AUTOSTART = os.environ.get('CLASSIFICATION_AUTOSTART', '1') == '1' # start the dispatcher in create_app
+
+    # Exercise recommendations; the stamp file signals exercise edits to other workers
+    EXERCISE_INDEX_STAMP = os.environ.get('EXERCISE_INDEX_STAMP', os.path.join(os.path.dirname(DB_PATH), 'exercise_index.stamp'))
+    EXERCISE_INDEX_REFRESH = int(os.environ.get('EXERCISE_INDEX_REFRESH', 600))
+    RECOMMENDATION_LIMIT = int(os.environ.get('RECOMMENDATION_LIMIT', 6))
+    RECOMMENDATION_PER_PART = int(os.environ.get('RECOMMENDATION_PER_PART', 3))
+
+    # Request threads per worker; gunicorn.conf.py reads the same variable, and the
+    # admission and event stream limits below are shares of it
+    SERVER_THREADS = int(os.environ.get('GUNICORN_THREADS', 8))
+
+    # Admission control: shared per-IP/per-user token buckets and per-worker concurrency limits per endpoint class
+    ADMISSION_ENABLED = os.environ.get('ADMISSION_ENABLED', '1') == '1'
+    ADMISSION_BUCKET_FILE = os.environ.get('ADMISSION_BUCKET_FILE', os.path.join(os.path.dirname(DB_PATH), 'admission.buckets'))
+    ADMISSION_BUCKET_SLOTS = int(os.environ.get('ADMISSION_BUCKET_SLOTS', 65536))
+    # A whole lab or residence can share one NAT address, so the IP budget is generous
+    ADMISSION_IP_RATE = float(os.environ.get('ADMISSION_IP_RATE', 50.0))
+    ADMISSION_IP_BURST = float(os.environ.get('ADMISSION_IP_BURST', 300))
+    ADMISSION_USER_RATE = float(os.environ.get('ADMISSION_USER_RATE', 5.0))
+    ADMISSION_USER_BURST = float(os.environ.get('ADMISSION_USER_BURST', 20))
+    ADMISSION_PROXY_HOPS = int(os.environ.get('ADMISSION_PROXY_HOPS', 0)) # reverse proxies in front of the app that append to X-Forwarded-For
+    # A queued request holds its thread while it waits. Running and queued auth, write and
+    # staff requests together hold at most three quarters of the threads, so reads and event
+    # streams always keep a quarter. Auth runs one request per password hashing worker, so
+    # the pool is never idle, and takes whatever is left of that budget as queue for the
+    # login and signup burst at the start of a test window
+    ADMISSION_LIMITS = {
+        'read': int(os.environ.get('ADMISSION_LIMIT_READ', SERVER_THREADS)),
+        'auth': int(os.environ.get('ADMISSION_LIMIT_AUTH', max(1, PASSWORD_HASH_WORKERS, SERVER_THREADS // 8))),
+        'write': int(os.environ.get('ADMISSION_LIMIT_WRITE', max(1, SERVER_THREADS // 8))),
+        'staff': int(os.environ.get('ADMISSION_LIMIT_STAFF', max(1, SERVER_THREADS // 16))),
+    }
+    ADMISSION_QUEUE = {
+        'read': int(os.environ.get('ADMISSION_QUEUE_READ', 0)),
+        'write': int(os.environ.get('ADMISSION_QUEUE_WRITE', SERVER_THREADS // 8)),
+        'staff': int(os.environ.get('ADMISSION_QUEUE_STAFF', 0)),
+    }
+    ADMISSION_QUEUE['auth'] = int(os.environ.get('ADMISSION_QUEUE_AUTH', max(0, SERVER_THREADS * 3 // 4
+        - ADMISSION_LIMITS['auth'] - ADMISSION_LIMITS['write'] - ADMISSION_LIMITS['staff']
+        - ADMISSION_QUEUE['write'] - ADMISSION_QUEUE['staff'])))
+    ADMISSION_QUEUE_TIMEOUT = float(os.environ.get('ADMISSION_QUEUE_TIMEOUT', 3.0))
+    ADMISSION_RETRY_JITTER = float(os.environ.get('ADMISSION_RETRY_JITTER', 3.0))
+
+    # Server-sent events for the staff dashboard; EVENT_LOG relays events between workers
+    EVENT_LOG = os.environ.get('EVENT_LOG', os.path.join(os.path.dirname(DB_PATH), 'events.jsonl'))
+    EVENT_LOG_MAX_BYTES = int(os.environ.get('EVENT_LOG_MAX_BYTES', 16 * 1024 * 1024))
+    EVENT_POLL_INTERVAL = float(os.environ.get('EVENT_POLL_INTERVAL', 0.5))
+    EVENT_KEEPALIVE = float(os.environ.get('EVENT_KEEPALIVE', 15.0))
+    # Each open stream holds a worker thread, so streams are capped at a quarter of the threads and recycled
+    EVENT_MAX_CLIENTS = int(os.environ.get('EVENT_MAX_CLIENTS', max(1, SERVER_THREADS // 4)))
+    EVENT_STREAM_SECONDS = int(os.environ.get('EVENT_STREAM_SECONDS', 300))
+    EVENT_CLIENT_QUEUE = int(os.environ.get('EVENT_CLIENT_QUEUE', 256))
+    EVENT_RETRY_MS = int(os.environ.get('EVENT_RETRY_MS', 3000))
+
+    # Hot/cold archival: completed sessions older than ARCHIVE_AFTER_DAYS move to the attached ARCHIVE_DB_PATH
+    ARCHIVE_DB_PATH = os.environ.get('ARCHIVE_DB_PATH', os.path.join(os.path.dirname(DB_PATH), 'archive.db'))
+    ARCHIVE_AFTER_DAYS = int(os.environ.get('ARCHIVE_AFTER_DAYS', 365))
+    ARCHIVE_BATCH_SIZE = int(os.environ.get('ARCHIVE_BATCH_SIZE', 500))
+
+    # JSON paths copied into the indexed json_fields table: source -> {field name: JSON path}.
+    # JSON_FIELDS_FILE may point to a JSON file with the same shape to match the survey form.
+    JSON_FIELDS = {
+        'survey': {
+            'reading_difficulty_primary': '$.reading.primary',
+            'reading_difficulty_high_school': '$.reading.high_school',
+            'prior_diagnosis': '$.prior_diagnosis',
+            'support_needs': '$.support_needs',
+        },
+        'result': {
+            'numbers_percent': '$.parts.Numbers.percent',
+            'logic_percent': '$.parts.Logic.percent',
+            'shapes_percent': '$.parts.Shapes.percent',
+            'answered': '$.answered',
+        },
+    }
+    if os.environ.get('JSON_FIELDS_FILE'):
+        with open(os.environ['JSON_FIELDS_FILE']) as _handle:
+            JSON_FIELDS = json.load(_handle)
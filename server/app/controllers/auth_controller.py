@@ -1,11 +1,13 @@
 import re
-import jwt
 import uuid
-import datetime
 from flask import request, jsonify, current_app
+from sqlalchemy.exc import IntegrityError
 
 from app.models.model import User
 from app.extensions import db
+from app.services import passwords, tokens
+from app.services.user_index import index as user_index
+from app.services.passwords import HashingBusy
 
 def is_dut_email(email):
     return re.fullmatch(r"\d{8}@dut4life\.ac\.za", email) is not None
@@ -41,10 +43,10 @@ def signup():
     if not is_strong_password(password):
         return {"message": "Password must be at least 8 characters, include upper and lower case, a number, and a special character."}, 400
 
-    if User.query.filter_by(email=email).first():
+    if user_index.exists("email", [email])[email]:
         return {"message": "Email already registered"}, 400
 
-    if User.query.filter_by(username=username).first():
+    if user_index.exists("username", [username])[username]:
         return {"message": "Username already taken"}, 400
 
     user = User(
@@ -54,9 +56,18 @@ def signup():
         email=email,
         role="student"
     )
-    user.set_password(password)
+    try:
+        user.set_password(password)
+    except HashingBusy:
+        return _busy()
     db.session.add(user)
-    db.session.commit()
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # Lost a race with a concurrent signup for the same email or username.
+        db.session.rollback()
+        return {"message": "Email or username already registered"}, 400
+    user_index.record(email, username)
 
     return {
         "message": "Signup successful",
@@ -70,17 +81,39 @@ def signup():
     }, 201
 
 def check_email():
-    data = request.get_json()
+    data = request.get_json(silent=True) or {}
     email = data.get("email")
-    exists = User.query.filter_by(email=email).first() is not None
+    if not isinstance(email, str):
+        return {"message": "email must be a string"}, 400
+    exists = user_index.exists("email", [email])[email]
     return jsonify({"exists": exists})
 
 def check_username():
-    data = request.get_json()
+    data = request.get_json(silent=True) or {}
     username = data.get("username")
-    exists = User.query.filter_by(username=username).first() is not None
+    if not isinstance(username, str):
+        return {"message": "username must be a string"}, 400
+    exists = user_index.exists("username", [username])[username]
     return jsonify({"exists": exists})
 
+def check_availability():
+    data = request.get_json(silent=True) or {}
+    emails = data.get("emails") or []
+    usernames = data.get("usernames") or []
+    if not isinstance(emails, list) or not isinstance(usernames, list):
+        return {"message": "emails and usernames must be lists"}, 400
+    if not all(isinstance(value, str) for value in emails + usernames):
+        return {"message": "emails and usernames must be lists of strings"}, 400
+
+    limit = current_app.config["USER_INDEX_BATCH_LIMIT"]
+    if len(emails) + len(usernames) > limit:
+        return {"message": f"At most {limit} values can be checked at once"}, 400
+
+    return jsonify({
+        "emails": user_index.exists("email", emails),
+        "usernames": user_index.exists("username", usernames)
+    })
+
 def login():
     data = request.get_json()
     identifier = data.get('email') or data.get('username')
@@ -93,12 +126,20 @@ def login():
         (User.email == identifier) | (User.username == identifier)
     ).first()
 
-    if user and user.check_password(password):
-        payload = {
-            "uid": user.user_id,
-            "exp": datetime.datetime.utcnow() + datetime.timedelta(hours=12)
-        }
-        token = jwt.encode(payload, current_app.config["SECRET_KEY"], algorithm="HS256")
+    try:
+        if user is None:
+            authenticated = passwords.verify_dummy(password)
+        else:
+            authenticated = user.check_password(password)
+        if authenticated and user.password_needs_rehash():
+            # Transparently move the stored hash onto the current parameters.
+            user.set_password(password)
+            db.session.commit()
+    except HashingBusy:
+        return _busy()
+
+    if authenticated:
+        token = tokens.issue_token(user)
         return {
             "message": "Login successful",
             "token": token,
@@ -106,8 +147,24 @@ def login():
                 "uid": user.user_id,
                 "email": user.email,
                 "username": user.username,
-                "full_name": user.full_name
+                "full_name": user.full_name,
+                "role": user.role
             }
         }, 200
 
-    return {"message": "Invalid credentials"}, 401
\ No newline at end of file
+    return {"message": "Invalid credentials"}, 401
+
+def logout():
+    """
+    Revokes the caller's token on every worker until it expires.
+    """
+    token = tokens.request_token()
+    if token:
+        try:
+            tokens.revoke(token)
+        except Exception as e:
+            return {"error": str(e)}, 500
+    return {"message": "Logout successful"}, 200
+
+def _busy():
+    return {"message": "Too many sign-ins right now, please try again shortly."}, 503, {"Retry-After": "2"}
@@ -0,0 +1,88 @@
+from flask import jsonify, request
+from app.extensions import db
+from app.models.model import ExerciseContent
+
+PARTS = ('Numbers', 'Logic', 'Shapes')
+DIFFICULTIES = (1, 2, 3)
+EDITABLE_FIELDS = ('title', 'description', 'video_link', 'recommended_for_part', 'difficulty', 'is_approved')
+
+def _exercise_json(exercise):
+    return {
+        "exercise_id": exercise.exercise_id,
+        "title": exercise.title,
+        "description": exercise.description,
+        "video_link": exercise.video_link,
+        "recommended_for_part": exercise.recommended_for_part,
+        "difficulty": exercise.difficulty,
+        "is_approved": exercise.is_approved
+    }
+
+def _validate(data):
+    if 'recommended_for_part' in data and data['recommended_for_part'] not in PARTS:
+        return f"recommended_for_part must be one of: {', '.join(PARTS)}"
+    if 'difficulty' in data and (type(data['difficulty']) is not int or data['difficulty'] not in DIFFICULTIES):
+        return "difficulty must be 1, 2 or 3"
+    if 'title' in data and not data['title']:
+        return "title is required"
+    if 'is_approved' in data and not isinstance(data['is_approved'], bool):
+        return "is_approved must be true or false"
+    return None
+
+def create_exercise():
+    """
+    Adds an exercise. New exercises are only recommended once approved.
+    """
+    data = request.json or {}
+    if not data.get('title') or not data.get('recommended_for_part'):
+        return jsonify({"error": "title and recommended_for_part are required"}), 400
+    error = _validate(data)
+    if error:
+        return jsonify({"error": error}), 400
+
+    try:
+        exercise = ExerciseContent(**{field: data[field] for field in EDITABLE_FIELDS if field in data})
+        db.session.add(exercise)
+        db.session.commit()
+        return jsonify(_exercise_json(exercise)), 201
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 500
+
+def update_exercise(exercise_id):
+    """
+    Edits an exercise; the recommendation index of every worker is refreshed on commit.
+    """
+    data = request.json or {}
+    error = _validate(data)
+    if error:
+        return jsonify({"error": error}), 400
+
+    exercise = db.session.get(ExerciseContent, exercise_id)
+    if exercise is None:
+        return jsonify({"error": "Exercise not found"}), 404
+
+    try:
+        for field in EDITABLE_FIELDS:
+            if field in data:
+                setattr(exercise, field, data[field])
+        db.session.commit()
+        return jsonify(_exercise_json(exercise)), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 500
+
+def approve_exercise(exercise_id):
+    """
+    Approves an exercise so it can be recommended to students.
+    """
+    exercise = db.session.get(ExerciseContent, exercise_id)
+    if exercise is None:
+        return jsonify({"error": "Exercise not found"}), 404
+
+    try:
+        exercise.is_approved = True
+        db.session.commit()
+        return jsonify(_exercise_json(exercise)), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 500
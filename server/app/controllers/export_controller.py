@@ -0,0 +1,43 @@
+from flask import Response, current_app, jsonify, request, stream_with_context
+
+from app.services import exports
+
+FILTERS = ("test_id", "faculty", "course", "include_archive")
+
+FORMATS = {
+    "csv": ("text/csv", exports.stream_csv),
+    "pdf": ("application/pdf", exports.stream_pdf),
+}
+
+def export_dataset(dataset, fmt):
+    """
+    Streams a staff export of results, follow-ups or surveys as CSV or PDF.
+    ?include_archive=true adds archived sessions to the results export.
+    PDFs are built in memory, so they are refused past EXPORT_PDF_MAX_ROWS rows.
+    """
+    if dataset not in exports.DATASETS:
+        return jsonify({"error": f"Unknown export: {dataset}"}), 404
+
+    filters = {key: request.args.get(key) for key in ("test_id", "faculty", "course")}
+    filters["include_archive"] = request.args.get("include_archive", "").lower() in ("1", "true")
+    supported = exports.DATASETS[dataset][2]
+    unsupported = [key for key in FILTERS if filters[key] and key not in supported]
+    if unsupported:
+        return jsonify({"error": f"The {dataset} export cannot be filtered by {', '.join(unsupported)}"}), 400
+
+    mimetype, stream = FORMATS[fmt]
+    if fmt == "pdf":
+        limit = current_app.config["EXPORT_PDF_MAX_ROWS"]
+        try:
+            rows = exports.count_rows(dataset, filters)
+        except Exception as e:
+            return jsonify({"error": str(e)}), 500
+        if rows > limit:
+            return jsonify({
+                "error": f"The PDF export is limited to {limit} rows and this one has {rows}; narrow the filters or use CSV."
+            }), 400
+    return Response(
+        stream_with_context(stream(dataset, filters)),
+        mimetype=mimetype,
+        headers={"Content-Disposition": f"attachment; filename={dataset}.{fmt}"}
+    )
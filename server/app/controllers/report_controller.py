@@ -0,0 +1,126 @@
+from flask import jsonify, request
+from sqlalchemy import func, select, case
+
+from app.extensions import db
+from app.models.model import ResultRollup, ScoreDistribution
+from app.services.analytics import OVERALL
+
+GROUP_COLUMNS = {
+    "test": ResultRollup.test_id,
+    "part": ResultRollup.part,
+    "faculty": ResultRollup.faculty,
+    "course": ResultRollup.course,
+    "likelihood": ResultRollup.disability_likelihood,
+}
+
+def _rollup_filters(part=OVERALL, model=ResultRollup):
+    """
+    Builds the WHERE clause shared by the report endpoints from the query string.
+    `model` is ResultRollup or ScoreDistribution, which share the cohort columns.
+    """
+    args = request.args
+    conditions = []
+    if part is not None:
+        conditions.append(model.part == args.get('part', part))
+    for name, column in (("test_id", model.test_id),
+                         ("faculty", model.faculty),
+                         ("course", model.course),
+                         ("likelihood", model.disability_likelihood)):
+        if args.get(name):
+            conditions.append(column == args[name])
+    if args.get('from'):
+        conditions.append(model.period >= args['from'])
+    if args.get('to'):
+        conditions.append(model.period <= args['to'])
+    return conditions
+
+def _measures():
+    return (
+        func.sum(ResultRollup.result_count).label("results"),
+        func.sum(ResultRollup.pass_count).label("passed"),
+        func.sum(ResultRollup.score_sum).label("score_sum"),
+        func.sum(ResultRollup.max_score_sum).label("max_score_sum"),
+    )
+
+def _summary(row):
+    results = row.results or 0
+    return {
+        "results": results,
+        "passed": row.passed or 0,
+        "pass_rate": round(row.passed / results, 4) if results else None,
+        "mean_percent": round(row.score_sum / row.max_score_sum, 4) if row.max_score_sum else None,
+    }
+
+def get_distribution():
+    """
+    Returns the likelihood band counts and score histogram for the selected cohort.
+    """
+    try:
+        likelihood_rows = db.session.execute(
+            select(ResultRollup.disability_likelihood, func.sum(ResultRollup.result_count))
+            .where(*_rollup_filters())
+            .group_by(ResultRollup.disability_likelihood)
+        ).all()
+
+        score_rows = db.session.execute(
+            select(ScoreDistribution.score, func.sum(ScoreDistribution.result_count))
+            .where(*_rollup_filters(model=ScoreDistribution))
+            .group_by(ScoreDistribution.score)
+            .order_by(ScoreDistribution.score)
+        ).all()
+
+        return jsonify({
+            "likelihood": {band: count for band, count in likelihood_rows},
+            "scores": [{"score": score, "results": count} for score, count in score_rows]
+        }), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+def get_pass_rates():
+    """
+    Returns pass rates grouped by test, part, faculty, course or likelihood band.
+    """
+    group_by = request.args.get('group_by', 'faculty')
+    column = GROUP_COLUMNS.get(group_by)
+    if column is None:
+        return jsonify({"error": f"group_by must be one of: {', '.join(GROUP_COLUMNS)}"}), 400
+
+    try:
+        conditions = _rollup_filters(part=None if group_by == "part" else OVERALL)
+        if group_by == "part":
+            conditions.append(ResultRollup.part != OVERALL)
+        rows = db.session.execute(
+            select(column.label("key"), *_measures())
+            .where(*conditions)
+            .group_by(column)
+            .order_by(column)
+        ).all()
+        return jsonify([dict(_summary(row), **{group_by: row.key or None}) for row in rows]), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+def get_trends():
+    """
+    Returns results, pass rates and high-likelihood counts per day or month.
+    """
+    interval = request.args.get('interval', 'month')
+    if interval not in ('day', 'month'):
+        return jsonify({"error": "interval must be 'day' or 'month'"}), 400
+
+    try:
+        bucket = ResultRollup.period if interval == 'day' else func.substr(ResultRollup.period, 1, 7)
+        high = func.sum(case(
+            (ResultRollup.disability_likelihood == 'high', ResultRollup.result_count), else_=0
+        )).label("high_likelihood")
+        rows = db.session.execute(
+            select(bucket.label("bucket"), *_measures(), high)
+            .where(*_rollup_filters())
+            .group_by(bucket)
+            .order_by(bucket)
+        ).all()
+        return jsonify([
+            dict(_summary(row), period=row.bucket, high_likelihood=row.high_likelihood)
+            for row in rows
+        ]), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
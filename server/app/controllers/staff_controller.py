@@ -0,0 +1,98 @@
+from flask import Response, current_app, g, jsonify, request, stream_with_context
+
+from app.extensions import db
+from app.models.model import User, StudentFollowUp
+from app.services import listings, json_fields, events, tokens
+
+def list_records(listing):
+    """
+    Streams one keyset-paginated page of students, results, follow-ups or surveys.
+    Pass the previous page's next_cursor as ?cursor= to get the next one.
+    Arguments like survey.<field>=value filter on extracted JSON fields.
+    ?include_archive=true adds archived sessions to the results listing.
+    """
+    try:
+        filters = {key: request.args.get(key) for key in ("faculty", "course", "test_id", "likelihood")}
+        filters["from"] = listings.parse_date(request.args.get("from"))
+        filters["to"] = listings.parse_date(request.args.get("to"), end=True)
+        filters["json"] = json_fields.parse_args(request.args)
+        filters["include_archive"] = request.args.get("include_archive", "").lower() in ("1", "true")
+        limit = min(max(int(request.args.get("limit", listings.PAGE_SIZE)), 1), listings.MAX_PAGE_SIZE)
+        cursor = request.args.get("cursor")
+        after = listings.decode_cursor(listing, cursor) if cursor else None
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    return Response(
+        stream_with_context(listings.stream_page(listing, filters, after, limit)),
+        mimetype="application/json"
+    )
+
+def create_follow_up():
+    """
+    Flags a student for follow-up by the signed-in staff member.
+    Staff streaming events receive it as a followup.created event.
+    """
+    data = request.json or {}
+    student_id = data.get('student_id')
+    if not student_id:
+        return jsonify({"error": "student_id is required"}), 400
+
+    try:
+        student = db.session.get(User, student_id)
+        if student is None or student.role != 'student':
+            return jsonify({"error": "Student not found"}), 404
+        follow_up = StudentFollowUp(student_id=student_id, staff_id=g.current_user['uid'], notes=data.get('notes'))
+        db.session.add(follow_up)
+        db.session.commit()
+        return jsonify({
+            "followup_id": follow_up.followup_id,
+            "student_id": follow_up.student_id,
+            "staff_id": follow_up.staff_id,
+            "notes": follow_up.notes,
+            "flagged_date": follow_up.flagged_date.isoformat()
+        }), 201
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 500
+
+def issue_events_ticket():
+    """
+    Returns a ticket for ?ticket= on the event stream. It expires after
+    TICKET_TTL_SECONDS, so fetch a new one for every (re)connect.
+    """
+    ticket = tokens.issue_ticket(g.current_user, "events")
+    return jsonify({"ticket": ticket, "expires_in": current_app.config["TICKET_TTL_SECONDS"]}), 200
+
+def stream_events():
+    """
+    Streams new results and follow-ups as server-sent events. Optional
+    ?types=result.created,followup.created and faculty, course, test_id and
+    disability_likelihood arguments narrow what is sent. A client reconnecting
+    with a fresh ticket passes ?last_event_id= (or Last-Event-ID) and is
+    replayed what it missed.
+    """
+    types = {name for name in request.args.get('types', '').split(',') if name}
+    unknown = types - set(events.EVENT_TYPES)
+    if unknown:
+        return jsonify({"error": f"Unknown event type: {', '.join(sorted(unknown))}"}), 400
+    filters = {field: request.args[field] for field in events.FILTER_FIELDS if request.args.get(field)}
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    try:
+        last_event_id = events.parse_event_id(last_event_id) if last_event_id else None
+    except ValueError:
+        return jsonify({"error": "Last-Event-ID must be an event id"}), 400
+
+    app = current_app._get_current_object()
+    subscriber = events.hub.subscribe(app, types, filters)
+    if subscriber is None:
+        response = jsonify({"error": "Too many event streams are open, please try again shortly."})
+        response.status_code = 503
+        response.headers['Retry-After'] = str(int(app.config['EVENT_RETRY_MS'] / 1000) or 1)
+        return response
+
+    return Response(
+        events.stream(app, subscriber, last_event_id),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
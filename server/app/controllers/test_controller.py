@@ -1,7 +1,9 @@
-from flask import jsonify, request
+from flask import jsonify, request, current_app
 from app.extensions import db
-from app.models.model import Test, Question, StudentTestSession, StudentAnswer, TestResult, User
-import uuid
+from app.models.model import Test, StudentTestSession, User, ClassificationJob
+from app.services import question_cache, classification, recommendations
+from app.services import answers as answer_store
+from sqlalchemy import update
 
 def get_available_tests():
     """
@@ -21,28 +23,17 @@ def get_available_tests():
 def get_test_questions(test_id):
     """
     Retrieves all questions for a specific test.
+    The payload is served pre-serialized with an ETag, so unchanged tests answer 304.
     """
     try:
-        test = Test.query.get(test_id)
-        if not test:
+        payload = question_cache.get_payload(test_id)
+        if payload is None:
             return jsonify({"error": "Test not found"}), 404
-            
-        questions = Question.query.filter_by(test_id=test_id).order_by(Question.part).all()
-        question_list = []
-        for q in questions:
-            question_data = {
-                "question_id": q.question_id,
-                "part": q.part,
-                "question_text": q.question_text,
-                "question_type": q.question_type,
-                "options": []
-            }
-            if q.question_type == 'multiple_choice':
-                options = [{"option_id": opt.option_id, "option_text": opt.option_text} for opt in q.answer_options]
-                question_data["options"] = options
-            question_list.append(question_data)
-        
-        return jsonify(question_list), 200
+
+        response = current_app.response_class(payload.body, mimetype='application/json')
+        response.set_etag(payload.etag)
+        response.cache_control.no_cache = True
+        return response.make_conditional(request)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -71,46 +62,161 @@ def start_test_session():
         db.session.rollback()
         return jsonify({"error": str(e)}), 500
 
+def save_session_answers(session_id):
+    """
+    Autosaves answers while a student works through a session.
+    The answers are upserted in one statement that also checks the session is
+    still in progress, so no separate session lookup is needed on each click.
+    """
+    data = request.json or {}
+    answers = data.get('answers')
+    if not answers or not isinstance(answers, list):
+        return jsonify({"error": "Answers are required"}), 400
+
+    try:
+        rows = answer_store.answer_rows(session_id, answers)
+        written = answer_store.save_rows(rows)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 500
+
+    if rows and not written:
+        if db.session.get(StudentTestSession, session_id) is None:
+            return jsonify({"error": "Test session not found"}), 404
+        return jsonify({"error": "Test session already submitted"}), 409
+    return jsonify({"message": "Answers saved", "session_id": session_id}), 200
+
+def get_session_answers(session_id):
+    """
+    Returns the answers stored so far so a student can resume a session.
+    """
+    session = StudentTestSession.query.get(session_id)
+    if not session:
+        return jsonify({"error": "Test session not found"}), 404
+
+    try:
+        return jsonify({
+            "session_id": session_id,
+            "test_id": session.test_id,
+            "status": session.status,
+            "answers": answer_store.stored_answers(session_id)
+        }), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
 def submit_answers():
     """
     Submits a batch of answers for a test session.
+    Answers already autosaved for the session are included in the scoring.
+    With CLASSIFICATION_ASYNC the session is queued for classification and the
+    result is polled from /sessions/<session_id>/result.
     """
     data = request.json
     session_id = data.get('session_id')
-    answers = data.get('answers')
+    answers = data.get('answers') or []
 
-    if not session_id or not answers:
+    if not session_id or not isinstance(answers, list):
         return jsonify({"error": "Session ID and answers are required"}), 400
 
     session = StudentTestSession.query.get(session_id)
     if not session:
         return jsonify({"error": "Test session not found"}), 404
-    
+    if session.status != 'in_progress':
+        return jsonify({"error": "Test session already submitted"}), 409
+
     try:
-        for answer in answers:
-            new_answer = StudentAnswer(
-                session_id=session_id,
-                question_id=answer.get('question_id'),
-                selected_option_id=answer.get('selected_option_id'),
-                free_text_answer=answer.get('free_text_answer')
-            )
-            db.session.add(new_answer)
-        
-        # This is a placeholder for the result calculation logic.
-        # In a real-world scenario, you would perform the classification here.
-        test_result = TestResult(
-            session_id=session_id,
-            numbers_score=5,  # Placeholder score
-            logic_score=7,    # Placeholder score
-            shapes_score=8,   # Placeholder score
-            disability_likelihood="high",
-            outcome_message="Your results suggest a high likelihood of a learning difficulty.",
-            staff_breakdown={"notes": "Detailed breakdown for staff review"}
-        )
-        db.session.add(test_result)
-        
+        answer_store.save_rows(answer_store.answer_rows(session_id, answers))
+        # Claiming the session inside the write transaction makes later autosaves
+        # from any worker see it as submitted, and a concurrent submit get 409.
+        claimed = db.session.execute(
+            update(StudentTestSession)
+            .where(StudentTestSession.session_id == session_id, StudentTestSession.status == 'in_progress')
+            .values(status='submitted')
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if not claimed:
+            db.session.rollback()
+            return jsonify({"error": "Test session already submitted"}), 409
+
+        all_answers = answer_store.stored_answers(session_id)
+        if not all_answers:
+            db.session.rollback()
+            return jsonify({"error": "Session ID and answers are required"}), 400
+
+        if current_app.config["CLASSIFICATION_ASYNC"]:
+            job = classification.enqueue(session)
+            db.session.commit()
+            classification.worker.start(current_app._get_current_object())
+            classification.worker.notify()
+            return jsonify({
+                "message": "Answers submitted; results are being calculated",
+                "session_id": session_id,
+                "job_id": job.job_id,
+                "status_url": f"/api/sessions/{session_id}/result"
+            }), 202
+
+        test_result = classification.classify(session, all_answers)
+        if test_result is None:
+            db.session.rollback()
+            return jsonify({"error": "Test not found"}), 404
+
         db.session.commit()
-        return jsonify({"message": "Answers submitted and results calculated successfully", "result": test_result.outcome_message}), 200
+        return jsonify({
+            "message": "Answers submitted and results calculated successfully",
+            "result": test_result.outcome_message,
+            "recommendations": recommendations.for_result(test_result)
+        }), 200
     except Exception as e:
         db.session.rollback()
         return jsonify({"error": str(e)}), 500
+
+def get_session_result(session_id):
+    """
+    Returns the result of a submitted session, or the state of its classification job.
+    """
+    session = StudentTestSession.query.get(session_id)
+    if not session:
+        return jsonify({"error": "Test session not found"}), 404
+
+    test_result = session.test_result
+    if test_result is not None:
+        return jsonify({
+            "status": "completed",
+            "session_id": session_id,
+            "result": test_result.outcome_message,
+            "disability_likelihood": test_result.disability_likelihood,
+            "scores": {
+                "numbers": test_result.numbers_score,
+                "logic": test_result.logic_score,
+                "shapes": test_result.shapes_score
+            },
+            "recommendations": recommendations.for_result(test_result)
+        }), 200
+
+    job = ClassificationJob.query.filter_by(session_id=session_id).first()
+    if job is None:
+        return jsonify({"error": "Test session has not been submitted"}), 404
+    if job.status == 'failed' or session.status == 'failed':
+        return jsonify({"status": "failed", "session_id": session_id, "error": job.last_error}), 500
+
+    classification.worker.start(current_app._get_current_object())
+    return jsonify({"status": job.status, "session_id": session_id}), 202, {"Retry-After": "1"}
+
+def get_session_recommendations(session_id):
+    """
+    Returns the exercises recommended for the weak parts of a session's result.
+    """
+    session = StudentTestSession.query.get(session_id)
+    if not session:
+        return jsonify({"error": "Test session not found"}), 404
+    if session.test_result is None:
+        return jsonify({"error": "Test session has no result yet"}), 404
+
+    try:
+        return jsonify({
+            "session_id": session_id,
+            "recommendations": recommendations.for_result(session.test_result)
+        }), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
@@ -1,3 +1,11 @@
 from flask_sqlalchemy import SQLAlchemy
 
 db = SQLAlchemy()
+
+
+def init_migrate(app):
+    # Flask-Migrate imports Alembic, which is a large share of import time;
+    # it is only needed by the `flask db` commands.
+    from flask_migrate import Migrate
+
+    Migrate(app, db, render_as_batch=True)
@@ -0,0 +1,355 @@
+"""
+Per-request performance instrumentation.
+
+Records, per endpoint: latency, response size, SQL statement count and DB
+time, N+1 patterns (the same statement repeated within one request) and slow
+queries. Each worker keeps its own registry in memory and periodically writes
+it to METRICS_DIR; /api/metrics merges every worker's file and renders the
+Prometheus text format. When a worker exits, its counters and histograms are
+folded into one retired snapshot and its file is removed, so the directory
+does not grow with every restart and a reused pid never overwrites totals.
+"""
+import json
+import logging
+import os
+import threading
+import time
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+
+from app.extensions import db
+
+try:
+    import fcntl
+except ImportError:  # Windows: retiring is only serialized within the process
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 250)
+
+HELP = {
+    "http_requests_total": ("counter", "Requests handled, by endpoint, method and status."),
+    "http_request_duration_seconds": ("histogram", "Time spent handling a request."),
+    "http_response_size_bytes": ("histogram", "Size of response bodies."),
+    "db_statements_per_request": ("histogram", "SQL statements executed per request."),
+    "db_time_per_request_seconds": ("histogram", "Time spent in SQL per request."),
+    "db_n_plus_one_total": ("counter", "Requests that repeated one statement at least METRICS_N_PLUS_ONE_THRESHOLD times."),
+    "db_slow_queries_total": ("counter", "Statements slower than METRICS_SLOW_QUERY_MS."),
+    "app_startup_seconds": ("gauge", "Time create_app spent in each startup phase."),
+    "admission_in_flight": ("gauge", "Requests being handled, by endpoint class."),
+    "admission_queue_depth": ("gauge", "Requests waiting for a concurrency slot, by endpoint class."),
+    "admission_queued_total": ("counter", "Requests that had to wait for a concurrency slot."),
+    "admission_rejected_total": ("counter", "Requests rejected by admission control, by class and reason."),
+    "events_clients": ("gauge", "Open server-sent event streams."),
+    "events_published_total": ("counter", "Events appended to the event log, by type."),
+}
+
+
+class Registry:
+    """
+    Counters, gauges and histograms of one process, keyed by (name, labels).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = {}
+        self.gauges = {}
+        # key -> [bucket counts..., sum, count]
+        self.histograms = {}
+        self.buckets = {}
+
+    def inc(self, name, labels, amount=1):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def set(self, name, labels, value):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.gauges[key] = value
+
+    def observe(self, name, labels, value, buckets):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.buckets[name] = buckets
+            series = self.histograms.get(key)
+            if series is None:
+                series = self.histograms[key] = [0] * (len(buckets) + 2)
+            for index, upper in enumerate(buckets):
+                if value <= upper:
+                    series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def reset(self):
+        """
+        Clears everything recorded so far, e.g. in a freshly forked worker.
+        """
+        with self._lock:
+            self.counters.clear()
+            self.gauges.clear()
+            self.histograms.clear()
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "pid": os.getpid(),
+                "counters": [[name, list(labels), value] for (name, labels), value in self.counters.items()],
+                "gauges": [[name, list(labels), value] for (name, labels), value in self.gauges.items()],
+                "histograms": [[name, list(labels), list(series)] for (name, labels), series in self.histograms.items()],
+                "buckets": {name: list(buckets) for name, buckets in self.buckets.items()},
+            }
+
+
+registry = Registry()
+_flushed_at = 0.0
+_flush_lock = threading.Lock()
+
+
+RETIRED = "metrics-retired.json"
+
+
+def _snapshot_path(directory, pid):
+    return os.path.join(directory, f"metrics-{pid}.json")
+
+
+def _write(path, snapshot):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as handle:
+        json.dump(snapshot, handle)
+    os.replace(tmp_path, path)
+
+
+def _read(path):
+    try:
+        with open(path) as handle:
+            return json.load(handle)
+    except (OSError, ValueError):
+        return None
+
+
+def flush(app, force=False):
+    """
+    Writes this worker's registry to METRICS_DIR, at most every METRICS_FLUSH_INTERVAL seconds.
+    """
+    global _flushed_at
+    now = time.monotonic()
+    if not force and now - _flushed_at < app.config["METRICS_FLUSH_INTERVAL"]:
+        return
+    if not _flush_lock.acquire(blocking=force):
+        return
+    try:
+        _flushed_at = now
+        _write(_snapshot_path(app.config["METRICS_DIR"], os.getpid()), registry.snapshot())
+    finally:
+        _flush_lock.release()
+
+
+def _fold(into, snapshot):
+    counters = {(name, json.dumps(labels)): value for name, labels, value in into["counters"]}
+    histograms = {(name, json.dumps(labels)): series for name, labels, series in into["histograms"]}
+    for name, labels, value in snapshot["counters"]:
+        key = (name, json.dumps(labels))
+        counters[key] = counters.get(key, 0) + value
+    for name, labels, series in snapshot["histograms"]:
+        key = (name, json.dumps(labels))
+        merged = histograms.get(key)
+        histograms[key] = series if merged is None else [a + b for a, b in zip(merged, series)]
+    into["counters"] = [[name, json.loads(labels), value] for (name, labels), value in counters.items()]
+    into["histograms"] = [[name, json.loads(labels), series] for (name, labels), series in histograms.items()]
+    into["buckets"].update(snapshot["buckets"])
+
+
+def retire(app, pid):
+    """
+    Folds the counters and histograms of an exited worker into the retired
+    snapshot and removes its file. Gauges describe live state and are dropped.
+    """
+    directory = app.config["METRICS_DIR"]
+    path = _snapshot_path(directory, pid)
+    lock_fd = os.open(os.path.join(directory, "metrics-retired.lock"), os.O_RDWR | os.O_CREAT, 0o600)
+    try:
+        if fcntl is not None:
+            fcntl.flock(lock_fd, fcntl.LOCK_EX)
+        snapshot = _read(path)
+        if snapshot is None:
+            return
+        retired_path = os.path.join(directory, RETIRED)
+        retired = _read(retired_path) or {"pid": None, "counters": [], "gauges": [], "histograms": [], "buckets": {}}
+        _fold(retired, snapshot)
+        _write(retired_path, retired)
+        os.remove(path)
+    finally:
+        os.close(lock_fd)
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def collect(app):
+    """
+    Merges the snapshots of all workers and the retired snapshot. Counters and
+    histograms of exited workers are kept so totals never go backwards; their
+    gauges are dropped.
+    """
+    flush(app, force=True)
+    counters = {}
+    gauges = {}
+    histograms = {}
+    buckets = {}
+    directory = app.config["METRICS_DIR"]
+    for filename in os.listdir(directory):
+        if not (filename.startswith("metrics-") and filename.endswith(".json")):
+            continue
+        snapshot = _read(os.path.join(directory, filename))
+        if snapshot is None:
+            continue
+        for name, labels, value in snapshot["counters"]:
+            key = (name, tuple(tuple(pair) for pair in labels))
+            counters[key] = counters.get(key, 0) + value
+        if snapshot["pid"] is not None and _alive(snapshot["pid"]):
+            for name, labels, value in snapshot["gauges"]:
+                key = (name, tuple(tuple(pair) for pair in labels))
+                gauges[key] = gauges.get(key, 0) + value
+        for name, labels, series in snapshot["histograms"]:
+            key = (name, tuple(tuple(pair) for pair in labels))
+            merged = histograms.get(key)
+            histograms[key] = series if merged is None else [a + b for a, b in zip(merged, series)]
+        buckets.update(snapshot["buckets"])
+    return counters, gauges, histograms, buckets
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (
+        '{}="{}"'.format(key, str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for key, value in pairs
+    )
+    return "{" + ",".join(escaped) + "}"
+
+
+def render(app):
+    """
+    Renders the merged metrics in the Prometheus text exposition format.
+    """
+    counters, gauges, histograms, buckets = collect(app)
+    lines = []
+    described = set()
+
+    def describe(name, kind):
+        if name in described:
+            return
+        described.add(name)
+        help_text = HELP.get(name, (kind, name.replace("_", " ")))[1]
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+
+    for (name, labels), value in sorted(counters.items()):
+        describe(name, "counter")
+        lines.append(f"{name}{_format_labels(labels)} {value}")
+    for (name, labels), value in sorted(gauges.items()):
+        describe(name, "gauge")
+        lines.append(f"{name}{_format_labels(labels)} {value}")
+    for (name, labels), series in sorted(histograms.items()):
+        describe(name, "histogram")
+        for upper, count in zip(buckets[name], series):
+            lines.append(f"{name}_bucket{_format_labels(labels, [('le', upper)])} {count}")
+        lines.append(f"{name}_bucket{_format_labels(labels, [('le', '+Inf')])} {series[-1]}")
+        lines.append(f"{name}_sum{_format_labels(labels)} {series[-2]}")
+        lines.append(f"{name}_count{_format_labels(labels)} {series[-1]}")
+    return "\n".join(lines) + "\n"
+
+
+def _counting(iterable, endpoint):
+    size = 0
+    try:
+        for chunk in iterable:
+            size += len(chunk)
+            yield chunk
+    finally:
+        registry.observe("http_response_size_bytes", {"endpoint": endpoint}, size, SIZE_BUCKETS)
+
+
+def init_app(app):
+    """
+    Installs the request hooks and SQL event listeners.
+    """
+    if not app.config["METRICS_ENABLED"]:
+        return
+    os.makedirs(app.config["METRICS_DIR"], exist_ok=True)
+    slow_query_seconds = app.config["METRICS_SLOW_QUERY_MS"] / 1000
+    n_plus_one_threshold = app.config["METRICS_N_PLUS_ONE_THRESHOLD"]
+
+    @app.before_request
+    def start_timer():
+        g._metrics_start = time.perf_counter()
+        g._sql_count = 0
+        g._sql_time = 0.0
+        g._sql_shapes = {}
+
+    @app.after_request
+    def record_request(response):
+        start = g.pop("_metrics_start", None)
+        if start is None:
+            return response
+        endpoint = request.endpoint or "unmatched"
+        labels = {"endpoint": endpoint}
+        registry.observe("http_request_duration_seconds", labels, time.perf_counter() - start, LATENCY_BUCKETS)
+        registry.inc("http_requests_total", {
+            "endpoint": endpoint, "method": request.method, "status": str(response.status_code)
+        })
+        registry.observe("db_statements_per_request", labels, g._sql_count, COUNT_BUCKETS)
+        registry.observe("db_time_per_request_seconds", labels, g._sql_time, LATENCY_BUCKETS)
+
+        statement, repeats = max(g._sql_shapes.items(), key=lambda item: item[1], default=(None, 0))
+        if repeats >= n_plus_one_threshold:
+            registry.inc("db_n_plus_one_total", labels)
+            logger.warning("Possible N+1 in %s: statement ran %d times: %.200s", endpoint, repeats, statement)
+
+        if response.is_streamed:
+            response.response = _counting(response.response, endpoint)
+        else:
+            registry.observe("http_response_size_bytes", labels, response.content_length or 0, SIZE_BUCKETS)
+
+        flush(app)
+        return response
+
+    with app.app_context():
+        engine = db.engine
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("_query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(exception_context):
+        # A failed statement never reaches after_cursor_execute; drop its start time here.
+        conn = exception_context.connection
+        if conn is not None and exception_context.execution_context is not None and conn.info.get("_query_start"):
+            conn.info["_query_start"].pop()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["_query_start"].pop()
+        endpoint = "background"
+        if has_request_context() and "_sql_shapes" in g:
+            endpoint = request.endpoint or "unmatched"
+            g._sql_count += 1
+            g._sql_time += elapsed
+            g._sql_shapes[statement] = g._sql_shapes.get(statement, 0) + 1
+        if elapsed >= slow_query_seconds:
+            registry.inc("db_slow_queries_total", {"endpoint": endpoint})
+            logger.warning("Slow query (%.1f ms) in %s: %.500s", elapsed * 1000, endpoint, statement)
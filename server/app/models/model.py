@@ -1,26 +1,41 @@
 import uuid
 from datetime import datetime
-from werkzeug.security import generate_password_hash, check_password_hash
 from app.extensions import db
+from app.services import passwords
 
 
 class User(db.Model):
     __tablename__ = "users"
+    __table_args__ = (
+        db.Index('ix_users_faculty_course', 'faculty', 'course'),
+        db.Index('ix_users_role_created_at_user_id', 'role', 'created_at', 'user_id'),
+    )
 
     user_id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
 
     student_number = db.Column(db.String(20), unique=True, nullable=True) # Unique identifier for students
     first_name = db.Column(db.String(50), nullable=True)
     last_name = db.Column(db.String(50), nullable=True)
+    username = db.Column(db.String(50), unique=True, nullable=True)
     email = db.Column(db.String(255), unique=True, nullable=False)
     faculty = db.Column(db.String(100), nullable=True)
     course = db.Column(db.String(100), nullable=True)
     
     role = db.Column(db.String(20), nullable=False, default="student") # 'student' or 'staff'
     password_hash = db.Column(db.String(255), nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
 
     # Relationship to TestResult, StudentFollowUp, and StudentSurvey for easy data access
-    test_results = db.relationship('TestResult', backref='student', lazy=True)
+    # Results hang off test sessions, so this relationship is read through student_test_sessions
+    test_results = db.relationship(
+        'TestResult',
+        secondary='student_test_sessions',
+        primaryjoin='User.user_id == StudentTestSession.user_id',
+        secondaryjoin='StudentTestSession.session_id == TestResult.session_id',
+        backref=db.backref('student', uselist=False, viewonly=True),
+        viewonly=True,
+        lazy=True
+    )
     follow_ups = db.relationship('StudentFollowUp', foreign_keys='StudentFollowUp.student_id', backref='student_user', lazy=True)
     staff_follow_ups = db.relationship('StudentFollowUp', foreign_keys='StudentFollowUp.staff_id', backref='staff_user', lazy=True)
     survey = db.relationship('StudentSurvey', backref='student', uselist=False, lazy=True)
@@ -28,13 +43,26 @@ class User(db.Model):
     def __repr__(self):
         return f"<User {self.first_name} {self.last_name} ({self.student_number or self.email})>"
 
+    @property
+    def full_name(self):
+        return " ".join(part for part in (self.first_name, self.last_name) if part) or None
+
+    @full_name.setter
+    def full_name(self, value):
+        """Split 'Name Surname' into first and last name."""
+        self.first_name, _, self.last_name = (value or "").partition(" ")
+
     def set_password(self, password):
         """Hash the password before storing it."""
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = passwords.hash_password(password)
 
     def check_password(self, password):
         """Verify the password."""
-        return check_password_hash(self.password_hash, password)
+        return passwords.verify_password(self.password_hash, password)
+
+    def password_needs_rehash(self):
+        """Whether the stored hash predates the configured hashing parameters."""
+        return passwords.needs_rehash(self.password_hash)
 
 # This table stores the details of each test.
 class Test(db.Model):
@@ -43,6 +71,8 @@ class Test(db.Model):
     test_id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     name = db.Column(db.String(100), nullable=False)
     description = db.Column(db.Text, nullable=True)
+    # Bumped whenever the test's questions or answer options change, so cached answer keys can be rebuilt
+    content_version = db.Column(db.Integer, nullable=False, default=1)
 
     # Relationship to questions and test sessions
     questions = db.relationship('Question', backref='test', lazy=True)
@@ -51,6 +81,9 @@ class Test(db.Model):
 # This table stores the individual questions for a test.
 class Question(db.Model):
     __tablename__ = "questions"
+    __table_args__ = (
+        db.Index('ix_questions_test_id_part', 'test_id', 'part'),
+    )
 
     question_id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     test_id = db.Column(db.String(36), db.ForeignKey('tests.test_id'), nullable=False)
@@ -59,12 +92,16 @@ class Question(db.Model):
     question_type = db.Column(db.String(50), nullable=False) # 'multiple_choice', 'free_text'
 
     # Relationship to answer options and student answers
-    answer_options = db.relationship('AnswerOption', backref='question', lazy=True)
+    # Ordered so every worker serializes the same options in the same order (and the same ETag)
+    answer_options = db.relationship('AnswerOption', backref='question', lazy=True, order_by='AnswerOption.option_id')
     student_answers = db.relationship('StudentAnswer', backref='question', lazy=True)
 
 # This table stores the answer options for multiple-choice questions.
 class AnswerOption(db.Model):
     __tablename__ = "answer_options"
+    __table_args__ = (
+        db.Index('ix_answer_options_question_id_is_correct', 'question_id', 'is_correct'),
+    )
 
     option_id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     question_id = db.Column(db.String(36), db.ForeignKey('questions.question_id'), nullable=False)
@@ -74,13 +111,18 @@ class AnswerOption(db.Model):
 # This table tracks a student's progress on a test.
 class StudentTestSession(db.Model):
     __tablename__ = "student_test_sessions"
+    __table_args__ = (
+        db.Index('ix_student_test_sessions_user_id_start_time', 'user_id', 'start_time'),
+        db.Index('ix_student_test_sessions_test_id_status', 'test_id', 'status'),
+        db.Index('ix_student_test_sessions_end_time_session_id', 'end_time', 'session_id'),
+    )
 
     session_id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     user_id = db.Column(db.String(36), db.ForeignKey('users.user_id'), nullable=False)
     test_id = db.Column(db.String(36), db.ForeignKey('tests.test_id'), nullable=False)
     start_time = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     end_time = db.Column(db.DateTime, nullable=True)
-    status = db.Column(db.String(20), nullable=False, default="in_progress") # 'in_progress', 'completed'
+    status = db.Column(db.String(20), nullable=False, default="in_progress") # 'in_progress', 'submitted', 'completed', 'failed'
 
     # Relationship to student answers and test results
     student_answers = db.relationship('StudentAnswer', backref='test_session', lazy=True)
@@ -89,6 +131,11 @@ class StudentTestSession(db.Model):
 # This table stores the student's answer to each question in a session.
 class StudentAnswer(db.Model):
     __tablename__ = "student_answers"
+    # One stored answer per question per session; autosaves upsert on this key
+    __table_args__ = (
+        db.UniqueConstraint('session_id', 'question_id', name='uq_student_answers_session_question'),
+        db.Index('ix_student_answers_question_id', 'question_id'),
+    )
 
     answer_id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     session_id = db.Column(db.String(36), db.ForeignKey('student_test_sessions.session_id'), nullable=False)
@@ -98,6 +145,24 @@ class StudentAnswer(db.Model):
     # For free text questions
     free_text_answer = db.Column(db.Text, nullable=True)
 
+# This table queues submitted sessions for background classification.
+# Jobs left 'running' past their lease (e.g. after a worker crash) are picked up again.
+class ClassificationJob(db.Model):
+    __tablename__ = "classification_jobs"
+    __table_args__ = (
+        db.Index('ix_classification_jobs_status_created_at', 'status', 'created_at'),
+    )
+
+    job_id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    session_id = db.Column(db.String(36), db.ForeignKey('student_test_sessions.session_id'), nullable=False, unique=True)
+    status = db.Column(db.String(20), nullable=False, default="queued") # 'queued', 'running', 'completed', 'failed'
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    last_error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    claimed_at = db.Column(db.DateTime, nullable=True)
+    completed_at = db.Column(db.DateTime, nullable=True)
+    not_before = db.Column(db.DateTime, nullable=True) # a failed attempt is retried after a backoff
+
 # This table holds the calculated results for a completed test session.
 class TestResult(db.Model):
     __tablename__ = "test_results"
@@ -124,11 +189,17 @@ class ExerciseContent(db.Model):
     description = db.Column(db.Text, nullable=True)
     video_link = db.Column(db.String(255), nullable=True)
     recommended_for_part = db.Column(db.String(20), nullable=False) # 'Numbers', 'Logic', 'Shapes'
+    difficulty = db.Column(db.Integer, nullable=False, default=1, server_default='1') # 1 (foundation) to 3 (advanced)
     is_approved = db.Column(db.Boolean, nullable=False, default=False)
 
 # This table is used by staff to flag students and add notes for follow-up.
 class StudentFollowUp(db.Model):
     __tablename__ = "student_follow_ups"
+    __table_args__ = (
+        db.Index('ix_student_follow_ups_student_id_flagged_date', 'student_id', 'flagged_date'),
+        db.Index('ix_student_follow_ups_staff_id', 'staff_id'),
+        db.Index('ix_student_follow_ups_flagged_date_followup_id', 'flagged_date', 'followup_id'),
+    )
 
     followup_id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     student_id = db.Column(db.String(36), db.ForeignKey('users.user_id'), nullable=False)
@@ -139,8 +210,70 @@ class StudentFollowUp(db.Model):
 # This new table stores a student's initial survey data.
 class StudentSurvey(db.Model):
     __tablename__ = "student_surveys"
+    __table_args__ = (
+        db.Index('ix_student_surveys_submission_date_survey_id', 'submission_date', 'survey_id'),
+    )
 
     survey_id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     user_id = db.Column(db.String(36), db.ForeignKey('users.user_id'), nullable=False, unique=True)
     survey_data = db.Column(db.JSON, nullable=False)
     submission_date = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+# This table holds incrementally maintained result counters for the reporting dashboard.
+# One row per test, part ('overall' for the whole test), faculty, course, likelihood band and day.
+class ResultRollup(db.Model):
+    __tablename__ = "result_rollups"
+
+    test_id = db.Column(db.String(36), primary_key=True)
+    part = db.Column(db.String(20), primary_key=True)
+    faculty = db.Column(db.String(100), primary_key=True, default="")
+    course = db.Column(db.String(100), primary_key=True, default="")
+    disability_likelihood = db.Column(db.String(20), primary_key=True)
+    period = db.Column(db.String(10), primary_key=True) # 'YYYY-MM-DD'
+    result_count = db.Column(db.Integer, nullable=False, default=0)
+    score_sum = db.Column(db.Integer, nullable=False, default=0)
+    max_score_sum = db.Column(db.Integer, nullable=False, default=0)
+    pass_count = db.Column(db.Integer, nullable=False, default=0)
+
+# This table holds the number of results per score, for score distributions,
+# split by the same cohort dimensions as result_rollups so the histogram can be filtered too.
+class ScoreDistribution(db.Model):
+    __tablename__ = "score_distributions"
+
+    test_id = db.Column(db.String(36), primary_key=True)
+    part = db.Column(db.String(20), primary_key=True)
+    faculty = db.Column(db.String(100), primary_key=True, default="")
+    course = db.Column(db.String(100), primary_key=True, default="")
+    disability_likelihood = db.Column(db.String(20), primary_key=True)
+    period = db.Column(db.String(10), primary_key=True) # 'YYYY-MM-DD'
+    score = db.Column(db.Integer, primary_key=True)
+    result_count = db.Column(db.Integer, nullable=False, default=0)
+
+# This table holds values extracted from survey_data and staff_breakdown at the JSON_FIELDS paths,
+# one row per scalar (or array element), so screening queries can filter inside the database.
+class JsonField(db.Model):
+    __tablename__ = "json_fields"
+    __table_args__ = (
+        db.Index('ix_json_fields_source_field_text', 'source', 'field', 'value_text', 'user_id'),
+        db.Index('ix_json_fields_source_field_number', 'source', 'field', 'value_number', 'user_id'),
+        db.Index('ix_json_fields_source_row_id', 'source', 'row_id'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    source = db.Column(db.String(20), nullable=False) # 'survey' or 'result'
+    row_id = db.Column(db.String(36), nullable=False) # survey_id or result_id
+    user_id = db.Column(db.String(36), nullable=False)
+    field = db.Column(db.String(64), nullable=False)
+    value_type = db.Column(db.String(10), nullable=False) # json_each type: 'text', 'integer', 'real', 'true' or 'false'
+    value_text = db.Column(db.Text, nullable=True)
+    value_number = db.Column(db.Float, nullable=True) # numbers, and booleans as 1/0
+
+# This table lists tokens revoked by logout until they would have expired anyway.
+class RevokedToken(db.Model):
+    __tablename__ = "revoked_tokens"
+    __table_args__ = (
+        db.Index('ix_revoked_tokens_expires_at', 'expires_at'),
+    )
+
+    jti = db.Column(db.String(36), primary_key=True)
+    expires_at = db.Column(db.DateTime, nullable=False)
@@ -1,6 +1,11 @@
 from flask import Blueprint
 
 from app.routes.auth_router import auth_router_bp
+from app.routes.test_router import test_bp
+from app.routes.report_router import report_bp
+from app.routes.export_router import export_bp
+from app.routes.metrics_router import metrics_bp
+from app.routes.staff_router import staff_bp
 
 router_bp = Blueprint('router', __name__, url_prefix='/api')
 
@@ -8,4 +13,9 @@ router_bp = Blueprint('router', __name__, url_prefix='/api')
 def index():
     return {"message": "Hello, World! This an API"}, 200 
 
-router_bp.register_blueprint(auth_router_bp)
\ No newline at end of file
+router_bp.register_blueprint(auth_router_bp)
+router_bp.register_blueprint(test_bp)
+router_bp.register_blueprint(report_bp)
+router_bp.register_blueprint(export_bp)
+router_bp.register_blueprint(metrics_bp)
+router_bp.register_blueprint(staff_bp)
\ No newline at end of file
@@ -1,6 +1,6 @@
 from flask import Blueprint
 
-from app.controllers.auth_controller import login, signup, check_email, check_username
+from app.controllers.auth_controller import login, signup, check_email, check_username, check_availability, logout
 
 auth_router_bp = Blueprint('auth_router', __name__, url_prefix='/auth')
 
@@ -20,6 +20,10 @@ def check_email_route():
 def check_username_route():
     return check_username()
 
+@auth_router_bp.route('/check-availability', methods=['POST'])
+def check_availability_route():
+    return check_availability()
+
 @auth_router_bp.route('/logout', methods=['POST'])
 def logout_route():
-    return {"message": "Logout successful"}, 200
\ No newline at end of file
+    return logout()
\ No newline at end of file
@@ -0,0 +1,22 @@
+from flask import Blueprint
+from app.controllers import export_controller
+from app.services.tokens import token_required
+
+# Create a Blueprint for staff export routes
+export_bp = Blueprint('export_bp', __name__, url_prefix='/exports')
+
+@export_bp.route('/<dataset>.csv', methods=['GET'])
+@token_required(role='staff')
+def export_csv(dataset):
+    """
+    API endpoint to stream a dataset (results, follow-ups, surveys) as CSV.
+    """
+    return export_controller.export_dataset(dataset, "csv")
+
+@export_bp.route('/<dataset>.pdf', methods=['GET'])
+@token_required(role='staff')
+def export_pdf(dataset):
+    """
+    API endpoint to stream a dataset (results, follow-ups, surveys) as a paginated PDF.
+    """
+    return export_controller.export_dataset(dataset, "pdf")
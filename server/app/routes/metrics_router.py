@@ -0,0 +1,27 @@
+from flask import Blueprint, current_app, request
+
+from app import instrumentation
+from app.services.tokens import token_required
+
+# Create a Blueprint for the Prometheus metrics endpoint
+metrics_bp = Blueprint('metrics_bp', __name__)
+
+@metrics_bp.route('/metrics', methods=['GET'])
+def metrics():
+    """
+    API endpoint exposing request and database metrics of all workers in Prometheus text format.
+    """
+    if not current_app.config["METRICS_ENABLED"]:
+        return {"error": "Metrics are disabled"}, 404
+    # Scrapers on METRICS_ALLOWED_IPS need no token; anyone else must be staff.
+    # Only the socket's peer counts: X-Forwarded-For is whatever the client sent.
+    if request.remote_addr in current_app.config["METRICS_ALLOWED_IPS"]:
+        return _render()
+    return _render_for_staff()
+
+
+def _render():
+    return instrumentation.render(current_app), 200, {"Content-Type": "text/plain; version=0.0.4; charset=utf-8"}
+
+
+_render_for_staff = token_required(role='staff')(_render)
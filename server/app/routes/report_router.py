@@ -0,0 +1,30 @@
+from flask import Blueprint
+from app.controllers import report_controller
+from app.services.tokens import token_required
+
+# Create a Blueprint for the Disability Unit reporting routes
+report_bp = Blueprint('report_bp', __name__, url_prefix='/reports')
+
+@report_bp.route('/distribution', methods=['GET'])
+@token_required(role='staff')
+def distribution():
+    """
+    API endpoint for likelihood band counts and score histograms.
+    """
+    return report_controller.get_distribution()
+
+@report_bp.route('/pass-rates', methods=['GET'])
+@token_required(role='staff')
+def pass_rates():
+    """
+    API endpoint for pass rates grouped by test, part, faculty, course or likelihood.
+    """
+    return report_controller.get_pass_rates()
+
+@report_bp.route('/trends', methods=['GET'])
+@token_required(role='staff')
+def trends():
+    """
+    API endpoint for results and pass rates over time.
+    """
+    return report_controller.get_trends()
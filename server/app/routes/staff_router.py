@@ -0,0 +1,87 @@
+from flask import Blueprint
+from app.controllers import staff_controller, exercise_controller
+from app.services.tokens import token_required, ticket_required
+
+# Create a Blueprint for the staff dashboard listings
+staff_bp = Blueprint('staff_bp', __name__, url_prefix='/staff')
+
+@staff_bp.route('/students', methods=['GET'])
+@token_required(role='staff')
+def students():
+    """
+    API endpoint to page through students, newest registrations first, filtered by faculty, course, test, likelihood and result date.
+    """
+    return staff_controller.list_records("students")
+
+@staff_bp.route('/results', methods=['GET'])
+@token_required(role='staff')
+def results():
+    """
+    API endpoint to page through test results, newest first.
+    """
+    return staff_controller.list_records("results")
+
+@staff_bp.route('/follow-ups', methods=['GET'])
+@token_required(role='staff')
+def follow_ups():
+    """
+    API endpoint to page through student follow-ups, newest first.
+    """
+    return staff_controller.list_records("follow-ups")
+
+@staff_bp.route('/follow-ups', methods=['POST'])
+@token_required(role='staff')
+def create_follow_up():
+    """
+    API endpoint to flag a student for follow-up.
+    """
+    return staff_controller.create_follow_up()
+
+@staff_bp.route('/surveys', methods=['GET'])
+@token_required(role='staff')
+def surveys():
+    """
+    API endpoint to page through student surveys, newest first.
+    """
+    return staff_controller.list_records("surveys")
+
+@staff_bp.route('/exercises', methods=['POST'])
+@token_required(role='staff')
+def create_exercise():
+    """
+    API endpoint to add an exercise.
+    """
+    return exercise_controller.create_exercise()
+
+@staff_bp.route('/exercises/<exercise_id>', methods=['PATCH'])
+@token_required(role='staff')
+def update_exercise(exercise_id):
+    """
+    API endpoint to edit an exercise's content, part, difficulty or approval.
+    """
+    return exercise_controller.update_exercise(exercise_id)
+
+@staff_bp.route('/exercises/<exercise_id>/approve', methods=['POST'])
+@token_required(role='staff')
+def approve_exercise(exercise_id):
+    """
+    API endpoint to approve an exercise for recommendation.
+    """
+    return exercise_controller.approve_exercise(exercise_id)
+
+@staff_bp.route('/events/ticket', methods=['POST'])
+@token_required(role='staff')
+def events_ticket():
+    """
+    API endpoint to exchange a staff token for a short-lived ticket that opens the event stream.
+    """
+    return staff_controller.issue_events_ticket()
+
+@staff_bp.route('/events', methods=['GET'])
+@ticket_required('events', role='staff')
+def events():
+    """
+    API endpoint for a server-sent event stream of new results and follow-ups.
+    EventSource cannot set headers, so it authenticates with ?ticket= instead of a token.
+    """
+    return staff_controller.stream_events()
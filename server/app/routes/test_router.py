@@ -25,9 +25,37 @@ def start_session():
     """
     return test_controller.start_test_session()
 
+@test_bp.route('/sessions/<session_id>/answers', methods=['POST'])
+def save_answers(session_id):
+    """
+    API endpoint to autosave answers while a test is in progress.
+    """
+    return test_controller.save_session_answers(session_id)
+
+@test_bp.route('/sessions/<session_id>/answers', methods=['GET'])
+def get_answers(session_id):
+    """
+    API endpoint to fetch stored answers so a session can be resumed.
+    """
+    return test_controller.get_session_answers(session_id)
+
 @test_bp.route('/sessions/submit', methods=['POST'])
 def submit_session():
     """
     API endpoint to submit test answers and get results.
     """
     return test_controller.submit_answers()
+
+@test_bp.route('/sessions/<session_id>/result', methods=['GET'])
+def get_result(session_id):
+    """
+    API endpoint to poll the classification result of a submitted session.
+    """
+    return test_controller.get_session_result(session_id)
+
+@test_bp.route('/sessions/<session_id>/recommendations', methods=['GET'])
+def get_recommendations(session_id):
+    """
+    API endpoint for the exercises recommended from a session's result.
+    """
+    return test_controller.get_session_recommendations(session_id)
@@ -0,0 +1,173 @@
+"""
+Materialized cohort analytics for the Disability Unit reports.
+
+Every TestResult written through the ORM is folded into the result_rollups and
+score_distributions counters in the same transaction, so report queries only
+touch summary rows and never rescan test_results. Archiving sessions leaves
+the summaries as they are; a rebuild reads archived results as well.
+"""
+from datetime import datetime
+
+from flask import current_app, has_app_context
+from sqlalchemy import event, select, delete, union_all
+from sqlalchemy.dialects.sqlite import insert
+
+from app.extensions import db
+from app.models.model import (
+    TestResult, StudentTestSession, User, ResultRollup, ScoreDistribution
+)
+from app.services import archive
+
+OVERALL = "overall"
+
+
+def _pass_mark():
+    if has_app_context():
+        return current_app.config.get("REPORT_PASS_MARK", 0.5)
+    return 0.5
+
+
+def rollup_rows(result, test_id, faculty, course, completed_at):
+    """
+    Returns the rollup and distribution rows a single result contributes.
+    `result` is a mapping with the TestResult columns.
+    """
+    pass_mark = _pass_mark()
+    period = (completed_at or datetime.utcnow()).strftime("%Y-%m-%d")
+    parts = (result.get("staff_breakdown") or {}).get("parts") or {}
+    base = {
+        "test_id": test_id,
+        "faculty": faculty or "",
+        "course": course or "",
+        "disability_likelihood": result["disability_likelihood"],
+        "period": period,
+    }
+
+    rollups = []
+    distributions = []
+    correct_total = 0
+    max_total = 0
+    for part, breakdown in parts.items():
+        correct = breakdown.get("correct", 0)
+        total = breakdown.get("total", 0)
+        correct_total += correct
+        max_total += total
+        rollups.append(dict(
+            base, part=part, result_count=1, score_sum=correct, max_score_sum=total,
+            pass_count=int(total > 0 and correct / total >= pass_mark),
+        ))
+        distributions.append(dict(base, part=part, score=correct, result_count=1))
+
+    rollups.append(dict(
+        base, part=OVERALL, result_count=1, score_sum=correct_total, max_score_sum=max_total,
+        pass_count=int(max_total > 0 and correct_total / max_total >= pass_mark),
+    ))
+    distributions.append(dict(base, part=OVERALL, score=correct_total, result_count=1))
+    return rollups, distributions
+
+
+def _upsert(connection, model, rows, keys, counters):
+    if not rows:
+        return
+    table = model.__table__
+    stmt = insert(table)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c[key] for key in keys],
+        set_={name: table.c[name] + stmt.excluded[name] for name in counters},
+    )
+    connection.execute(stmt, rows)
+
+
+def apply_rows(connection, rollups, distributions):
+    """
+    Adds the given counter rows onto the summary tables.
+    """
+    _upsert(
+        connection, ResultRollup, rollups,
+        ["test_id", "part", "faculty", "course", "disability_likelihood", "period"],
+        ["result_count", "score_sum", "max_score_sum", "pass_count"],
+    )
+    _upsert(
+        connection, ScoreDistribution, distributions,
+        ["test_id", "part", "faculty", "course", "disability_likelihood", "period", "score"],
+        ["result_count"],
+    )
+
+
+def _context_query(session_ids, sessions=StudentTestSession.__table__):
+    return (
+        select(
+            sessions.c.session_id,
+            sessions.c.test_id,
+            sessions.c.end_time,
+            User.faculty,
+            User.course,
+        )
+        .join(User, User.user_id == sessions.c.user_id)
+        .where(sessions.c.session_id.in_(session_ids))
+    )
+
+
+def record_results(connection, results, include_archive=False):
+    """
+    Folds new results (mappings with the TestResult columns) into the summary tables.
+    """
+    results = list(results)
+    if not results:
+        return
+    session_ids = [r["session_id"] for r in results]
+    query = _context_query(session_ids)
+    if include_archive:
+        query = union_all(query, _context_query(session_ids, archive.sessions))
+    context = {row.session_id: row for row in connection.execute(query)}
+    rollups = []
+    distributions = []
+    for result in results:
+        row = context.get(result["session_id"])
+        if row is None:
+            continue
+        r, d = rollup_rows(result, row.test_id, row.faculty, row.course, row.end_time)
+        rollups.extend(r)
+        distributions.extend(d)
+    apply_rows(connection, rollups, distributions)
+
+
+def _after_flush(session, flush_context):
+    results = [
+        {
+            "session_id": obj.session_id,
+            "disability_likelihood": obj.disability_likelihood,
+            "staff_breakdown": obj.staff_breakdown,
+        }
+        for obj in session.new
+        if isinstance(obj, TestResult)
+    ]
+    if results:
+        record_results(session.connection(), results)
+
+
+def rebuild(batch_size=1000):
+    """
+    Recomputes the summary tables from test_results and the archived results.
+    Used after bulk loads or when the pass mark changes.
+    """
+    connection = db.session.connection()
+    connection.execute(delete(ResultRollup))
+    connection.execute(delete(ScoreDistribution))
+
+    rows = db.session.execute(
+        union_all(*(
+            select(table.c.session_id, table.c.disability_likelihood, table.c.staff_breakdown)
+            for table in (TestResult.__table__, archive.results)
+        )).execution_options(yield_per=batch_size)
+    )
+    count = 0
+    for batch in rows.partitions():
+        results = [dict(row._mapping) for row in batch]
+        record_results(connection, results, include_archive=True)
+        count += len(results)
+    db.session.commit()
+    return count
+
+
+event.listen(db.session, "after_flush", _after_flush)
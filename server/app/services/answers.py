@@ -0,0 +1,84 @@
+"""
+Answer ingestion for test sessions.
+
+Answers are written with a single executemany upsert keyed on
+(session_id, question_id), straight to the database on every autosave so
+whichever worker handles the next request sees them. The upsert only writes
+while the session is in progress: once a submit has committed, a late
+autosave from any worker is refused instead of changing the scored session.
+"""
+import uuid
+
+from sqlalchemy import select, exists, bindparam
+from sqlalchemy.dialects.sqlite import insert
+
+from app.extensions import db
+from app.models.model import StudentAnswer, StudentTestSession
+
+COLUMNS = ("answer_id", "session_id", "question_id", "selected_option_id", "free_text_answer")
+
+
+def answer_rows(session_id, answers):
+    """
+    Turns submitted answers into insert rows, keeping the last answer per question.
+    """
+    rows = {}
+    for answer in answers:
+        question_id = answer.get('question_id')
+        if not question_id:
+            continue
+        rows[question_id] = {
+            "answer_id": str(uuid.uuid4()),
+            "session_id": session_id,
+            "question_id": question_id,
+            "selected_option_id": answer.get('selected_option_id'),
+            "free_text_answer": answer.get('free_text_answer'),
+        }
+    return list(rows.values())
+
+
+def _upsert_statement():
+    table = StudentAnswer.__table__
+    in_progress = exists().where(
+        StudentTestSession.session_id == bindparam("session_id"),
+        StudentTestSession.status == "in_progress",
+    )
+    stmt = insert(table).from_select(
+        COLUMNS,
+        select(*(bindparam(name, type_=table.c[name].type) for name in COLUMNS)).where(in_progress),
+    )
+    return stmt.on_conflict_do_update(
+        index_elements=[table.c.session_id, table.c.question_id],
+        set_={
+            "selected_option_id": stmt.excluded.selected_option_id,
+            "free_text_answer": stmt.excluded.free_text_answer,
+        },
+    )
+
+
+_UPSERT = _upsert_statement()
+
+
+def save_rows(rows):
+    """
+    Upserts answer rows in one executemany statement, skipping rows whose
+    session is no longer in progress. Returns the number of rows written.
+    The caller commits.
+    """
+    if not rows:
+        return 0
+    return db.session.execute(_UPSERT, rows).rowcount
+
+
+def stored_answers(session_id):
+    """
+    Returns the answers already stored for a session as plain dicts.
+    """
+    result = db.session.execute(
+        select(
+            StudentAnswer.question_id,
+            StudentAnswer.selected_option_id,
+            StudentAnswer.free_text_answer,
+        ).where(StudentAnswer.session_id == session_id)
+    )
+    return [dict(row._mapping) for row in result]
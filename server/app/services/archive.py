@@ -0,0 +1,205 @@
+"""
+Hot/cold archival of completed test sessions.
+
+Completed sessions that ended more than ARCHIVE_AFTER_DAYS ago are moved,
+with their answers and results, out of the live database into a second
+SQLite file (ARCHIVE_DB_PATH) that every connection attaches as `archive`.
+The archived rows keep their columns and gain a `term` (e.g. 2024-S1) so a
+whole term can be inspected or exported on its own. The live tables and
+their indexes stay the size of the current intake, which keeps lookups,
+WAL checkpoints and backups of the hot file cheap.
+
+Report summaries are not touched: the results were folded into them when
+they were written. Listings and exports read the archive only when asked
+(include_archive), through UNION ALL with the live tables.
+"""
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import (
+    Column, Index, Integer, MetaData, String, Table, case, cast, delete, event, func, insert, select, text
+)
+from sqlalchemy.dialects import sqlite
+from sqlalchemy.schema import CreateIndex, CreateTable
+
+from app.extensions import db
+from app.models.model import StudentTestSession, StudentAnswer, TestResult, ClassificationJob
+
+SCHEMA = "archive"
+metadata = MetaData(schema=SCHEMA)
+
+
+def _archive_table(model, *indexes):
+    # Same columns as the live table, without foreign keys: SQLite cannot
+    # reference tables in another attached database.
+    columns = [
+        Column(column.name, column.type, primary_key=column.primary_key, nullable=column.nullable)
+        for column in model.__table__.columns
+    ]
+    return Table(model.__tablename__, metadata, *columns, Column("term", String(10), nullable=False), *indexes)
+
+
+sessions = _archive_table(
+    StudentTestSession,
+    Index("ix_archive_sessions_term", "term"),
+    Index("ix_archive_sessions_end_time_session_id", "end_time", "session_id"),
+    Index("ix_archive_sessions_user_id", "user_id"),
+)
+answers = _archive_table(
+    StudentAnswer,
+    Index("ix_archive_answers_session_id", "session_id"),
+)
+results = _archive_table(
+    TestResult,
+    Index("ix_archive_results_session_id", "session_id", unique=True),
+)
+TABLES = (
+    (StudentTestSession, sessions),
+    (StudentAnswer, answers),
+    (TestResult, results),
+)
+
+
+def term_of(column):
+    """
+    SQL expression for the academic term of a timestamp: <year>-S1 for
+    January to June, <year>-S2 for July to December.
+    """
+    half = case((cast(func.strftime("%m", column), Integer) <= 6, "-S1"), else_="-S2")
+    return func.strftime("%Y", column, type_=String) + half
+
+
+def _ddl():
+    dialect = sqlite.dialect()
+    statements = []
+    for table in metadata.sorted_tables:
+        statements.append(str(CreateTable(table, if_not_exists=True).compile(dialect=dialect)))
+        statements.extend(
+            str(CreateIndex(index, if_not_exists=True).compile(dialect=dialect)) for index in table.indexes
+        )
+    return statements
+
+
+def install(app):
+    """
+    Attaches the archive database to every new connection, creating its
+    tables if needed. Call after storage.install_pragmas.
+    """
+    path = app.config["ARCHIVE_DB_PATH"]
+    journal_mode = app.config["SQLITE_PRAGMAS"].get("journal_mode")
+    statements = _ddl()
+
+    def attach(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f"ATTACH DATABASE ? AS {SCHEMA}", (path,))
+        if journal_mode:
+            cursor.execute(f"PRAGMA {SCHEMA}.journal_mode={journal_mode}")
+        for statement in statements:
+            cursor.execute(statement)
+        cursor.close()
+
+    with app.app_context():
+        event.listen(db.engine, "connect", attach)
+
+
+def _candidates(before, limit):
+    return db.session.execute(
+        select(StudentTestSession.session_id)
+        .where(StudentTestSession.status == "completed", StudentTestSession.end_time < before)
+        .order_by(StudentTestSession.end_time, StudentTestSession.session_id)
+        .limit(limit)
+    ).scalars().all()
+
+
+def _copy(model, table, session_ids):
+    live = model.__table__
+    names = [column.name for column in live.columns]
+    query = select(*live.columns, term_of(StudentTestSession.end_time))
+    if model is not StudentTestSession:
+        query = query.join(StudentTestSession, StudentTestSession.session_id == live.c.session_id)
+    query = query.where(StudentTestSession.session_id.in_(session_ids))
+    # OR IGNORE makes a batch safe to copy again if the delete step never ran.
+    return db.session.execute(
+        insert(table).prefix_with("OR IGNORE").from_select(names + ["term"], query)
+    ).rowcount
+
+
+def _remove(session_ids):
+    # Only sessions whose copy is in the archive are removed from the live tables.
+    # Core deletes bypass the ORM hooks, so the report summaries keep these results.
+    archived = select(sessions.c.session_id).where(sessions.c.session_id.in_(session_ids))
+    for model in (StudentAnswer, TestResult, ClassificationJob):
+        table = model.__table__
+        db.session.execute(delete(table).where(table.c.session_id.in_(archived)))
+    table = StudentTestSession.__table__
+    return db.session.execute(delete(table).where(table.c.session_id.in_(archived))).rowcount
+
+
+def cutoff(days=None):
+    """
+    Returns the end time before which completed sessions are archived.
+    """
+    if days is None:
+        days = current_app.config["ARCHIVE_AFTER_DAYS"]
+    return datetime.utcnow() - timedelta(days=days)
+
+
+def pending(before):
+    """
+    Counts the completed sessions that ended before the cutoff and are still live.
+    """
+    return db.session.execute(
+        select(func.count())
+        .select_from(StudentTestSession)
+        .where(StudentTestSession.status == "completed", StudentTestSession.end_time < before)
+    ).scalar()
+
+
+def archive_sessions(before, batch_size=None):
+    """
+    Moves completed sessions that ended before `before`, with their answers
+    and results, into the archive. Each batch is copied in one transaction
+    and removed from the live tables in the next, so an interrupted run can
+    leave a batch in both places but never in neither; the next run finishes
+    it. Returns the number of rows archived per table.
+    """
+    batch_size = batch_size or current_app.config["ARCHIVE_BATCH_SIZE"]
+    counts = dict.fromkeys(("sessions", "answers", "results"), 0)
+    while True:
+        session_ids = _candidates(before, batch_size)
+        if not session_ids:
+            break
+        try:
+            copied = {table.name: _copy(model, table, session_ids) for model, table in TABLES}
+            db.session.commit()
+            removed = _remove(session_ids)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        if not removed:
+            break
+        counts["sessions"] += copied[sessions.name]
+        counts["answers"] += copied[answers.name]
+        counts["results"] += copied[results.name]
+    return counts
+
+
+def terms():
+    """
+    Returns (term, sessions, first end time, last end time) for every archived term.
+    """
+    return db.session.execute(
+        select(sessions.c.term, func.count(), func.min(sessions.c.end_time), func.max(sessions.c.end_time))
+        .group_by(sessions.c.term)
+        .order_by(sessions.c.term)
+    ).all()
+
+
+def vacuum():
+    """
+    Rebuilds the live database file to return the space freed by archiving.
+    Blocks writers while it runs, so use it in a maintenance window.
+    """
+    with db.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        connection.execute(text("VACUUM main"))
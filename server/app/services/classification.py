@@ -0,0 +1,213 @@
+"""
+Classification of submitted test sessions.
+
+In async mode (CLASSIFICATION_ASYNC) submit only stores the answers and a
+ClassificationJob row. A dispatcher thread per worker claims queued jobs and
+runs them on a small thread pool; scoring itself can be pushed to a process
+pool (CLASSIFICATION_PROCESSES) once the model is CPU-bound. Jobs are claimed
+with a lease, so a job whose worker died is retried after
+CLASSIFICATION_LEASE_SECONDS, up to CLASSIFICATION_MAX_ATTEMPTS times; a
+job that failed waits CLASSIFICATION_RETRY_BACKOFF seconds, doubled per
+attempt, before it is claimed again. A job that runs out of attempts marks
+its session failed, which the result poll reports.
+
+Claiming takes SQLite's write lock, so the dispatcher first checks for a
+claimable job with a plain SELECT and only claims when there is one; idle
+workers then never compete with autosaves and submits.
+
+The dispatcher is started with the app (create_app, or gunicorn's post_fork
+when the app is preloaded), so queued jobs are picked up without waiting for
+a submit or a poll in that worker.
+"""
+import atexit
+import concurrent.futures
+import logging
+import os
+import threading
+from datetime import datetime, timedelta
+
+from sqlalchemy import text, bindparam
+
+from app.extensions import db
+from app.models.model import ClassificationJob, StudentTestSession, TestResult
+from app.services import scoring
+from app.services import answers as answer_store
+
+logger = logging.getLogger(__name__)
+
+_CLAIMABLE = """
+    (status = 'queued' AND (not_before IS NULL OR not_before <= :now))
+    OR (status = 'running' AND claimed_at < :expired)
+"""
+_PROBE = text(f"""
+    SELECT 1 FROM classification_jobs
+    WHERE {_CLAIMABLE}
+    LIMIT 1
+""").bindparams(bindparam("now", type_=db.DateTime), bindparam("expired", type_=db.DateTime))
+_CLAIM = text(f"""
+    UPDATE classification_jobs
+    SET status = 'running', claimed_at = :now, attempts = attempts + 1
+    WHERE job_id = (
+        SELECT job_id FROM classification_jobs
+        WHERE {_CLAIMABLE}
+        ORDER BY created_at
+        LIMIT 1
+    )
+    RETURNING job_id, session_id, attempts
+""").bindparams(bindparam("now", type_=db.DateTime), bindparam("expired", type_=db.DateTime))
+
+
+def _score(answer_key, answers):
+    return answer_key.score(answers)
+
+
+def classify(session, answers=None, scorer=None):
+    """
+    Scores a session's answers (the stored ones if not given) and adds its
+    TestResult to the current transaction. Returns the result, or None if the
+    test no longer exists.
+    """
+    answer_key = scoring.get_answer_key(session.test_id)
+    if answer_key is None:
+        return None
+    if answers is None:
+        answers = answer_store.stored_answers(session.session_id)
+    fields = scorer(answer_key, answers) if scorer else _score(answer_key, answers)
+
+    test_result = TestResult(session_id=session.session_id, **fields)
+    db.session.add(test_result)
+    session.status = 'completed'
+    session.end_time = session.end_time or datetime.utcnow()
+    return test_result
+
+
+def enqueue(session):
+    """
+    Marks a session as submitted and queues it for classification in the current transaction.
+    """
+    session.status = 'submitted'
+    session.end_time = datetime.utcnow()
+    job = ClassificationJob(session_id=session.session_id)
+    db.session.add(job)
+    return job
+
+
+def _fail(job, error):
+    job.status = 'failed'
+    job.last_error = error
+    session = db.session.get(StudentTestSession, job.session_id)
+    if session is not None and session.status == 'submitted':
+        session.status = 'failed'
+
+
+class ClassificationWorker:
+    """
+    Per-process dispatcher that claims queued jobs and runs them on a thread pool.
+    """
+
+    def __init__(self):
+        self._app = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._threads = None
+        self._processes = None
+        self._slots = None
+
+    def start(self, app):
+        """
+        Starts the dispatcher for this process if it is not running yet.
+        """
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._app = app
+            self._pid = os.getpid()
+            workers = app.config["CLASSIFICATION_WORKERS"]
+            self._threads = concurrent.futures.ThreadPoolExecutor(
+                max_workers=workers, thread_name_prefix="classifier"
+            )
+            self._slots = threading.BoundedSemaphore(workers)
+            if app.config["CLASSIFICATION_PROCESSES"]:
+                self._processes = concurrent.futures.ProcessPoolExecutor(
+                    max_workers=app.config["CLASSIFICATION_PROCESSES"]
+                )
+                atexit.register(self._processes.shutdown)
+        threading.Thread(target=self._dispatch, name="classification-dispatcher", daemon=True).start()
+
+    def notify(self):
+        """
+        Wakes the dispatcher after a job was queued in this process.
+        """
+        self._wakeup.set()
+
+    def _claim(self):
+        now = datetime.utcnow()
+        expired = now - timedelta(seconds=self._app.config["CLASSIFICATION_LEASE_SECONDS"])
+        params = {"now": now, "expired": expired}
+        if db.session.execute(_PROBE, params).first() is None:
+            db.session.rollback()
+            return None
+        row = db.session.execute(_CLAIM, params).first()
+        db.session.commit()
+        return row
+
+    def _dispatch(self):
+        interval = self._app.config["CLASSIFICATION_POLL_INTERVAL"]
+        while True:
+            self._slots.acquire()
+            # Cleared before claiming, so a job queued during the claim still wakes the wait below.
+            self._wakeup.clear()
+            try:
+                with self._app.app_context():
+                    row = self._claim()
+            except Exception:
+                logger.exception("Failed to claim a classification job")
+                row = None
+            if row is None:
+                self._slots.release()
+                self._wakeup.wait(interval)
+                continue
+            future = self._threads.submit(self._run, row.job_id, row.session_id, row.attempts)
+            future.add_done_callback(lambda _: self._slots.release())
+
+    def _scorer(self, answer_key, answers):
+        if self._processes is None:
+            return _score(answer_key, answers)
+        return self._processes.submit(_score, answer_key, answers).result()
+
+    def _run(self, job_id, session_id, attempts):
+        with self._app.app_context():
+            if attempts > self._app.config["CLASSIFICATION_MAX_ATTEMPTS"]:
+                # Claimed again after its lease ran out on every attempt, e.g. it keeps killing the worker.
+                job = db.session.get(ClassificationJob, job_id)
+                _fail(job, job.last_error or "Gave up after repeated lease expiry")
+                db.session.commit()
+                return
+            try:
+                job = db.session.get(ClassificationJob, job_id)
+                session = db.session.get(StudentTestSession, session_id)
+                if session.test_result is None and classify(session, scorer=self._scorer) is None:
+                    raise LookupError(f"Test {session.test_id} no longer exists")
+                job.status = 'completed'
+                job.completed_at = datetime.utcnow()
+                job.last_error = None
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                logger.exception("Classification job %s failed (attempt %d)", job_id, attempts)
+                job = db.session.get(ClassificationJob, job_id)
+                if job is not None:
+                    if attempts < self._app.config["CLASSIFICATION_MAX_ATTEMPTS"]:
+                        backoff = self._app.config["CLASSIFICATION_RETRY_BACKOFF"] * 2 ** (attempts - 1)
+                        job.status = 'queued'
+                        job.not_before = datetime.utcnow() + timedelta(seconds=backoff)
+                        job.last_error = str(e)
+                    else:
+                        _fail(job, str(e))
+                    db.session.commit()
+
+
+worker = ClassificationWorker()
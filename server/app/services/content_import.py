@@ -0,0 +1,199 @@
+"""
+Bulk import of tests, questions and answer options from JSON or CSV.
+
+The whole file is parsed and validated before anything is written; if any
+row is invalid nothing is imported. Rows are then inserted with executemany
+batches in a single transaction, and the content version of every touched
+test is bumped so cached answer keys and question payloads are rebuilt.
+
+JSON: a list of tests (or {"tests": [...]}), each
+    {"name", "description", "questions": [
+        {"part", "question_text", "question_type", "options": [{"option_text", "is_correct"}]}
+    ]}
+
+CSV: one row per answer option (free-text questions have one row with no
+option), with the columns test_name, test_description, part, question_text,
+question_type, option_text, is_correct. Rows with the same test_name, part and
+question_text belong to one question.
+"""
+import csv
+import json
+import uuid
+
+from sqlalchemy import insert, select
+
+from app.extensions import db
+from app.models.model import Test, Question, AnswerOption
+from app.services import test_content
+
+PARTS = ("Numbers", "Logic", "Shapes")
+QUESTION_TYPES = ("multiple_choice", "free_text")
+BATCH_SIZE = 1000
+TRUE_VALUES = ("1", "true", "yes", "y")
+
+
+class InvalidContent(ValueError):
+    """Raised with every validation problem found in an import file."""
+
+    def __init__(self, errors):
+        super().__init__(f"{len(errors)} problem(s) in import file")
+        self.errors = errors
+
+
+def _parse_json(handle):
+    data = json.load(handle)
+    return data.get("tests", []) if isinstance(data, dict) else data
+
+
+def _parse_csv(handle):
+    tests = {}
+    questions = {}
+    for line, row in enumerate(csv.DictReader(handle), start=2):
+        name = (row.get("test_name") or "").strip()
+        test = tests.setdefault(name, {
+            "name": name,
+            "description": row.get("test_description") or None,
+            "questions": [],
+            "line": line,
+        })
+        key = (name, row.get("part"), row.get("question_text"))
+        question = questions.get(key)
+        if question is None:
+            question = questions[key] = {
+                "part": row.get("part"),
+                "question_text": row.get("question_text"),
+                "question_type": row.get("question_type") or "multiple_choice",
+                "options": [],
+                "line": line,
+            }
+            test["questions"].append(question)
+        if row.get("option_text"):
+            question["options"].append({
+                "option_text": row["option_text"],
+                "is_correct": (row.get("is_correct") or "").strip().lower() in TRUE_VALUES,
+            })
+    return list(tests.values())
+
+
+def load(handle, fmt):
+    """
+    Parses an import file into a list of test dicts. fmt is 'json' or 'csv'.
+    """
+    return _parse_json(handle) if fmt == "json" else _parse_csv(handle)
+
+
+def validate(tests):
+    """
+    Returns a list of human-readable problems; empty if the content can be imported.
+    """
+    errors = []
+    if not isinstance(tests, list) or not tests:
+        return ["No tests found"]
+
+    names = set()
+    for t_index, test in enumerate(tests, start=1):
+        where = f"test {test.get('line', t_index)}" if isinstance(test, dict) else f"test {t_index}"
+        if not isinstance(test, dict):
+            errors.append(f"{where}: must be an object")
+            continue
+        name = test.get("name")
+        if not name:
+            errors.append(f"{where}: name is required")
+        elif name in names:
+            errors.append(f"{where}: test '{name}' appears more than once")
+        names.add(name)
+        questions = test.get("questions")
+        if not isinstance(questions, list) or not questions:
+            errors.append(f"{where}: at least one question is required")
+            continue
+
+        for q_index, question in enumerate(questions, start=1):
+            at = f"{where}, question {question.get('line', q_index) if isinstance(question, dict) else q_index}"
+            if not isinstance(question, dict):
+                errors.append(f"{at}: must be an object")
+                continue
+            if question.get("part") not in PARTS:
+                errors.append(f"{at}: part must be one of {', '.join(PARTS)}")
+            if not question.get("question_text"):
+                errors.append(f"{at}: question_text is required")
+            question_type = question.get("question_type", "multiple_choice")
+            if question_type not in QUESTION_TYPES:
+                errors.append(f"{at}: question_type must be one of {', '.join(QUESTION_TYPES)}")
+            options = question.get("options") or []
+            if not isinstance(options, list) or not all(isinstance(option, dict) for option in options):
+                errors.append(f"{at}: options must be a list of objects")
+                continue
+            if question_type == "multiple_choice":
+                if len(options) < 2:
+                    errors.append(f"{at}: multiple-choice questions need at least two options")
+                elif not any(option.get("is_correct") for option in options):
+                    errors.append(f"{at}: no option is marked correct")
+                if any(not option.get("option_text") for option in options):
+                    errors.append(f"{at}: every option needs option_text")
+            elif options:
+                errors.append(f"{at}: free-text questions cannot have options")
+    return errors
+
+
+def _insert(model, rows):
+    for start in range(0, len(rows), BATCH_SIZE):
+        db.session.execute(insert(model.__table__), rows[start:start + BATCH_SIZE])
+
+
+def import_tests(tests, append=False):
+    """
+    Validates and inserts tests in one transaction. A test whose name already
+    exists is an error unless append is set, in which case its questions are
+    added to the existing test. Returns (tests, questions, options) counts.
+    Raises InvalidContent with every problem found.
+    """
+    errors = validate(tests)
+    existing = dict(db.session.execute(
+        select(Test.name, Test.test_id).where(Test.name.in_([t.get("name") for t in tests if isinstance(t, dict)]))
+    ).all()) if not errors else {}
+    if existing and not append:
+        errors.extend(f"test '{name}' already exists (use --append to add questions to it)" for name in existing)
+    if errors:
+        raise InvalidContent(errors)
+
+    test_rows, question_rows, option_rows = [], [], []
+    touched = []
+    for test in tests:
+        test_id = existing.get(test["name"])
+        if test_id is None:
+            test_id = str(uuid.uuid4())
+            test_rows.append({
+                "test_id": test_id,
+                "name": test["name"],
+                "description": test.get("description"),
+                "content_version": 1,
+            })
+        touched.append(test_id)
+        for question in test["questions"]:
+            question_id = str(uuid.uuid4())
+            question_rows.append({
+                "question_id": question_id,
+                "test_id": test_id,
+                "part": question["part"],
+                "question_text": question["question_text"],
+                "question_type": question.get("question_type", "multiple_choice"),
+            })
+            for option in question.get("options") or []:
+                option_rows.append({
+                    "option_id": str(uuid.uuid4()),
+                    "question_id": question_id,
+                    "option_text": option["option_text"],
+                    "is_correct": bool(option.get("is_correct")),
+                })
+
+    try:
+        _insert(Test, test_rows)
+        _insert(Question, question_rows)
+        _insert(AnswerOption, option_rows)
+        # Core inserts bypass the unit of work, so bump versions explicitly.
+        test_content.mark_changed(db.session, touched)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return len(test_rows), len(question_rows), len(option_rows)
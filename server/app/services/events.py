@@ -0,0 +1,347 @@
+"""
+Server-sent events for the staff dashboard.
+
+New test results and follow-ups are captured in the flush that inserts them,
+as the same rows the staff listings return, and appended to an event log
+(EVENT_LOG, one JSON line each) once the transaction commits. The log is the
+relay between workers: every worker with subscribers tails it from a single
+thread, turns each line into an SSE frame once, and hands that frame to each
+matching client's queue. Clients therefore cost a queue put per event instead
+of a database poll.
+
+Each log file starts with a header line naming its generation. Past
+EVENT_LOG_MAX_BYTES the file is renamed to EVENT_LOG.1 and a new generation
+begins, so an event's id, <generation>-<end offset>, is never reused. A
+client that reconnects with Last-Event-ID resumes where it left off, from
+the previous file if need be.
+"""
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy import event
+
+from app import instrumentation
+from app.extensions import db
+from app.models.model import TestResult, StudentFollowUp
+from app.services import listings
+
+try:
+    import fcntl
+except ImportError:  # Windows: appends are only serialized within the process
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# event type -> (model, listing the payload comes from, primary key column)
+EVENT_TYPES = {
+    "result.created": (TestResult, "results", TestResult.result_id),
+    "followup.created": (StudentFollowUp, "follow-ups", StudentFollowUp.followup_id),
+}
+# Query arguments a subscriber may filter on; each applies to events carrying that field.
+FILTER_FIELDS = ("faculty", "course", "test_id", "disability_likelihood")
+REPLAY_LIMIT = 1000
+
+
+def _value(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def frame(position, event_type, data):
+    """
+    Formats one event, at (generation, end offset), as an SSE frame.
+    """
+    generation, offset = position
+    return f"id: {generation}-{offset}\nevent: {event_type}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+def parse_event_id(value):
+    """
+    Returns the (generation, offset) of an event id, raising ValueError if it is not one.
+    """
+    generation, offset = value.split("-")
+    return int(generation), int(offset)
+
+
+def _read_header(handle):
+    # Returns (generation, header length), or None while the header is not written yet.
+    line = handle.readline()
+    if not line.endswith(b"\n"):
+        return None
+    return json.loads(line)["generation"], len(line)
+
+
+def _open(path):
+    # Returns the log file positioned after its header, and the header, or
+    # (None, None) while there is no complete file yet.
+    try:
+        handle = open(path, "rb")
+    except FileNotFoundError:
+        return None, None
+    header = _read_header(handle)
+    if header is None:
+        handle.close()
+        return None, None
+    return handle, header
+
+
+class Subscriber:
+    """
+    One connected client: its filters and a bounded queue of frames.
+    """
+
+    def __init__(self, types, filters, maxsize):
+        self.types = types
+        self.filters = filters
+        self.queue = queue.Queue(maxsize)
+        self.start = (0, 0)
+        self.dropped = False
+
+    def wants(self, event_type, data):
+        if self.types and event_type not in self.types:
+            return False
+        return all(data.get(field, value) == value for field, value in self.filters.items())
+
+    def offer(self, item):
+        try:
+            self.queue.put_nowait(item)
+        except queue.Full:
+            # A client that cannot keep up is disconnected and resumes from its last id.
+            self.dropped = True
+
+
+class EventHub:
+    """
+    Per-worker fan-out of the event log to connected clients.
+    """
+
+    def __init__(self):
+        self._app = None
+        self._pid = None
+        self._subscribers = set()
+        self._position = (0, 0)
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+
+    def _start(self, app):
+        if self._pid == os.getpid():
+            return
+        self._app = app
+        self._pid = os.getpid()
+        self._subscribers = set()
+        # New clients start from the end of the log as it is now.
+        handle, header = _open(app.config["EVENT_LOG"])
+        if handle is not None:
+            self._position = (header[0], handle.seek(0, os.SEEK_END))
+        threading.Thread(target=self._run, args=(handle,), name="event-tail", daemon=True).start()
+
+    def subscribe(self, app, types, filters):
+        """
+        Registers a client. Returns None if this worker already has
+        EVENT_MAX_CLIENTS subscribers.
+        """
+        with self._lock:
+            self._start(app)
+            if len(self._subscribers) >= app.config["EVENT_MAX_CLIENTS"]:
+                return None
+            subscriber = Subscriber(types, filters, app.config["EVENT_CLIENT_QUEUE"])
+            subscriber.start = self._position
+            self._subscribers.add(subscriber)
+            instrumentation.registry.set("events_clients", {}, len(self._subscribers))
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+            instrumentation.registry.set("events_clients", {}, len(self._subscribers))
+
+    def _dispatch(self, chunk, generation, base):
+        offset = base
+        for line in chunk.splitlines(keepends=True):
+            offset += len(line)
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            event_type, data = entry.get("type"), entry.get("data") or {}
+            position = (generation, offset)
+            with self._lock:
+                subscribers = [s for s in self._subscribers if s.start < position and s.wants(event_type, data)]
+            if subscribers:
+                text = frame(position, event_type, data)
+                for subscriber in subscribers:
+                    subscriber.offer(text)
+
+    def _drain(self, handle):
+        generation, offset = self._position
+        handle.seek(offset)
+        chunk = handle.read()
+        # Only whole lines; a partial write is picked up on the next pass.
+        chunk = chunk[:chunk.rfind(b"\n") + 1]
+        if not chunk:
+            return
+        try:
+            self._dispatch(chunk, generation, offset)
+        except Exception:
+            logger.exception("Failed to dispatch events")
+        with self._lock:
+            self._position = (generation, offset + len(chunk))
+
+    def _run(self, handle):
+        path = self._app.config["EVENT_LOG"]
+        interval = self._app.config["EVENT_POLL_INTERVAL"]
+        while True:
+            time.sleep(interval)
+            try:
+                if handle is None:
+                    handle, header = _open(path)
+                    if handle is None:
+                        continue
+                    with self._lock:
+                        self._position = header
+                try:
+                    rotated = os.stat(path).st_ino != os.fstat(handle.fileno()).st_ino
+                except FileNotFoundError:
+                    rotated = True
+                # The rotated file no longer grows, so reading it once more finishes it.
+                self._drain(handle)
+                if rotated:
+                    handle.close()
+                    handle = None
+            except (OSError, ValueError):
+                logger.exception("Failed to read the event log")
+                if handle is not None:
+                    handle.close()
+                    handle = None
+
+    def append(self, app, entries):
+        """
+        Appends events to the log, starting a new generation once it passes EVENT_LOG_MAX_BYTES.
+        """
+        path = app.config["EVENT_LOG"]
+        lines = b"".join(
+            json.dumps(entry, separators=(",", ":")).encode() + b"\n" for entry in entries
+        )
+        with self._write_lock:
+            while True:
+                fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+                try:
+                    if fcntl is not None:
+                        fcntl.flock(fd, fcntl.LOCK_EX)
+                    size = os.fstat(fd).st_size
+                    try:
+                        current = os.stat(path).st_ino == os.fstat(fd).st_ino
+                    except FileNotFoundError:
+                        current = False
+                    if not current:
+                        continue  # rotated by another writer while this one waited for the lock
+                    if size > app.config["EVENT_LOG_MAX_BYTES"]:
+                        os.replace(path, f"{path}.1")
+                        continue
+                    if size == 0:
+                        header = json.dumps({"generation": time.time_ns()}).encode() + b"\n"
+                        os.write(fd, header)
+                    os.write(fd, lines)
+                    break
+                finally:
+                    os.close(fd)
+        for entry in entries:
+            instrumentation.registry.inc("events_published_total", {"type": entry["type"]})
+
+
+hub = EventHub()
+
+
+def replay(path, after, until, subscriber):
+    """
+    Returns the frames a reconnecting client missed between positions after
+    and until, reading the previous log file first if after points into it.
+    """
+    if after >= until:
+        return []
+    frames = []
+    for name in (f"{path}.1", path):
+        try:
+            with open(name, "rb") as handle:
+                header = _read_header(handle)
+                if header is None:
+                    continue
+                generation, offset = header
+                if generation < after[0] or generation > until[0]:
+                    continue
+                if generation == after[0]:
+                    handle.seek(after[1])
+                    offset = after[1]
+                for line in handle:
+                    offset += len(line)
+                    position = (generation, offset)
+                    if position > until or len(frames) >= REPLAY_LIMIT:
+                        break
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue
+                    if subscriber.wants(entry.get("type"), entry.get("data") or {}):
+                        frames.append(frame(position, entry["type"], entry.get("data") or {}))
+        except FileNotFoundError:
+            continue
+    return frames
+
+
+def stream(app, subscriber, last_event_id):
+    """
+    Yields SSE text for one client until EVENT_STREAM_SECONDS pass or it falls
+    behind; the browser's EventSource then reconnects with Last-Event-ID.
+    """
+    config = app.config
+    deadline = time.monotonic() + config["EVENT_STREAM_SECONDS"]
+    try:
+        yield f"retry: {int(config['EVENT_RETRY_MS'])}\n\n"
+        if last_event_id is not None and last_event_id <= subscriber.start:
+            for text in replay(config["EVENT_LOG"], last_event_id, subscriber.start, subscriber):
+                yield text
+        while not subscriber.dropped:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                yield subscriber.queue.get(timeout=min(config["EVENT_KEEPALIVE"], remaining))
+            except queue.Empty:
+                yield ": keepalive\n\n"
+    finally:
+        hub.unsubscribe(subscriber)
+
+
+def _after_flush(session, flush_context):
+    # Payloads are read inside the transaction so they match what the listings return.
+    pending = session.info.setdefault("events", [])
+    for event_type, (model, listing, key) in EVENT_TYPES.items():
+        ids = [obj.__mapper__.primary_key_from_instance(obj)[0] for obj in session.new if isinstance(obj, model)]
+        if not ids:
+            continue
+        query = listings.LISTINGS[listing][0]({}).where(key.in_(ids))
+        for row in session.connection().execute(query).mappings():
+            pending.append({"type": event_type, "data": {name: _value(value) for name, value in row.items()}})
+
+
+def _after_commit(session):
+    entries = session.info.pop("events", None)
+    if entries:
+        try:
+            hub.append(current_app, entries)
+        except OSError:
+            logger.exception("Failed to append %d event(s) to the event log", len(entries))
+
+
+def _after_rollback(session):
+    session.info.pop("events", None)
+
+
+event.listen(db.session, "after_flush", _after_flush)
+event.listen(db.session, "after_commit", _after_commit)
+event.listen(db.session, "after_rollback", _after_rollback)
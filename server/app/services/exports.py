@@ -0,0 +1,218 @@
+"""
+Streaming CSV and PDF exports for staff.
+
+CSV rows are read with yield_per so only one batch is held in memory at a
+time, and the output is produced by a generator that Flask sends as a chunked
+response. PDFs cannot be streamed that way (see stream_pdf), so they are
+limited to EXPORT_PDF_MAX_ROWS rows. The results export can include archived sessions (include_archive).
+"""
+import csv
+import io
+import json
+import tempfile
+
+from sqlalchemy import func, select, union_all
+from sqlalchemy.orm import aliased
+
+from app.extensions import db
+from app.models.model import (
+    User, TestResult, StudentTestSession, StudentFollowUp, StudentSurvey
+)
+from app.services import archive
+
+BATCH_SIZE = 500
+PDF_CHUNK_SIZE = 64 * 1024
+
+
+def _session_results(filters, sessions, results):
+    query = (
+        select(
+            results.c.session_id,
+            User.student_number,
+            User.email,
+            User.faculty,
+            User.course,
+            sessions.c.test_id,
+            sessions.c.start_time,
+            sessions.c.end_time,
+            results.c.numbers_score,
+            results.c.logic_score,
+            results.c.shapes_score,
+            results.c.disability_likelihood,
+        )
+        .join(sessions, sessions.c.session_id == results.c.session_id)
+        .join(User, User.user_id == sessions.c.user_id)
+    )
+    if filters.get("test_id"):
+        query = query.where(sessions.c.test_id == filters["test_id"])
+    if filters.get("faculty"):
+        query = query.where(User.faculty == filters["faculty"])
+    if filters.get("course"):
+        query = query.where(User.course == filters["course"])
+    return query
+
+
+def _results_query(filters):
+    query = _session_results(filters, StudentTestSession.__table__, TestResult.__table__)
+    if not filters.get("include_archive"):
+        return query.order_by(StudentTestSession.start_time)
+    archived = _session_results(filters, archive.sessions, archive.results)
+    combined = union_all(query, archived).subquery()
+    return select(combined).order_by(combined.c.start_time)
+
+
+def _follow_ups_query(filters):
+    student = aliased(User)
+    staff = aliased(User)
+    query = (
+        select(
+            StudentFollowUp.followup_id,
+            student.student_number,
+            student.email.label("student_email"),
+            student.faculty,
+            staff.email.label("staff_email"),
+            StudentFollowUp.flagged_date,
+            StudentFollowUp.notes,
+        )
+        .join(student, student.user_id == StudentFollowUp.student_id)
+        .join(staff, staff.user_id == StudentFollowUp.staff_id)
+        .order_by(StudentFollowUp.flagged_date)
+    )
+    if filters.get("faculty"):
+        query = query.where(student.faculty == filters["faculty"])
+    return query
+
+
+def _surveys_query(filters):
+    query = (
+        select(
+            StudentSurvey.survey_id,
+            User.student_number,
+            User.email,
+            User.faculty,
+            StudentSurvey.submission_date,
+            StudentSurvey.survey_data,
+        )
+        .join(User, User.user_id == StudentSurvey.user_id)
+        .order_by(StudentSurvey.submission_date)
+    )
+    if filters.get("faculty"):
+        query = query.where(User.faculty == filters["faculty"])
+    return query
+
+
+# name -> (title, query builder, supported filters)
+DATASETS = {
+    "results": ("Test results", _results_query, ("test_id", "faculty", "course", "include_archive")),
+    "follow-ups": ("Student follow-ups", _follow_ups_query, ("faculty",)),
+    "surveys": ("Student surveys", _surveys_query, ("faculty",)),
+}
+
+
+def count_rows(dataset, filters):
+    """
+    Returns the number of rows an export would contain.
+    """
+    query = DATASETS[dataset][1](filters).order_by(None).subquery()
+    return db.session.execute(select(func.count()).select_from(query)).scalar()
+
+
+def _cell(value):
+    if value is None:
+        return ""
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, separators=(",", ":"))
+    if hasattr(value, "isoformat"):
+        return value.isoformat(sep=" ", timespec="seconds")
+    return str(value)
+
+
+def iter_rows(dataset, filters):
+    """
+    Yields the header and then each row of a dataset as lists of strings.
+    """
+    query = DATASETS[dataset][1](filters)
+    result = db.session.execute(query.execution_options(yield_per=BATCH_SIZE))
+    yield list(result.keys())
+    for batch in result.partitions():
+        for row in batch:
+            yield [_cell(value) for value in row]
+
+
+def stream_csv(dataset, filters):
+    """
+    Yields CSV text one database batch at a time.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for count, row in enumerate(iter_rows(dataset, filters), start=1):
+        writer.writerow(row)
+        if count % BATCH_SIZE == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def _truncate(text, width):
+    return text if len(text) <= width else text[:width - 1] + "…"
+
+
+def stream_pdf(dataset, filters):
+    """
+    Yields a paginated landscape PDF of a dataset in fixed-size chunks.
+    reportlab keeps every page in memory until the document is saved, and
+    nothing can be sent before then, so the whole PDF is built first; callers
+    cap the row count with count_rows. The finished file is spooled to disk
+    once it grows and sent in chunks.
+    """
+    from reportlab.lib.pagesizes import A4, landscape
+    from reportlab.pdfgen import canvas
+
+    title = DATASETS[dataset][0]
+    width, height = landscape(A4)
+    margin = 36
+    line_height = 12
+    font_size = 7
+
+    spool = tempfile.SpooledTemporaryFile(max_size=4 * 1024 * 1024)
+    pdf = canvas.Canvas(spool, pagesize=(width, height), pageCompression=1)
+    pdf.setTitle(title)
+
+    rows = iter_rows(dataset, filters)
+    header = next(rows)
+    column_width = (width - 2 * margin) / len(header)
+    chars_per_column = max(int(column_width / (font_size * 0.5)), 4)
+
+    def start_page(page):
+        pdf.setFont("Helvetica-Bold", 11)
+        pdf.drawString(margin, height - margin, f"{title} — page {page}")
+        pdf.setFont("Helvetica-Bold", font_size)
+        for index, name in enumerate(header):
+            pdf.drawString(margin + index * column_width, height - margin - 2 * line_height,
+                           _truncate(name, chars_per_column))
+        pdf.setFont("Helvetica", font_size)
+        return height - margin - 3 * line_height
+
+    page = 1
+    y = start_page(page)
+    for row in rows:
+        if y < margin:
+            pdf.showPage()
+            page += 1
+            y = start_page(page)
+        for index, value in enumerate(row):
+            pdf.drawString(margin + index * column_width, y, _truncate(value, chars_per_column))
+        y -= line_height
+    pdf.save()
+
+    spool.seek(0)
+    try:
+        while True:
+            chunk = spool.read(PDF_CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        spool.close()
@@ -0,0 +1,200 @@
+"""
+Indexed extraction of selected JSON paths from survey_data and staff_breakdown.
+
+The paths in JSON_FIELDS are copied into the json_fields side table with
+SQLite's JSON1 functions, inside the database, whenever a survey or result is
+written through the ORM. Arrays are expanded to one row per element; objects
+and nulls are not indexed. Each value keeps its JSON type, so the text "007",
+the number 7 and the boolean true never match each other. Screening queries
+then filter on json_fields through its (source, field, value) indexes instead
+of loading and parsing every blob in Python. After bulk writes that
+bypass the ORM, or after JSON_FIELDS changes, run `flask json-fields rebuild`.
+Archiving a result keeps its extracted values, and a rebuild reads archived
+results too.
+"""
+import json
+
+from flask import current_app
+from sqlalchemy import event, exists, select, text, bindparam
+
+from app.extensions import db
+from app.models.model import JsonField, StudentSurvey, TestResult, User
+
+# source -> (model, FROM clause, id column, JSON column, user id column)
+SOURCES = {
+    "survey": (
+        StudentSurvey,
+        "student_surveys AS src",
+        "src.survey_id",
+        "src.survey_data",
+        "src.user_id",
+    ),
+    "result": (
+        TestResult,
+        "test_results AS src JOIN student_test_sessions AS sess ON sess.session_id = src.session_id",
+        "src.result_id",
+        "src.staff_breakdown",
+        "sess.user_id",
+    ),
+}
+
+# source -> FROM clause for its archived rows, read by rebuild
+ARCHIVED_SOURCES = {
+    "result": "archive.test_results AS src JOIN archive.student_test_sessions AS sess ON sess.session_id = src.session_id",
+}
+
+OPERATORS = {
+    "eq": lambda column, value: column == value,
+    "ne": lambda column, value: column != value,
+    "lt": lambda column, value: column < value,
+    "lte": lambda column, value: column <= value,
+    "gt": lambda column, value: column > value,
+    "gte": lambda column, value: column >= value,
+}
+
+
+def _extract_statement(source, paths, ids=None, from_clause=None):
+    _, live_from_clause, id_column, json_column, user_column = SOURCES[source]
+    from_clause = from_clause or live_from_clause
+    values = ", ".join(f"(:field_{i}, :path_{i})" for i in range(len(paths)))
+    # An array at the path yields its elements; any other value is wrapped so it yields itself.
+    statement = text(f"""
+        WITH paths(field, path) AS (VALUES {values})
+        INSERT INTO json_fields (source, row_id, user_id, field, value_type, value_text, value_number)
+        SELECT :source, {id_column}, {user_column}, paths.field, item.type,
+               CASE WHEN item.type = 'text' THEN item.value END,
+               CASE WHEN item.type IN ('integer', 'real', 'true', 'false') THEN item.value END
+        FROM {from_clause}, paths,
+             json_each(CASE WHEN json_type({json_column}, paths.path) = 'array'
+                            THEN {json_column} -> paths.path
+                            ELSE json_array({json_column} -> paths.path) END) AS item
+        WHERE item.type NOT IN ('object', 'array', 'null')
+        {"AND " + id_column + " IN :ids" if ids is not None else ""}
+    """)
+    params = {"source": source}
+    for i, (field, path) in enumerate(paths.items()):
+        params[f"field_{i}"] = field
+        params[f"path_{i}"] = path
+    if ids is not None:
+        statement = statement.bindparams(bindparam("ids", expanding=True))
+        params["ids"] = list(ids)
+    return statement, params
+
+
+def sync(connection, source, ids):
+    """
+    Re-extracts the configured fields of the given survey or result ids.
+    """
+    if not ids:
+        return
+    connection.execute(
+        JsonField.__table__.delete()
+        .where(JsonField.source == source, JsonField.row_id.in_(list(ids)))
+    )
+    paths = current_app.config["JSON_FIELDS"].get(source)
+    if paths:
+        connection.execute(*_extract_statement(source, paths, ids))
+
+
+def rebuild():
+    """
+    Re-extracts every configured field from all surveys and results, live and
+    archived. Returns the number of rows written.
+    """
+    connection = db.session.connection()
+    connection.execute(JsonField.__table__.delete())
+    for source in SOURCES:
+        paths = current_app.config["JSON_FIELDS"].get(source)
+        if paths:
+            connection.execute(*_extract_statement(source, paths))
+            if source in ARCHIVED_SOURCES:
+                connection.execute(*_extract_statement(source, paths, from_clause=ARCHIVED_SOURCES[source]))
+    count = db.session.execute(select(db.func.count()).select_from(JsonField)).scalar()
+    db.session.commit()
+    return count
+
+
+def _not_json(constant):
+    raise ValueError(constant)
+
+
+def parse_value(raw):
+    """
+    Interprets a query-string value as a JSON literal: true/false as booleans,
+    JSON numbers as numbers and "quoted" values as text. Anything else,
+    including numbers with leading zeros such as 007, is text as given.
+    """
+    try:
+        value = json.loads(raw, parse_constant=_not_json)
+    except ValueError:
+        return raw
+    if isinstance(value, bool) or isinstance(value, str):
+        return value
+    if isinstance(value, (int, float)):
+        return float(value)
+    return raw
+
+
+def parse_args(args):
+    """
+    Collects conditions from query arguments named <source>.<field>[__<op>],
+    e.g. survey.reading_difficulty_primary=true or result.numbers_percent__lt=0.4.
+    Raises ValueError for unknown sources, fields or operators.
+    """
+    conditions = []
+    for name, raw in args.items():
+        if "." not in name:
+            continue
+        source, _, field = name.partition(".")
+        field, _, operator = field.partition("__")
+        operator = operator or "eq"
+        if source not in SOURCES:
+            raise ValueError(f"Unknown JSON source: {source}")
+        if field not in current_app.config["JSON_FIELDS"].get(source, {}):
+            raise ValueError(f"{source}.{field} is not an extracted JSON field")
+        if operator not in OPERATORS:
+            raise ValueError(f"Operator must be one of: {', '.join(OPERATORS)}")
+        conditions.append((source, field, operator, parse_value(raw)))
+    return conditions
+
+
+def matches(user_id, condition):
+    """
+    EXISTS condition for users with an extracted value satisfying (source, field, operator, value).
+    """
+    source, field, operator, value = condition
+    if isinstance(value, bool):
+        column, types, value = JsonField.value_number, ("true", "false"), float(value)
+    elif isinstance(value, (int, float)):
+        column, types, value = JsonField.value_number, ("integer", "real"), float(value)
+    else:
+        column, types = JsonField.value_text, ("text",)
+    return exists(
+        select(JsonField.id).where(
+            JsonField.source == source,
+            JsonField.field == field,
+            OPERATORS[operator](column, value),
+            JsonField.value_type.in_(types),
+            JsonField.user_id == user_id,
+        )
+    )
+
+
+def matching_users(conditions):
+    """
+    Returns a select of the user ids satisfying every condition.
+    """
+    return select(User.user_id).where(*(matches(User.user_id, condition) for condition in conditions))
+
+
+def _after_flush(session, flush_context):
+    # Deleted rows lose their extracted values; new and edited rows are re-extracted.
+    written = list(session.new) + list(session.dirty) + list(session.deleted)
+    for source, (model, *_) in SOURCES.items():
+        key = model.__mapper__.primary_key[0].key
+        ids = {getattr(obj, key) for obj in written if isinstance(obj, model)}
+        if ids:
+            sync(session.connection(), source, ids)
+
+
+event.listen(db.session, "after_flush", _after_flush)
@@ -0,0 +1,261 @@
+"""
+Keyset-paginated listings for the staff dashboard.
+
+Each listing is one projection query over the columns the dashboard shows,
+ordered newest first by an indexed (sort column, primary key) pair. A page is
+fetched with a seek condition on that pair instead of OFFSET, so every page
+costs the same no matter how deep the client has paged. The cursor handed back
+to the client is the key of the last row it received. With include_archive,
+the results listing also pages through archived sessions (see archive.py).
+"""
+import base64
+import json
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, exists, tuple_, union_all
+from sqlalchemy.orm import aliased
+
+from app.extensions import db
+from app.services import json_fields, archive
+from app.models.model import (
+    User, TestResult, StudentTestSession, StudentFollowUp, StudentSurvey
+)
+
+PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+BATCH_SIZE = 100
+
+
+def _has_result(user_id, filters):
+    """
+    EXISTS condition for users with a result matching the test, likelihood and date filters.
+    """
+    conditions = [StudentTestSession.user_id == user_id]
+    if filters.get("test_id"):
+        conditions.append(StudentTestSession.test_id == filters["test_id"])
+    if filters.get("likelihood"):
+        conditions.append(TestResult.disability_likelihood == filters["likelihood"])
+    if filters.get("from"):
+        conditions.append(StudentTestSession.end_time >= filters["from"])
+    if filters.get("to"):
+        conditions.append(StudentTestSession.end_time < filters["to"])
+    return exists(
+        select(TestResult.result_id)
+        .join(StudentTestSession, StudentTestSession.session_id == TestResult.session_id)
+        .where(*conditions)
+    )
+
+
+def _cohort(query, student, filters):
+    if filters.get("faculty"):
+        query = query.where(student.faculty == filters["faculty"])
+    if filters.get("course"):
+        query = query.where(student.course == filters["course"])
+    for condition in filters.get("json") or ():
+        query = query.where(json_fields.matches(student.user_id, condition))
+    return query
+
+
+def _students_query(filters):
+    query = select(
+        User.user_id,
+        User.student_number,
+        User.email,
+        User.first_name,
+        User.last_name,
+        User.faculty,
+        User.course,
+        User.created_at,
+    ).where(User.role == "student")
+    query = _cohort(query, User, filters)
+    if any(filters.get(name) for name in ("test_id", "likelihood", "from", "to")):
+        query = query.where(_has_result(User.user_id, filters))
+    return query
+
+
+def _results_query(filters, sessions=StudentTestSession.__table__, results=TestResult.__table__):
+    query = (
+        select(
+            sessions.c.session_id,
+            results.c.result_id,
+            User.user_id,
+            User.student_number,
+            User.email,
+            User.faculty,
+            User.course,
+            sessions.c.test_id,
+            sessions.c.end_time,
+            results.c.numbers_score,
+            results.c.logic_score,
+            results.c.shapes_score,
+            results.c.disability_likelihood,
+        )
+        .join(results, results.c.session_id == sessions.c.session_id)
+        .join(User, User.user_id == sessions.c.user_id)
+    )
+    query = _cohort(query, User, filters)
+    if filters.get("test_id"):
+        query = query.where(sessions.c.test_id == filters["test_id"])
+    if filters.get("likelihood"):
+        query = query.where(results.c.disability_likelihood == filters["likelihood"])
+    if filters.get("from"):
+        query = query.where(sessions.c.end_time >= filters["from"])
+    if filters.get("to"):
+        query = query.where(sessions.c.end_time < filters["to"])
+    return query
+
+
+def _archived_results_query(filters):
+    return _results_query(filters, archive.sessions, archive.results)
+
+
+def _follow_ups_query(filters):
+    student = aliased(User)
+    staff = aliased(User)
+    query = (
+        select(
+            StudentFollowUp.followup_id,
+            student.user_id.label("student_id"),
+            student.student_number,
+            student.email.label("student_email"),
+            student.faculty,
+            student.course,
+            staff.email.label("staff_email"),
+            StudentFollowUp.flagged_date,
+            StudentFollowUp.notes,
+        )
+        .join(student, student.user_id == StudentFollowUp.student_id)
+        .join(staff, staff.user_id == StudentFollowUp.staff_id)
+    )
+    query = _cohort(query, student, filters)
+    if filters.get("from"):
+        query = query.where(StudentFollowUp.flagged_date >= filters["from"])
+    if filters.get("to"):
+        query = query.where(StudentFollowUp.flagged_date < filters["to"])
+    if filters.get("test_id") or filters.get("likelihood"):
+        query = query.where(_has_result(student.user_id, {
+            "test_id": filters.get("test_id"), "likelihood": filters.get("likelihood")
+        }))
+    return query
+
+
+def _surveys_query(filters):
+    query = (
+        select(
+            StudentSurvey.survey_id,
+            User.user_id,
+            User.student_number,
+            User.email,
+            User.faculty,
+            User.course,
+            StudentSurvey.submission_date,
+            StudentSurvey.survey_data,
+        )
+        .join(User, User.user_id == StudentSurvey.user_id)
+    )
+    query = _cohort(query, User, filters)
+    if filters.get("from"):
+        query = query.where(StudentSurvey.submission_date >= filters["from"])
+    if filters.get("to"):
+        query = query.where(StudentSurvey.submission_date < filters["to"])
+    if filters.get("test_id") or filters.get("likelihood"):
+        query = query.where(_has_result(User.user_id, {
+            "test_id": filters.get("test_id"), "likelihood": filters.get("likelihood")
+        }))
+    return query
+
+
+# name -> (query builder, keyset columns: sort column first, primary key last)
+LISTINGS = {
+    "students": (_students_query, (User.created_at, User.user_id)),
+    "results": (_results_query, (StudentTestSession.end_time, StudentTestSession.session_id)),
+    "follow-ups": (_follow_ups_query, (StudentFollowUp.flagged_date, StudentFollowUp.followup_id)),
+    "surveys": (_surveys_query, (StudentSurvey.submission_date, StudentSurvey.survey_id)),
+}
+# Listings that can include archived rows: name -> (query builder, keyset columns)
+ARCHIVED = {
+    "results": (_archived_results_query, (archive.sessions.c.end_time, archive.sessions.c.session_id)),
+}
+
+
+def parse_date(value, end=False):
+    """
+    Parses an ISO date or datetime filter. A bare date used as an upper
+    bound covers that whole day.
+    """
+    if not value:
+        return None
+    parsed = datetime.fromisoformat(value)
+    if end and len(value) == 10:
+        parsed += timedelta(days=1)
+    return parsed
+
+
+def encode_cursor(values):
+    raw = json.dumps([v.isoformat() if isinstance(v, datetime) else v for v in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(listing, cursor):
+    """
+    Turns a cursor back into keyset values. Raises ValueError if it was not issued for this listing.
+    """
+    columns = LISTINGS[listing][1]
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+    # Every key is an id or an ISO timestamp, so anything but a string was not issued by encode_cursor.
+    if (not isinstance(values, list) or len(values) != len(columns)
+            or not all(isinstance(value, str) for value in values)):
+        raise ValueError("Invalid cursor")
+    try:
+        return [
+            datetime.fromisoformat(value) if isinstance(column.type, db.DateTime) else value
+            for column, value in zip(columns, values)
+        ]
+    except ValueError:
+        raise ValueError("Invalid cursor")
+
+
+def _value(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def stream_page(listing, filters, after=None, limit=PAGE_SIZE):
+    """
+    Yields one page of a listing as JSON text: {"items": [...], "next_cursor": ...}.
+    Rows are read in batches as plain tuples and written out as they arrive.
+    """
+    build, columns = LISTINGS[listing]
+    query = build(filters).add_columns(*(column.label(f"_key{i}") for i, column in enumerate(columns)))
+    if filters.get("include_archive") and listing in ARCHIVED:
+        build_archived, archived_columns = ARCHIVED[listing]
+        archived = build_archived(filters).add_columns(
+            *(column.label(f"_key{i}") for i, column in enumerate(archived_columns))
+        )
+        combined = union_all(query, archived).subquery()
+        columns = [combined.c[f"_key{i}"] for i in range(len(columns))]
+        query = select(combined)
+    if after is not None:
+        query = query.where(tuple_(*columns) < tuple_(*after))
+    query = query.order_by(*(column.desc() for column in columns)).limit(limit + 1)
+
+    result = db.session.execute(query.execution_options(yield_per=BATCH_SIZE))
+    fields = [name for name in result.keys() if not name.startswith("_key")]
+    width = len(fields)
+
+    yield '{"items":['
+    last = None
+    count = 0
+    for batch in result.partitions():
+        for row in batch:
+            if count == limit:
+                result.close()
+                yield '],"next_cursor":' + json.dumps(encode_cursor(last[width:])) + '}'
+                return
+            item = {name: _value(value) for name, value in zip(fields, row)}
+            yield ("," if count else "") + json.dumps(item, separators=(",", ":"))
+            last = row
+            count += 1
+    yield '],"next_cursor":null}'
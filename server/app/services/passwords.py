@@ -0,0 +1,123 @@
+"""
+Password hashing off the request thread.
+
+Hashes are computed in a small process pool so a login burst cannot pin every
+web worker's CPU. A bounded number of hashes may be queued at once; callers
+beyond that get HashingBusy instead of piling up behind the pool. If a pool
+process dies (e.g. killed for memory), the broken pool is replaced and the
+hash retried once.
+"""
+import atexit
+import concurrent.futures
+import os
+import secrets
+import threading
+
+from flask import current_app
+from werkzeug.security import generate_password_hash, check_password_hash
+
+
+class HashingBusy(Exception):
+    """Raised when the hashing queue is full."""
+
+
+_executor = None
+_slots = None
+_pid = None
+_lock = threading.Lock()
+# method -> normalized hash prefix, e.g. 'scrypt' -> 'scrypt:32768:8:1'
+_prefixes = {}
+# method -> hash of a random password, checked when a login names no user
+_dummies = {}
+
+
+def _pool():
+    global _executor, _slots, _pid
+    if _pid != os.getpid():
+        with _lock:
+            if _pid != os.getpid():
+                config = current_app.config
+                _executor = concurrent.futures.ProcessPoolExecutor(
+                    max_workers=config["PASSWORD_HASH_WORKERS"]
+                )
+                _slots = threading.BoundedSemaphore(config["PASSWORD_HASH_QUEUE"])
+                _pid = os.getpid()
+                atexit.register(_executor.shutdown)
+    return _executor, _slots
+
+
+def _replace(broken):
+    global _executor
+    with _lock:
+        if _executor is broken:
+            broken.shutdown(wait=False)
+            _executor = concurrent.futures.ProcessPoolExecutor(
+                max_workers=current_app.config["PASSWORD_HASH_WORKERS"]
+            )
+            atexit.register(_executor.shutdown)
+        return _executor
+
+
+def _run(fn, *args):
+    if not current_app.config["PASSWORD_HASH_WORKERS"]:
+        return fn(*args)
+
+    executor, slots = _pool()
+    if not slots.acquire(timeout=current_app.config["PASSWORD_HASH_WAIT"]):
+        raise HashingBusy()
+    try:
+        try:
+            return executor.submit(fn, *args).result()
+        except concurrent.futures.process.BrokenProcessPool:
+            return _replace(executor).submit(fn, *args).result()
+    finally:
+        slots.release()
+
+
+def hash_password(password):
+    """
+    Hashes a password with the configured method in the hashing pool.
+    """
+    return _run(generate_password_hash, password, current_app.config["PASSWORD_HASH_METHOD"])
+
+
+def verify_password(password_hash, password):
+    """
+    Checks a password against a stored hash in the hashing pool.
+    """
+    return _run(check_password_hash, password_hash, password)
+
+
+def dummy_hash():
+    """
+    Returns a hash of a random password with the configured method, made once
+    per process (warm_caches makes it before workers fork).
+    """
+    method = current_app.config["PASSWORD_HASH_METHOD"]
+    dummy = _dummies.get(method)
+    if dummy is None:
+        dummy = generate_password_hash(secrets.token_urlsafe(16), method)
+        _dummies[method] = dummy
+    return dummy
+
+
+def verify_dummy(password):
+    """
+    Spends the same hashing work as verify_password on a login that names no
+    user, so response times do not reveal which accounts exist. Always False.
+    """
+    _run(check_password_hash, dummy_hash(), password)
+    return False
+
+
+def needs_rehash(password_hash):
+    """
+    Returns True if a stored hash was made with other parameters than the configured ones.
+    """
+    method = current_app.config["PASSWORD_HASH_METHOD"]
+    prefix = _prefixes.get(method)
+    if prefix is None:
+        # werkzeug fills in default parameters, so normalize from a throwaway hash once.
+        prefix = generate_password_hash("", method).split("$", 1)[0]
+        _prefixes[method] = prefix
+    return password_hash.split("$", 1)[0] != prefix
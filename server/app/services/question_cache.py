@@ -0,0 +1,80 @@
+"""
+Pre-serialized question payloads for GET /tests/<test_id>/questions.
+
+Questions and their options are loaded with one eager query and serialized
+once per test content version; every student then gets the same bytes and
+ETag until the test is edited.
+"""
+import hashlib
+import json
+import threading
+
+from sqlalchemy.orm import joinedload
+
+from app.models.model import Question
+from app.services import test_content
+
+# test_id -> QuestionPayload
+_payloads = {}
+_lock = threading.Lock()
+
+
+class QuestionPayload:
+    """
+    Serialized question list of a single test version.
+    """
+
+    def __init__(self, version, body):
+        self.version = version
+        self.body = body
+        self.etag = hashlib.sha1(body).hexdigest()
+
+
+def _serialize(test_id):
+    questions = (
+        Question.query
+        .options(joinedload(Question.answer_options))
+        .filter_by(test_id=test_id)
+        .order_by(Question.part, Question.question_id)
+        .all()
+    )
+    question_list = []
+    for q in questions:
+        question_data = {
+            "question_id": q.question_id,
+            "part": q.part,
+            "question_text": q.question_text,
+            "question_type": q.question_type,
+            "options": []
+        }
+        if q.question_type == 'multiple_choice':
+            question_data["options"] = [
+                {"option_id": opt.option_id, "option_text": opt.option_text}
+                for opt in q.answer_options
+            ]
+        question_list.append(question_data)
+    return json.dumps(question_list, separators=(",", ":")).encode("utf-8")
+
+
+def get_payload(test_id):
+    """
+    Returns the cached payload for a test, or None if the test does not exist.
+    """
+    version = test_content.current_version(test_id)
+    if version is None:
+        return None
+
+    payload = _payloads.get(test_id)
+    if payload is not None and payload.version == version:
+        return payload
+
+    payload = QuestionPayload(version, _serialize(test_id))
+    with _lock:
+        _payloads[test_id] = payload
+    return payload
+
+
+@test_content.on_change
+def _drop_payload(test_id):
+    with _lock:
+        _payloads.pop(test_id, None)
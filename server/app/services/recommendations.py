@@ -0,0 +1,190 @@
+"""
+Exercise recommendations for a student's weak test parts.
+
+Approved exercises are held in memory grouped by part and difficulty. A
+result's per-part percentages are reduced to a coarse score profile (a need
+band per part), and the ranked list for each profile is computed once and
+memoized until the exercises change. Commits that touch ExerciseContent
+rebuild this worker's index and bump a stamp file so the other workers
+rebuild theirs on their next lookup.
+"""
+import threading
+import time
+
+from flask import current_app
+from sqlalchemy import event, select
+
+from app.extensions import db
+from app.models.model import ExerciseContent
+from app.services import stamps
+from app.services.scoring import PART_COLUMNS
+
+# Need bands by part percentage, checked in order, with the difficulty to start from.
+NEED_BANDS = [
+    (0.4, "high", 1),
+    (0.6, "moderate", 2),
+    (1.01, "low", 3),
+]
+BAND_ORDER = {band: index for index, (_, band, _) in enumerate(NEED_BANDS)}
+TARGET_DIFFICULTY = {band: difficulty for _, band, difficulty in NEED_BANDS}
+PART_ORDER = {part: index for index, part in enumerate(PART_COLUMNS)}
+
+
+class ExerciseIndex:
+    """
+    Approved exercises of one load, grouped as part -> difficulty -> exercises.
+    """
+
+    def __init__(self, rows):
+        self.by_part = {}
+        for row in rows:
+            exercise = {
+                "exercise_id": row.exercise_id,
+                "title": row.title,
+                "description": row.description,
+                "video_link": row.video_link,
+                "part": row.recommended_for_part,
+                "difficulty": row.difficulty,
+            }
+            difficulties = self.by_part.setdefault(row.recommended_for_part.lower(), {})
+            difficulties.setdefault(row.difficulty, []).append(exercise)
+        for difficulties in self.by_part.values():
+            for exercises in difficulties.values():
+                exercises.sort(key=lambda exercise: (exercise["title"], exercise["exercise_id"]))
+        # score profile -> ranked exercises
+        self.memo = {}
+
+    def rank(self, profile, limit, per_part):
+        """
+        Exercises for the weakest parts first; within a part, the difficulty
+        closest to the part's need band first.
+        """
+        ranked = []
+        for part, band in sorted(profile, key=lambda item: (BAND_ORDER[item[1]], PART_ORDER.get(item[0], len(PART_ORDER)))):
+            difficulties = self.by_part.get(part)
+            if not difficulties:
+                continue
+            target = TARGET_DIFFICULTY[band]
+            picked = []
+            for difficulty in sorted(difficulties, key=lambda d: (abs(d - target), d)):
+                picked.extend(dict(exercise, need=band) for exercise in difficulties[difficulty])
+                if len(picked) >= per_part:
+                    break
+            ranked.extend(picked[:per_part])
+        return ranked[:limit]
+
+
+class Recommender:
+    """
+    Per-worker exercise index, kept in step with other workers through a stamp file.
+    """
+
+    def __init__(self):
+        self._index = None
+        self._stamp = None
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def _load(self):
+        rows = db.session.execute(
+            select(
+                ExerciseContent.exercise_id,
+                ExerciseContent.title,
+                ExerciseContent.description,
+                ExerciseContent.video_link,
+                ExerciseContent.recommended_for_part,
+                ExerciseContent.difficulty,
+            ).where(ExerciseContent.is_approved.is_(True))
+        ).all()
+        return ExerciseIndex(rows)
+
+    def index(self):
+        """
+        Returns the current index, rebuilding it if another worker changed the
+        exercises or it is older than EXERCISE_INDEX_REFRESH.
+        """
+        stamp = stamps.read(current_app.config["EXERCISE_INDEX_STAMP"])
+        index = self._index
+        if (index is not None and stamp == self._stamp
+                and time.monotonic() - self._loaded_at < current_app.config["EXERCISE_INDEX_REFRESH"]):
+            return index
+        with self._lock:
+            if self._index is index:
+                self._index = self._load()
+                self._stamp = stamp
+                self._loaded_at = time.monotonic()
+            return self._index
+
+    def invalidate(self):
+        with self._lock:
+            self._index = None
+
+    def recommend(self, profile):
+        """
+        Returns the ranked exercises for a score profile, memoized per index load.
+        """
+        index = self.index()
+        ranked = index.memo.get(profile)
+        if ranked is None:
+            config = current_app.config
+            ranked = index.rank(profile, config["RECOMMENDATION_LIMIT"], config["RECOMMENDATION_PER_PART"])
+            index.memo[profile] = ranked
+        return ranked
+
+
+recommender = Recommender()
+
+
+def _need(percent):
+    for upper, band, _ in NEED_BANDS:
+        if percent < upper:
+            return band
+    return NEED_BANDS[-1][1]
+
+
+def score_profile(test_result):
+    """
+    Reduces a result to a hashable profile: ((part, need band), ...) in part order.
+    """
+    parts = (test_result.staff_breakdown or {}).get("parts") or {}
+    profile = []
+    for part, breakdown in parts.items():
+        if breakdown.get("total"):
+            profile.append((part.lower(), _need(breakdown["percent"])))
+    return tuple(sorted(profile, key=lambda item: (PART_ORDER.get(item[0], len(PART_ORDER)), item[0])))
+
+
+def for_result(test_result):
+    """
+    Returns the ranked exercises for a TestResult.
+    """
+    return recommender.recommend(score_profile(test_result))
+
+
+def notify_changed():
+    """
+    Bumps the stamp file so every worker rebuilds its index on the next lookup.
+    """
+    stamps.bump(current_app.config["EXERCISE_INDEX_STAMP"])
+
+
+def _before_flush(session, flush_context, instances):
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, ExerciseContent) and (obj not in session.dirty or session.is_modified(obj)):
+            session.info["exercises_changed"] = True
+            return
+
+
+def _after_commit(session):
+    if session.info.pop("exercises_changed", False):
+        recommender.invalidate()
+        notify_changed()
+
+
+def _after_rollback(session):
+    session.info.pop("exercises_changed", None)
+
+
+event.listen(db.session, "before_flush", _before_flush)
+event.listen(db.session, "after_commit", _after_commit)
+event.listen(db.session, "after_rollback", _after_rollback)
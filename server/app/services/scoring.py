@@ -0,0 +1,169 @@
+"""
+Scoring engine for submitted tests.
+
+The answer key of a test is built once with a single query and cached per
+content version, so grading a submission is one dictionary lookup per answer.
+"""
+import threading
+
+from sqlalchemy import select, and_
+
+from app.extensions import db
+from app.models.model import Question, AnswerOption
+from app.services import test_content
+
+# Maps the Question.part values onto the TestResult score columns.
+PART_COLUMNS = {
+    "numbers": "numbers_score",
+    "logic": "logic_score",
+    "shapes": "shapes_score",
+}
+
+# Likelihood bands, checked in order against the weakest part's percentage.
+LIKELIHOOD_BANDS = [
+    (0.4, "high"),
+    (0.6, "moderate"),
+    (1.01, "low"),
+]
+
+OUTCOME_MESSAGES = {
+    "high": "Your results suggest a high likelihood of a learning difficulty.",
+    "moderate": "Your results suggest a moderate likelihood of a learning difficulty.",
+    "low": "Your results suggest a low likelihood of a learning difficulty.",
+}
+
+# test_id -> AnswerKey
+_keys = {}
+_lock = threading.Lock()
+
+
+class AnswerKey:
+    """
+    In-memory answer key of a single test version.
+    """
+
+    def __init__(self, test_id, version, rows):
+        self.test_id = test_id
+        self.version = version
+        # question_id -> (part, frozenset of correct option ids)
+        self.entries = {}
+        # part -> number of questions that can be marked
+        self.part_totals = {}
+
+        correct = {}
+        parts = {}
+        for question_id, part, option_id in rows:
+            parts[question_id] = part
+            options = correct.setdefault(question_id, set())
+            if option_id is not None:
+                options.add(option_id)
+
+        for question_id, part in parts.items():
+            options = frozenset(correct[question_id])
+            self.entries[question_id] = (part, options)
+            if options:
+                self.part_totals[part] = self.part_totals.get(part, 0) + 1
+
+    def score(self, answers):
+        """
+        Scores a batch of answers in one pass and returns the TestResult fields.
+        Later answers to the same question replace earlier ones.
+        """
+        selected = {}
+        for answer in answers:
+            question_id = answer.get("question_id")
+            if question_id is not None:
+                selected[question_id] = answer.get("selected_option_id")
+
+        correct_by_part = dict.fromkeys(self.part_totals, 0)
+        unknown = []
+        for question_id, option_id in selected.items():
+            entry = self.entries.get(question_id)
+            if entry is None:
+                unknown.append(question_id)
+                continue
+            part, options = entry
+            if option_id is not None and option_id in options:
+                correct_by_part[part] += 1
+
+        parts = {}
+        weakest = None
+        for part, total in self.part_totals.items():
+            percent = correct_by_part[part] / total
+            parts[part] = {
+                "correct": correct_by_part[part],
+                "total": total,
+                "percent": round(percent, 4),
+            }
+            if weakest is None or percent < weakest:
+                weakest = percent
+
+        likelihood = _likelihood(weakest)
+        result = {column: None for column in PART_COLUMNS.values()}
+        for part, breakdown in parts.items():
+            column = PART_COLUMNS.get(part.lower())
+            if column:
+                result[column] = breakdown["correct"]
+
+        result.update({
+            "disability_likelihood": likelihood,
+            "outcome_message": OUTCOME_MESSAGES[likelihood],
+            "staff_breakdown": {
+                "test_id": self.test_id,
+                "key_version": self.version,
+                "parts": parts,
+                "answered": len(selected) - len(unknown),
+                "question_count": len(self.entries),
+                "unknown_questions": unknown,
+            },
+        })
+        return result
+
+
+def _likelihood(weakest):
+    if weakest is None:
+        return "low"
+    for upper, band in LIKELIHOOD_BANDS:
+        if weakest < upper:
+            return band
+    return LIKELIHOOD_BANDS[-1][1]
+
+
+def _load_key(test_id, version):
+    rows = db.session.execute(
+        select(Question.question_id, Question.part, AnswerOption.option_id)
+        .outerjoin(
+            AnswerOption,
+            and_(
+                AnswerOption.question_id == Question.question_id,
+                AnswerOption.is_correct.is_(True),
+            ),
+        )
+        .where(Question.test_id == test_id)
+    ).all()
+    return AnswerKey(test_id, version, rows)
+
+
+def get_answer_key(test_id):
+    """
+    Returns the cached answer key for a test, rebuilding it if the test's content
+    version moved on. Returns None if the test does not exist.
+    """
+    version = test_content.current_version(test_id)
+    if version is None:
+        return None
+
+    key = _keys.get(test_id)
+    if key is not None and key.version == version:
+        return key
+
+    key = _load_key(test_id, version)
+    with _lock:
+        _keys[test_id] = key
+    return key
+
+
+@test_content.on_change
+def _drop_key(test_id):
+    with _lock:
+        _keys.pop(test_id, None)
@@ -0,0 +1,45 @@
+"""
+Stamp files that tell other workers some shared state changed.
+
+A stamp holds a counter that bump() increments under an exclusive lock, so
+every change gives a new value no matter how coarse the filesystem's
+timestamps are or how close together two changes land. Readers compare the
+value they loaded with against read().
+"""
+import os
+
+try:
+    import fcntl
+except ImportError:  # Windows: bumps are only serialized within the process
+    fcntl = None
+
+
+def read(path):
+    """
+    Returns the stamp's current value, or None if it has never been bumped.
+    """
+    try:
+        with open(path, "rb") as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+
+def bump(path):
+    """
+    Increments the counter in the stamp file, creating it if needed.
+    """
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        try:
+            count = int(os.read(fd, 32) or b"0")
+        except ValueError:  # a stamp left by an older release was empty or touched
+            count = 0
+        value = str(count + 1).encode()
+        os.lseek(fd, 0, os.SEEK_SET)
+        os.write(fd, value)
+        os.ftruncate(fd, len(value))
+    finally:
+        os.close(fd)
@@ -0,0 +1,266 @@
+"""
+Synthetic cohort generator for sizing indexes and reporting queries.
+
+Creates students spread over faculties and courses, staff, test sessions with
+answers, results, surveys and follow-ups, using executemany Core inserts in
+batches. Each student has a latent ability and a minority have a specific
+weakness in one test part, so scores, likelihood bands, survey answers and
+follow-ups are correlated the way real intakes are. Results are scored with
+the real answer keys. Because the inserts bypass the ORM hooks, the report
+summaries and extracted JSON fields are rebuilt at the end.
+"""
+import random
+import uuid
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import insert, select
+
+from app.extensions import db
+from app.models.model import (
+    User, Test, Question, AnswerOption, StudentTestSession, StudentAnswer, TestResult, StudentSurvey, StudentFollowUp
+)
+from app.services import scoring, analytics, json_fields, user_index
+
+# faculty -> (share of students, courses)
+FACULTIES = {
+    "Accounting and Informatics": (0.20, ["Accounting", "Information Technology", "Taxation", "Library Science"]),
+    "Applied Sciences": (0.12, ["Biotechnology", "Chemistry", "Food Science", "Mathematics"]),
+    "Arts and Design": (0.10, ["Fashion", "Graphic Design", "Journalism", "Drama"]),
+    "Engineering and the Built Environment": (0.26, ["Civil Engineering", "Electrical Engineering", "Mechanical Engineering", "Architecture"]),
+    "Health Sciences": (0.14, ["Nursing", "Radiography", "Dental Sciences", "Somatology"]),
+    "Management Sciences": (0.18, ["Marketing", "Human Resources", "Public Management", "Tourism"]),
+}
+DIAGNOSES = ["dyslexia", "dyscalculia", "ADHD", "dyspraxia"]
+SUPPORT_NEEDS = ["extra time", "reader", "scribe", "separate venue", "assistive software"]
+PASSWORD = "Synthetic@2024"
+BATCH_STUDENTS = 500
+WEAKNESS_RATE = 0.12
+SURVEY_RATE = 0.7
+INCOMPLETE_RATE = 0.04
+RETAKE_RATE = 0.08
+
+
+class CohortExists(ValueError):
+    """Raised when the cohort for a seed has already been generated."""
+
+
+def _correct_probability(ability, weak):
+    return max(0.05, min(0.97, ability - (0.35 if weak else 0.0)))
+
+
+class CohortGenerator:
+    """
+    Builds and inserts one synthetic cohort.
+    """
+
+    def __init__(self, students, staff, days, seed=None):
+        self.random = random.Random(seed)
+        self.students = students
+        self.staff = staff
+        self.days = days
+        self.tag = uuid.UUID(int=self.random.getrandbits(128)).hex[:6]
+        self.now = datetime.utcnow().replace(microsecond=0)
+        self.counts = dict.fromkeys(("users", "sessions", "answers", "results", "surveys", "follow_ups"), 0)
+
+    def _uuid(self):
+        return str(uuid.UUID(int=self.random.getrandbits(128), version=4))
+
+    def _insert(self, model, rows):
+        if rows:
+            db.session.execute(insert(model.__table__), rows)
+
+    def _load_tests(self, test_ids):
+        query = select(Test.test_id)
+        if test_ids:
+            query = query.where(Test.test_id.in_(test_ids))
+        tests = []
+        for test_id in db.session.execute(query).scalars():
+            key = scoring.get_answer_key(test_id)
+            if key is None or not key.entries:
+                continue
+            wrong = {}
+            options = db.session.execute(
+                select(AnswerOption.question_id, AnswerOption.option_id)
+                .join(Question, Question.question_id == AnswerOption.question_id)
+                .where(Question.test_id == test_id)
+            ).all()
+            for question_id, option_id in options:
+                if option_id not in key.entries[question_id][1]:
+                    wrong.setdefault(question_id, []).append(option_id)
+            tests.append((key, wrong))
+        return tests
+
+    def _registered(self):
+        # Accounts exist before the window their sittings are spread over.
+        return self.now - timedelta(days=max(self.days, 1) + self.random.randint(1, 30), seconds=self.random.randint(0, 86399))
+
+    def _staff_rows(self, password_hash):
+        rows = []
+        for i in range(self.staff):
+            rows.append({
+                "user_id": self._uuid(),
+                "email": f"staff.{self.tag}.{i}@dut.ac.za",
+                "username": f"staff_{self.tag}_{i}",
+                "first_name": "Staff",
+                "last_name": f"{self.tag}{i}",
+                "role": "staff",
+                "password_hash": password_hash,
+                "created_at": self._registered(),
+            })
+        return rows
+
+    def _student(self, index, password_hash):
+        faculties = list(FACULTIES)
+        faculty = self.random.choices(faculties, weights=[FACULTIES[f][0] for f in faculties])[0]
+        course = self.random.choice(FACULTIES[faculty][1])
+        return {
+            "user_id": self._uuid(),
+            "student_number": f"9{self.tag}{index:07d}"[:20],
+            "email": f"9{self.tag}{index:07d}@dut4life.ac.za",
+            "username": f"s_{self.tag}_{index}",
+            "first_name": "Student",
+            "last_name": f"{self.tag}{index}",
+            "faculty": faculty,
+            "course": course,
+            "role": "student",
+            "password_hash": password_hash,
+            "created_at": self._registered(),
+        }
+
+    def _sit(self, student, weak_part, ability, test, start, rows):
+        key, wrong = test
+        session_id = self._uuid()
+        complete = self.random.random() >= INCOMPLETE_RATE
+        answers = []
+        for question_id, (part, correct) in key.entries.items():
+            if not complete and self.random.random() < 0.5:
+                continue
+            p = _correct_probability(ability, part.lower() == weak_part)
+            if correct and self.random.random() < p:
+                option_id = self.random.choice(sorted(correct))
+            else:
+                option_id = self.random.choice(wrong.get(question_id) or sorted(correct) or [None])
+            answers.append({"question_id": question_id, "selected_option_id": option_id})
+            rows["answers"].append({
+                "answer_id": self._uuid(),
+                "session_id": session_id,
+                "question_id": question_id,
+                "selected_option_id": option_id,
+                "free_text_answer": None,
+            })
+
+        end = start + timedelta(minutes=self.random.randint(20, 75))
+        rows["sessions"].append({
+            "session_id": session_id,
+            "user_id": student["user_id"],
+            "test_id": key.test_id,
+            "start_time": start,
+            "end_time": end if complete else None,
+            "status": "completed" if complete else "in_progress",
+        })
+        if not complete:
+            return None
+        fields = key.score(answers)
+        rows["results"].append(dict(fields, result_id=self._uuid(), session_id=session_id))
+        return fields, end
+
+    def _start_time(self):
+        day = self.now - timedelta(days=self.random.randint(1, max(self.days, 1)))
+        hour = self.random.choices(range(8, 20), weights=[4, 8, 9, 7, 3, 6, 8, 7, 5, 3, 2, 1])[0]
+        return day.replace(hour=hour, minute=self.random.randint(0, 59), second=self.random.randint(0, 59))
+
+    def _survey(self, student, weak_part, first_result):
+        struggled = weak_part is not None or (first_result and first_result["disability_likelihood"] == "high")
+        reading = self.random.random() < (0.55 if struggled else 0.08)
+        diagnosis = self.random.choice(DIAGNOSES) if self.random.random() < (0.3 if struggled else 0.02) else None
+        needs = self.random.sample(SUPPORT_NEEDS, self.random.randint(1, 3)) if diagnosis or (reading and self.random.random() < 0.5) else []
+        return {
+            "survey_id": self._uuid(),
+            "user_id": student["user_id"],
+            "survey_data": {
+                "reading": {
+                    "primary": reading,
+                    "high_school": reading and self.random.random() < 0.7,
+                },
+                "prior_diagnosis": diagnosis,
+                "support_needs": needs,
+                "home_language": self.random.choice(["isiZulu", "English", "isiXhosa", "Afrikaans", "Sesotho"]),
+            },
+            "submission_date": self._start_time() - timedelta(days=self.random.randint(1, 14)),
+        }
+
+    def generate(self, test_ids=None):
+        """
+        Inserts the cohort in one transaction and rebuilds the derived tables.
+        Returns the number of rows written per table.
+        """
+        from werkzeug.security import generate_password_hash
+
+        tests = self._load_tests(test_ids)
+        if not tests:
+            raise LookupError("No tests with questions found; import test content first")
+        # Account names and ids derive from the seed, so a rerun would collide with the first run.
+        existing = db.session.execute(
+            select(User.user_id).where(
+                User.username.startswith(f"s_{self.tag}_", autoescape=True)
+                | User.username.startswith(f"staff_{self.tag}_", autoescape=True)
+            ).limit(1)
+        ).first()
+        if existing is not None:
+            raise CohortExists(f"A cohort tagged {self.tag} already exists; use a different --seed")
+
+        # One hash for every synthetic account keeps generation fast; the password is PASSWORD.
+        password_hash = generate_password_hash(PASSWORD, current_app.config["PASSWORD_HASH_METHOD"])
+        staff_rows = self._staff_rows(password_hash)
+        self._insert(User, staff_rows)
+        self.counts["users"] += len(staff_rows)
+        staff_ids = [row["user_id"] for row in staff_rows]
+
+        try:
+            for batch_start in range(0, self.students, BATCH_STUDENTS):
+                rows = {name: [] for name in ("users", "sessions", "answers", "results", "surveys", "follow_ups")}
+                for index in range(batch_start, min(batch_start + BATCH_STUDENTS, self.students)):
+                    student = self._student(index, password_hash)
+                    rows["users"].append(student)
+                    ability = self.random.betavariate(6, 3)
+                    weak_part = self.random.choice(list(scoring.PART_COLUMNS)) if self.random.random() < WEAKNESS_RATE else None
+
+                    test = self.random.choice(tests)
+                    first = self._sit(student, weak_part, ability, test, self._start_time(), rows)
+                    if first and self.random.random() < RETAKE_RATE:
+                        self._sit(student, weak_part, min(ability + 0.05, 1.0), test, first[1] + timedelta(days=self.random.randint(7, 30)), rows)
+
+                    if self.random.random() < SURVEY_RATE:
+                        rows["surveys"].append(self._survey(student, weak_part, first[0] if first else None))
+                    if first and staff_ids and first[0]["disability_likelihood"] == "high" and self.random.random() < 0.6:
+                        rows["follow_ups"].append({
+                            "followup_id": self._uuid(),
+                            "student_id": student["user_id"],
+                            "staff_id": self.random.choice(staff_ids),
+                            "notes": self.random.choice([
+                                "Invited to a screening interview.",
+                                "Referred for a formal assessment.",
+                                "Discussed exam concessions.",
+                                "No response yet; follow up next week.",
+                            ]),
+                            "flagged_date": first[1] + timedelta(days=self.random.randint(1, 10)),
+                        })
+
+                self._insert(User, rows["users"])
+                self._insert(StudentTestSession, rows["sessions"])
+                self._insert(StudentAnswer, rows["answers"])
+                self._insert(TestResult, rows["results"])
+                self._insert(StudentSurvey, rows["surveys"])
+                self._insert(StudentFollowUp, rows["follow_ups"])
+                for name, batch in rows.items():
+                    self.counts[name] += len(batch)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        analytics.rebuild()
+        json_fields.rebuild()
+        user_index.notify_changed()
+        return self.counts
@@ -0,0 +1,108 @@
+"""
+Tracks a content version per test so derived caches (answer keys, question
+payloads) are rebuilt only when the questions or options of a test change.
+"""
+import threading
+import time
+
+from flask import current_app
+from sqlalchemy import event, select
+
+from app.extensions import db
+from app.models.model import Test, Question, AnswerOption
+
+# test_id -> (content_version, monotonic time it was read from the DB)
+_versions = {}
+_lock = threading.Lock()
+_listeners = []
+
+
+def on_change(callback):
+    """
+    Registers a callback(test_id) run after a commit that changed a test's content.
+    """
+    _listeners.append(callback)
+    return callback
+
+
+def current_version(test_id):
+    """
+    Returns the content version of a test, or None if the test does not exist.
+    Versions are re-read from the DB at most every TEST_CONTENT_VERSION_TTL seconds
+    so other workers' edits are picked up without a query on every request.
+    """
+    ttl = current_app.config["TEST_CONTENT_VERSION_TTL"]
+    now = time.monotonic()
+    cached = _versions.get(test_id)
+    if cached and now - cached[1] < ttl:
+        return cached[0]
+
+    version = db.session.execute(
+        select(Test.content_version).where(Test.test_id == test_id)
+    ).scalar_one_or_none()
+    if version is not None:
+        with _lock:
+            _versions[test_id] = (version, now)
+    return version
+
+
+def invalidate(test_id):
+    """
+    Forgets the cached version of a test and notifies the registered caches.
+    """
+    with _lock:
+        _versions.pop(test_id, None)
+    for callback in _listeners:
+        callback(test_id)
+
+
+def mark_changed(session, test_ids):
+    """
+    Bumps the content version of the given tests as part of the current transaction.
+    Used directly by bulk writers that bypass the ORM unit of work.
+    """
+    changed = session.info.setdefault("changed_tests", set())
+    with session.no_autoflush:
+        for test_id in test_ids:
+            if test_id is None or test_id in changed:
+                continue
+            test = session.get(Test, test_id)
+            if test is not None:
+                test.content_version = (test.content_version or 0) + 1
+                changed.add(test_id)
+
+
+def _test_id_for(session, obj):
+    if isinstance(obj, Question):
+        return obj.test_id
+    if obj.question is not None:
+        return obj.question.test_id
+    question = session.get(Question, obj.question_id)
+    return question.test_id if question else None
+
+
+def _before_flush(session, flush_context, instances):
+    test_ids = set()
+    with session.no_autoflush:
+        for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+            if not isinstance(obj, (Question, AnswerOption)):
+                continue
+            if obj in session.dirty and not session.is_modified(obj):
+                continue
+            test_ids.add(_test_id_for(session, obj))
+    if test_ids:
+        mark_changed(session, test_ids)
+
+
+def _after_commit(session):
+    for test_id in session.info.pop("changed_tests", ()):
+        invalidate(test_id)
+
+
+def _after_rollback(session):
+    session.info.pop("changed_tests", None)
+
+
+event.listen(db.session, "before_flush", _before_flush)
+event.listen(db.session, "after_commit", _after_commit)
+event.listen(db.session, "after_rollback", _after_rollback)
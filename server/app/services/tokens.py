@@ -0,0 +1,278 @@
+"""
+JWT issuing and verification.
+
+Verified tokens are kept in a small LRU together with the identity they map
+to, so an authenticated request neither recomputes the HMAC nor re-fetches
+the user. Entries expire with the token, or after TOKEN_CACHE_TTL seconds so
+role changes are picked up.
+
+Every token carries a jti. Logout records it in revoked_tokens until the
+token would have expired, and bumps a stamp file; each worker reloads its
+in-memory set of revoked ids when the stamp's counter changes, so a revoked
+token is refused by every worker, cached or not.
+
+Clients that can only put credentials in the URL, such as the browser's
+EventSource, exchange their token for a ticket: a JWT that expires after
+TICKET_TTL_SECONDS and whose audience names the one endpoint it opens. A
+ticket in an access log is therefore of little use, and it is never
+accepted as a bearer token.
+"""
+import collections
+import datetime
+import functools
+import threading
+import time
+import uuid
+
+import jwt
+from flask import current_app, g, jsonify, request
+from sqlalchemy import select, delete
+from sqlalchemy.dialects.sqlite import insert
+
+from app.extensions import db
+from app.models.model import User, RevokedToken
+from app.services import stamps
+
+
+class TokenCache:
+    """
+    Thread-safe LRU of token -> (valid_until, identity).
+    """
+
+    def __init__(self):
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, token):
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                return None
+            if entry[0] <= time.time():
+                del self._entries[token]
+                return None
+            self._entries.move_to_end(token)
+            return entry[1]
+
+    def put(self, token, valid_until, identity, maxsize):
+        with self._lock:
+            self._entries[token] = (valid_until, identity)
+            self._entries.move_to_end(token)
+            while len(self._entries) > maxsize:
+                self._entries.popitem(last=False)
+
+    def discard(self, token):
+        with self._lock:
+            self._entries.pop(token, None)
+
+
+class Denylist:
+    """
+    This worker's copy of the unexpired revoked token ids.
+    """
+
+    def __init__(self):
+        self._jtis = frozenset()
+        self._stamp = None
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def __contains__(self, jti):
+        stamp = stamps.read(current_app.config["TOKEN_REVOCATION_STAMP"])
+        if not self._loaded or stamp != self._stamp:
+            with self._lock:
+                if not self._loaded or stamp != self._stamp:
+                    self._jtis = frozenset(db.session.execute(
+                        select(RevokedToken.jti).where(RevokedToken.expires_at > datetime.datetime.utcnow())
+                    ).scalars())
+                    self._stamp = stamp
+                    self._loaded = True
+        return jti in self._jtis
+
+
+cache = TokenCache()
+denylist = Denylist()
+
+
+def issue_token(user):
+    """
+    Returns a signed token for a user.
+    """
+    payload = {
+        "jti": str(uuid.uuid4()),
+        "uid": user.user_id,
+        "role": user.role,
+        "exp": datetime.datetime.utcnow() + datetime.timedelta(hours=current_app.config["TOKEN_TTL_HOURS"])
+    }
+    return jwt.encode(payload, current_app.config["SECRET_KEY"], algorithm="HS256")
+
+
+def verify_token(token):
+    """
+    Returns the identity behind a token, raising jwt.InvalidTokenError if it is not valid.
+    """
+    identity = cache.get(token)
+    if identity is not None:
+        if identity["jti"] in denylist:
+            cache.discard(token)
+            raise jwt.InvalidTokenError("Token has been revoked")
+        return identity
+
+    # Tickets carry an audience, which this decode (without one) rejects.
+    claims = jwt.decode(token, current_app.config["SECRET_KEY"], algorithms=["HS256"])
+    identity = _identity(claims)
+    valid_until = min(claims["exp"], time.time() + current_app.config["TOKEN_CACHE_TTL"])
+    cache.put(token, valid_until, identity, current_app.config["TOKEN_CACHE_SIZE"])
+    return identity
+
+
+def _identity(claims):
+    if claims.get("jti") in denylist:
+        raise jwt.InvalidTokenError("Token has been revoked")
+    row = db.session.execute(
+        select(User.user_id, User.email, User.role, User.faculty, User.course)
+        .where(User.user_id == claims.get("uid"))
+    ).first()
+    if row is None:
+        raise jwt.InvalidTokenError("Unknown user")
+    return {
+        "jti": claims.get("jti"),
+        "uid": row.user_id,
+        "email": row.email,
+        "role": row.role,
+        "faculty": row.faculty,
+        "course": row.course,
+    }
+
+
+def issue_ticket(identity, purpose):
+    """
+    Returns a short-lived ticket that only opens endpoints requiring `purpose`.
+    It is revoked together with the token it was issued for.
+    """
+    payload = {
+        "jti": identity["jti"],
+        "uid": identity["uid"],
+        "aud": purpose,
+        "exp": datetime.datetime.utcnow() + datetime.timedelta(seconds=current_app.config["TICKET_TTL_SECONDS"])
+    }
+    return jwt.encode(payload, current_app.config["SECRET_KEY"], algorithm="HS256")
+
+
+def verify_ticket(ticket, purpose):
+    """
+    Returns the identity behind a ticket for `purpose`, raising jwt.InvalidTokenError if it is not valid.
+    """
+    claims = jwt.decode(ticket, current_app.config["SECRET_KEY"], algorithms=["HS256"], audience=purpose)
+    return _identity(claims)
+
+
+def verify_request_token(token):
+    """
+    verify_token, done at most once per request: admission control and
+    token_required both need the caller's identity.
+    """
+    checked = g.get("_token_check")
+    if checked is None or checked[0] != token:
+        try:
+            checked = (token, verify_token(token), None)
+        except jwt.InvalidTokenError as e:
+            checked = (token, None, e)
+        g._token_check = checked
+    if checked[2] is not None:
+        raise checked[2]
+    return checked[1]
+
+
+def request_token():
+    """
+    Returns the bearer token of the current request, if any.
+    """
+    header = request.headers.get("Authorization", "")
+    if header.startswith("Bearer "):
+        return header[len("Bearer "):].strip() or None
+    return None
+
+
+def revoke(token):
+    """
+    Revokes a token, e.g. on logout, until it expires. Returns False if the
+    token is not valid (or predates token ids) and so needs no revoking.
+    """
+    cache.discard(token)
+    try:
+        claims = jwt.decode(token, current_app.config["SECRET_KEY"], algorithms=["HS256"])
+    except jwt.InvalidTokenError:
+        return False
+    if not claims.get("jti"):
+        return False
+
+    now = datetime.datetime.utcnow()
+    expires_at = datetime.datetime.utcfromtimestamp(claims["exp"])
+    try:
+        db.session.execute(
+            insert(RevokedToken).values(jti=claims["jti"], expires_at=expires_at).on_conflict_do_nothing()
+        )
+        db.session.execute(delete(RevokedToken).where(RevokedToken.expires_at <= now))
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    stamps.bump(current_app.config["TOKEN_REVOCATION_STAMP"])
+    return True
+
+
+def token_required(fn=None, role=None):
+    """
+    Requires a valid bearer token, and optionally a role, on a view.
+    The caller's identity is available as g.current_user.
+
+    Usable as @token_required or @token_required(role='staff').
+    """
+    if fn is None:
+        return functools.partial(token_required, role=role)
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        token = request_token()
+        if not token:
+            return jsonify({"error": "Authentication token is missing"}), 401
+        try:
+            identity = verify_request_token(token)
+        except jwt.ExpiredSignatureError:
+            return jsonify({"error": "Authentication token has expired"}), 401
+        except jwt.InvalidTokenError:
+            return jsonify({"error": "Authentication token is invalid"}), 401
+        if role is not None and identity["role"] != role:
+            return jsonify({"error": "You do not have access to this resource"}), 403
+        g.current_user = identity
+        return fn(*args, **kwargs)
+
+    return wrapper
+
+
+def ticket_required(purpose, role=None):
+    """
+    Requires a valid ?ticket= for `purpose`, and optionally a role, on a view.
+    The caller's identity is available as g.current_user.
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            ticket = request.args.get("ticket")
+            if not ticket:
+                return jsonify({"error": "Ticket is missing"}), 401
+            try:
+                identity = verify_ticket(ticket, purpose)
+            except jwt.ExpiredSignatureError:
+                return jsonify({"error": "Ticket has expired"}), 401
+            except jwt.InvalidTokenError:
+                return jsonify({"error": "Ticket is invalid"}), 401
+            if role is not None and identity["role"] != role:
+                return jsonify({"error": "You do not have access to this resource"}), 403
+            g.current_user = identity
+            return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,147 @@
+"""
+In-process existence index over registered emails and usernames.
+
+Each worker keeps a Bloom filter per field. A negative answer is definite and
+comes straight from memory; only possible positives are confirmed against the
+users table. Workers stay in step through a stamp file bumped after every
+signup: when its counter changes, a worker pulls just the users added since
+its last load (by SQLite rowid).
+"""
+import hashlib
+import math
+import threading
+import time
+
+from flask import current_app
+from sqlalchemy import select, literal_column
+
+from app.extensions import db
+from app.models.model import User
+from app.services import stamps
+
+FIELDS = {
+    "email": User.email,
+    "username": User.username,
+}
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter using double hashing over a blake2b digest.
+    """
+
+    def __init__(self, capacity, error_rate=0.01):
+        self.capacity = max(capacity, 1)
+        self.size = max(int(-self.capacity * math.log(error_rate) / (math.log(2) ** 2)), 8)
+        self.hashes = max(int(round(self.size / self.capacity * math.log(2))), 1)
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, value):
+        digest = hashlib.blake2b(value.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, value):
+        for position in self._positions(value):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, value):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(value))
+
+
+class ExistenceIndex:
+    """
+    Bloom filters over users.email and users.username for one worker.
+    """
+
+    def __init__(self):
+        self._filters = None
+        self._high_water = 0
+        self._stamp = None
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def _rows(self, after=0):
+        rowid = literal_column("users.rowid")
+        return db.session.execute(
+            select(rowid, User.email, User.username).where(rowid > after).order_by(rowid)
+        )
+
+    def _add_rows(self, rows):
+        for rowid, email, username in rows:
+            if email:
+                self._filters["email"].add(email)
+            if username:
+                self._filters["username"].add(username)
+            self._high_water = max(self._high_water, rowid)
+
+    def _load(self):
+        total = db.session.execute(select(db.func.count()).select_from(User)).scalar()
+        capacity = max(total * 2, current_app.config["USER_INDEX_CAPACITY"])
+        self._filters = {field: BloomFilter(capacity) for field in FIELDS}
+        self._high_water = 0
+        self._add_rows(self._rows())
+        self._loaded_at = time.monotonic()
+
+    def _sync(self):
+        stamp = stamps.read(current_app.config["USER_INDEX_STAMP"])
+        with self._lock:
+            # Filters loaded before a fork stay valid in the child; only age and size force a reload.
+            stale = (
+                self._filters is None
+                or time.monotonic() - self._loaded_at > current_app.config["USER_INDEX_REFRESH"]
+                or self._filters["email"].count > self._filters["email"].capacity
+            )
+            if stale:
+                self._load()
+            elif stamp != self._stamp:
+                self._add_rows(self._rows(self._high_water))
+            self._stamp = stamp
+
+    def exists(self, field, values):
+        """
+        Returns {value: bool} for the given values of 'email' or 'username'.
+        Values the filter rules out are answered from memory; the rest are
+        confirmed with a single IN query.
+        """
+        self._sync()
+        result = {}
+        candidates = []
+        for value in values:
+            if not value or value not in self._filters[field]:
+                result[value] = False
+            else:
+                candidates.append(value)
+
+        if candidates:
+            column = FIELDS[field]
+            found = set(db.session.execute(select(column).where(column.in_(candidates))).scalars())
+            for value in candidates:
+                result[value] = value in found
+        return result
+
+    def record(self, email, username):
+        """
+        Adds a newly committed user to this worker's filters and tells other workers.
+        """
+        self._sync()
+        with self._lock:
+            if email:
+                self._filters["email"].add(email)
+            if username:
+                self._filters["username"].add(username)
+        notify_changed()
+
+
+def notify_changed():
+    """
+    Bumps the stamp file so every worker picks up newly added users.
+    Call after committing users through any path, including bulk loads.
+    """
+    stamps.bump(current_app.config["USER_INDEX_STAMP"])
+
+
+index = ExistenceIndex()
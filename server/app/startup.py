@@ -0,0 +1,76 @@
+"""
+Startup timing and cache warming for preloaded, multi-worker deployments.
+"""
+import contextlib
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class StartupReport:
+    """
+    Wall-clock time spent in each phase of create_app.
+    """
+
+    def __init__(self):
+        self.phases = []
+
+    def record(self, name, seconds):
+        self.phases.append((name, seconds))
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    @property
+    def total(self):
+        return sum(seconds for _, seconds in self.phases)
+
+    def lines(self):
+        width = max(len(name) for name, _ in self.phases)
+        lines = [f"{name:<{width}}  {seconds * 1000:8.1f} ms" for name, seconds in self.phases]
+        lines.append(f"{'total':<{width}}  {self.total * 1000:8.1f} ms")
+        return lines
+
+    def finish(self, app):
+        """
+        Stores the report on the app, publishes it as metrics and logs it.
+        """
+        from app import instrumentation
+
+        app.extensions["startup_report"] = self
+        for name, seconds in self.phases:
+            instrumentation.registry.set("app_startup_seconds", {"phase": name}, round(seconds, 6))
+        logger.info("App started in %.1f ms (%s)", self.total * 1000,
+                    ", ".join(f"{name} {seconds * 1000:.1f} ms" for name, seconds in self.phases))
+
+
+def warm_caches(app):
+    """
+    Builds the per-test answer keys and question payloads, loads the user
+    existence index and exercise index, and makes the dummy password hash. Run in the gunicorn master with preload_app so workers
+    fork with warm caches.
+    """
+    from app.extensions import db
+    from app.models.model import Test
+    from app.services import scoring, question_cache, recommendations, passwords
+    from app.services.user_index import index as user_index
+
+    start = time.perf_counter()
+    with app.app_context():
+        test_ids = [test_id for (test_id,) in db.session.query(Test.test_id)]
+        for test_id in test_ids:
+            scoring.get_answer_key(test_id)
+            question_cache.get_payload(test_id)
+        user_index.exists("email", [])
+        recommendations.recommender.index()
+        passwords.dummy_hash()
+        db.session.remove()
+        # Connections must not be shared with forked workers.
+        db.engine.dispose()
+    logger.info("Warmed caches for %d tests in %.1f ms", len(test_ids), (time.perf_counter() - start) * 1000)
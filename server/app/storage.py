@@ -0,0 +1,84 @@
+"""
+SQLite storage profiles.
+
+The profile (STORAGE_PROFILE) decides the pragmas applied to every new
+connection and how connections are pooled. 'production' turns on WAL so
+readers never block the writer, relaxes fsyncs to synchronous=NORMAL (safe
+with WAL), memory-maps the database and waits on locks instead of failing
+with "database is locked".
+"""
+import os
+
+from sqlalchemy import event
+
+from app.extensions import db
+
+PROFILES = {
+    "development": {
+        "pragmas": {
+            "busy_timeout": "{SQLITE_BUSY_TIMEOUT_MS}",
+        },
+        "engine_options": {},
+        "auto_create_schema": True,
+    },
+    "production": {
+        "pragmas": {
+            "journal_mode": "WAL",
+            "synchronous": "NORMAL",
+            "busy_timeout": "{SQLITE_BUSY_TIMEOUT_MS}",
+            "mmap_size": "{SQLITE_MMAP_SIZE}",
+            "cache_size": "{SQLITE_CACHE_SIZE}",
+            "temp_store": "MEMORY",
+        },
+        "engine_options": {
+            "pool_size": "{SQLITE_POOL_SIZE}",
+            "max_overflow": "{SQLITE_POOL_OVERFLOW}",
+            "pool_timeout": "{SQLITE_POOL_TIMEOUT}",
+        },
+        "auto_create_schema": False,
+    },
+}
+
+
+def _resolve(values, config):
+    return {
+        key: config[value[1:-1]] if isinstance(value, str) and value.startswith("{") else value
+        for key, value in values.items()
+    }
+
+
+def configure(app):
+    """
+    Applies the selected profile to the app config. Call before db.init_app.
+    """
+    name = app.config["STORAGE_PROFILE"]
+    if name not in PROFILES:
+        raise ValueError(f"Unknown STORAGE_PROFILE {name!r}; expected one of {', '.join(PROFILES)}")
+    profile = PROFILES[name]
+
+    os.makedirs(os.path.dirname(app.config["DB_PATH"]), exist_ok=True)
+
+    engine_options = _resolve(profile["engine_options"], app.config)
+    engine_options.setdefault("connect_args", {})["timeout"] = app.config["SQLITE_BUSY_TIMEOUT_MS"] / 1000
+    engine_options.update(app.config.get("SQLALCHEMY_ENGINE_OPTIONS") or {})
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = engine_options
+    if "AUTO_CREATE_SCHEMA" in os.environ:
+        app.config["AUTO_CREATE_SCHEMA"] = os.environ["AUTO_CREATE_SCHEMA"] == "1"
+    app.config.setdefault("AUTO_CREATE_SCHEMA", profile["auto_create_schema"])
+    app.config["SQLITE_PRAGMAS"] = _resolve(profile["pragmas"], app.config)
+
+
+def install_pragmas(app):
+    """
+    Registers the connect hook that applies the profile's pragmas. Call after db.init_app.
+    """
+    pragmas = app.config["SQLITE_PRAGMAS"]
+
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+    with app.app_context():
+        event.listen(db.engine, "connect", set_pragmas)
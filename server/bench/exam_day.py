@@ -0,0 +1,386 @@
+"""
+Exam-day load test for the full student journey.
+
+Starts the app against a scratch SQLite database, seeds one test, and runs a
+cohort of simulated students through signup, login, list tests, fetch
+questions, start session, submit answers and wait for the result. Reports p50/p95/p99 latency,
+throughput and error rate per endpoint, and can save or enforce a baseline.
+
+Run from the server/ directory:
+
+    python -m bench.exam_day --students 300 --concurrency 100
+    python -m bench.exam_day --save-baseline bench/baseline.json
+    python -m bench.exam_day --baseline bench/baseline.json
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+PASSWORD = "Bench@2024pass"
+PARTS = ("Numbers", "Logic", "Shapes")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--students", type=int, default=200, help="cohort size")
+    parser.add_argument("--concurrency", type=int, default=50, help="students in flight at once")
+    parser.add_argument("--think-time", type=float, default=0.0,
+                        help="mean seconds a student pauses between steps")
+    parser.add_argument("--questions", type=int, default=10, help="questions per part")
+    parser.add_argument("--autosave", action="store_true",
+                        help="autosave each answer before submitting")
+    parser.add_argument("--poll-interval", type=float, default=0.25,
+                        help="seconds between result polls after an asynchronous submit")
+    parser.add_argument("--result-timeout", type=float, default=60.0,
+                        help="seconds to wait for a result before counting the journey as failed")
+    parser.add_argument("--server", choices=("waitress", "werkzeug"), default="waitress")
+    parser.add_argument("--threads", type=int, default=16, help="server threads")
+    parser.add_argument("--profile", default="production", help="STORAGE_PROFILE for the scratch database")
+    parser.add_argument("--hash-method", default="pbkdf2:sha256:100000",
+                        help="PASSWORD_HASH_METHOD; lower cost keeps the run about the app, not the KDF")
+    parser.add_argument("--no-admission", action="store_true",
+                        help="disable admission control to compare against an unprotected server")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", dest="json_path", help="write the report as JSON to this file")
+    parser.add_argument("--baseline", help="fail if the run regresses against this baseline file")
+    parser.add_argument("--save-baseline", help="write the run as a baseline to this file")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="allowed relative regression in latency and throughput")
+    parser.add_argument("--retries", type=int, default=6,
+                        help="times a shed request is retried after its Retry-After, as the client would")
+    parser.add_argument("--max-error-rate", type=float, default=0.01,
+                        help="error budget: fail if any endpoint's error rate exceeds this after retries")
+    return parser.parse_args(argv)
+
+
+def prepare_environment(args, workdir):
+    # Config reads the environment at import time, so this must run before importing the app.
+    os.environ["DB_PATH"] = os.path.join(workdir, "bench.db")
+    os.environ["STORAGE_PROFILE"] = args.profile
+    os.environ["PASSWORD_HASH_METHOD"] = args.hash_method
+    os.environ.setdefault("METRICS_DIR", os.path.join(workdir, "metrics"))
+    # Every simulated student sends its own X-Forwarded-For address, as if behind a proxy.
+    os.environ["ADMISSION_PROXY_HOPS"] = "1"
+    os.environ["ADMISSION_ENABLED"] = "0" if args.no_admission else "1"
+    # Admission limits are shares of the server's thread count.
+    os.environ["GUNICORN_THREADS"] = str(args.threads)
+    # The classification dispatcher is started once the schema exists, like gunicorn's post_fork.
+    os.environ["CLASSIFICATION_AUTOSTART"] = "0"
+
+
+def build_app(args):
+    from app import create_app
+    from app.extensions import db
+    from app.models.model import Test, Question, AnswerOption
+    from app.services import classification
+
+    app = create_app()
+    rng = random.Random(args.seed)
+    with app.app_context():
+        db.create_all()
+        test = Test(name="Exam day benchmark", description="Synthetic benchmark test")
+        db.session.add(test)
+        db.session.flush()
+        for part in PARTS:
+            for number in range(args.questions):
+                question = Question(
+                    test_id=test.test_id, part=part,
+                    question_text=f"{part} question {number + 1}", question_type="multiple_choice"
+                )
+                correct = rng.randrange(4)
+                question.answer_options = [
+                    AnswerOption(option_text=f"Option {index + 1}", is_correct=index == correct)
+                    for index in range(4)
+                ]
+                db.session.add(question)
+        db.session.commit()
+    if app.config["CLASSIFICATION_ASYNC"]:
+        classification.worker.start(app)
+    return app
+
+
+def start_server(app, args):
+    if args.server == "waitress":
+        from waitress import create_server
+        server = create_server(app, host="127.0.0.1", port=0, threads=args.threads,
+                               connection_limit=max(args.concurrency * 2, 100))
+        port = server.effective_port
+        thread = threading.Thread(target=server.run, daemon=True)
+
+        def stop():
+            server.task_dispatcher.shutdown()
+            server.close()
+    else:
+        from werkzeug.serving import make_server
+        server = make_server("127.0.0.1", 0, app, threaded=True)
+        port = server.server_port
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        stop = server.shutdown
+    thread.start()
+    return port, stop
+
+
+class Recorder:
+    """
+    Collects (latency, ok) samples per endpoint label.
+    """
+
+    def __init__(self):
+        self.samples = {}
+        self.lock = threading.Lock()
+
+    def add(self, label, seconds, ok):
+        with self.lock:
+            self.samples.setdefault(label, []).append((seconds, ok))
+
+
+class Client:
+    """
+    One keep-alive HTTP connection per simulated student.
+    """
+
+    def __init__(self, port, recorder, address, retries):
+        self.port = port
+        self.recorder = recorder
+        self.address = address
+        self.retries = retries
+        self.connection = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+        self.token = None
+
+    def request(self, label, method, path, body=None, ok_statuses=(200, 201, 202, 304), retries=None):
+        if retries is None:
+            retries = self.retries
+        headers = {"Content-Type": "application/json", "X-Forwarded-For": self.address}
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+        payload = json.dumps(body) if body is not None else None
+        start = time.perf_counter()
+        try:
+            self.connection.request(method, path, body=payload, headers=headers)
+            response = self.connection.getresponse()
+            data = response.read()
+            status = response.status
+        except (OSError, http.client.HTTPException):
+            self.connection.close()
+            self.connection = http.client.HTTPConnection("127.0.0.1", self.port, timeout=60)
+            self.recorder.add(label, time.perf_counter() - start, False)
+            return None, None
+        if status in (429, 503) and retries and response.getheader("Retry-After"):
+            # Shed by admission control: back off as the client would, then retry.
+            self.recorder.add("shed", time.perf_counter() - start, True)
+            time.sleep(min(float(response.getheader("Retry-After")), 5.0))
+            return self.request(label, method, path, body, ok_statuses, retries - 1)
+        self.recorder.add(label, time.perf_counter() - start, status in ok_statuses)
+        try:
+            return status, json.loads(data) if data else None
+        except ValueError:
+            return status, None
+
+    def close(self):
+        self.connection.close()
+
+
+def student_journey(index, port, recorder, args, rng):
+    client = Client(port, recorder, f"10.{index // 65536 % 256}.{index // 256 % 256}.{index % 256}", args.retries)
+
+    def think():
+        if args.think_time > 0:
+            time.sleep(rng.uniform(0, 2 * args.think_time))
+
+    try:
+        number = f"{40000000 + index:08d}"
+        email = f"{number}@dut4life.ac.za"
+        status, _ = client.request("signup", "POST", "/api/auth/signup", {
+            "full_name": "Bench Student", "username": f"bench{number}",
+            "email": email, "password": PASSWORD,
+        })
+        if status != 201:
+            return False
+        think()
+
+        status, body = client.request("login", "POST", "/api/auth/login", {"email": email, "password": PASSWORD})
+        if status != 200:
+            return False
+        client.token = body["token"]
+        user_id = body["user"]["uid"]
+        think()
+
+        status, tests = client.request("list_tests", "GET", "/api/tests")
+        if status != 200 or not tests:
+            return False
+        test_id = tests[0]["test_id"]
+        think()
+
+        status, questions = client.request("get_questions", "GET", f"/api/tests/{test_id}/questions")
+        if status != 200:
+            return False
+        think()
+
+        status, body = client.request("start_session", "POST", "/api/sessions/start",
+                                      {"user_id": user_id, "test_id": test_id})
+        if status != 201:
+            return False
+        session_id = body["session_id"]
+        think()
+
+        answers = [
+            {"question_id": q["question_id"], "selected_option_id": rng.choice(q["options"])["option_id"]}
+            for q in questions
+        ]
+        if args.autosave:
+            for answer in answers:
+                client.request("autosave", "POST", f"/api/sessions/{session_id}/answers", {"answers": [answer]})
+            answers = []
+
+        status, _ = client.request("submit", "POST", "/api/sessions/submit",
+                                   {"session_id": session_id, "answers": answers})
+        if status == 200:
+            return True
+        if status != 202:
+            return False
+
+        # Classification runs in the background; poll until the result is ready.
+        deadline = time.monotonic() + args.result_timeout
+        while time.monotonic() < deadline:
+            time.sleep(args.poll_interval)
+            status, _ = client.request("result", "GET", f"/api/sessions/{session_id}/result")
+            if status == 200:
+                return True
+            if status != 202:
+                return False
+        return False
+    finally:
+        client.close()
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(int(round(fraction * (len(sorted_values) - 1))), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+def summarize(recorder, wall_seconds, journeys_ok, args):
+    endpoints = {}
+    for label, samples in sorted(recorder.samples.items()):
+        latencies = sorted(seconds for seconds, _ in samples)
+        errors = sum(1 for _, ok in samples if not ok)
+        endpoints[label] = {
+            "requests": len(samples),
+            "errors": errors,
+            "error_rate": round(errors / len(samples), 4),
+            "throughput": round(len(samples) / wall_seconds, 2),
+            "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+            "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+            "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+        }
+    return {
+        "settings": {
+            "students": args.students, "concurrency": args.concurrency, "think_time": args.think_time,
+            "questions_per_part": args.questions, "autosave": args.autosave, "server": args.server,
+            "threads": args.threads, "profile": args.profile,
+        },
+        "max_error_rate": args.max_error_rate,
+        "wall_seconds": round(wall_seconds, 2),
+        "journeys_completed": journeys_ok,
+        "journeys_per_second": round(journeys_ok / wall_seconds, 2),
+        "endpoints": endpoints,
+    }
+
+
+def print_report(report):
+    print(f"\n{report['journeys_completed']}/{report['settings']['students']} journeys completed "
+          f"in {report['wall_seconds']}s ({report['journeys_per_second']} students/s)\n")
+    header = f"{'endpoint':<15}{'requests':>9}{'errors':>8}{'err%':>7}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+    print(header)
+    print("-" * len(header))
+    for label, stats in report["endpoints"].items():
+        print(f"{label:<15}{stats['requests']:>9}{stats['errors']:>8}{stats['error_rate'] * 100:>7.2f}"
+              f"{stats['throughput']:>9.1f}{stats['p50_ms']:>9.1f}{stats['p95_ms']:>9.1f}{stats['p99_ms']:>9.1f}")
+
+
+def compare(report, baseline, tolerance):
+    """
+    Returns a list of regressions of report against baseline.
+    """
+    problems = []
+    for label, base in baseline["endpoints"].items():
+        if label == "shed":
+            continue
+        current = report["endpoints"].get(label)
+        if current is None:
+            problems.append(f"{label}: missing from this run")
+            continue
+        for key in ("p95_ms", "p99_ms"):
+            if current[key] > base[key] * (1 + tolerance):
+                problems.append(f"{label}: {key} {current[key]} > baseline {base[key]} (+{tolerance:.0%})")
+        if current["error_rate"] > base["error_rate"] + 0.01:
+            problems.append(f"{label}: error rate {current['error_rate']} > baseline {base['error_rate']}")
+        if current["throughput"] < base["throughput"] * (1 - tolerance):
+            problems.append(f"{label}: throughput {current['throughput']} < baseline {base['throughput']} (-{tolerance:.0%})")
+    return problems
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    workdir = tempfile.mkdtemp(prefix="exam-day-")
+    prepare_environment(args, workdir)
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+    app = build_app(args)
+    port, stop = start_server(app, args)
+    recorder = Recorder()
+    print(f"Running {args.students} students, {args.concurrency} at a time, against {args.server} "
+          f"on port {port} (scratch data in {workdir})")
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        futures = [
+            pool.submit(student_journey, index, port, recorder, args, random.Random(args.seed * 100003 + index))
+            for index in range(args.students)
+        ]
+        journeys_ok = sum(1 for future in futures if future.result())
+    wall_seconds = time.perf_counter() - start
+    stop()
+
+    report = summarize(recorder, wall_seconds, journeys_ok, args)
+    print_report(report)
+
+    if args.json_path:
+        with open(args.json_path, "w") as handle:
+            json.dump(report, handle, indent=2)
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as handle:
+            json.dump(report, handle, indent=2)
+        print(f"\nSaved baseline to {args.save_baseline}")
+    over_budget = [
+        f"{label}: error rate {stats['error_rate']} > {args.max_error_rate}"
+        for label, stats in report["endpoints"].items()
+        if label != "shed" and stats["error_rate"] > args.max_error_rate
+    ]
+    if over_budget:
+        print("\nOver the error budget:")
+        for problem in over_budget:
+            print(f"  - {problem}")
+        return 1
+    if args.baseline:
+        with open(args.baseline) as handle:
+            problems = compare(report, json.load(handle), args.tolerance)
+        if problems:
+            print("\nRegressions against baseline:")
+            for problem in problems:
+                print(f"  - {problem}")
+            return 1
+        print("\nNo regressions against baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,65 @@
+"""
+Gunicorn settings for multi-worker deployment.
+
+The app is imported once in the master (preload_app) and its caches are warmed
+there, so each worker forks ready to serve. The schema is not touched at
+startup; run `flask db upgrade` as a separate deploy step.
+"""
+import os
+
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:5000")
+workers = int(os.environ.get("GUNICORN_WORKERS", 4))
+threads = int(os.environ.get("GUNICORN_THREADS", 8))
+worker_class = "gthread"
+preload_app = True
+timeout = 30
+graceful_timeout = 20
+
+os.environ.setdefault("STORAGE_PROFILE", "production")
+# Threads do not survive fork, so each worker starts its classification dispatcher in post_fork.
+os.environ["CLASSIFICATION_AUTOSTART"] = "0"
+
+
+def when_ready(server):
+    from app import instrumentation
+    from app.startup import warm_caches
+
+    app = server.app.wsgi()
+    warm_caches(app)
+    if app.config["METRICS_ENABLED"]:
+        # The master's snapshot carries the startup gauges for as long as it runs.
+        instrumentation.flush(app, force=True)
+
+
+def post_fork(server, worker):
+    from app import instrumentation
+    from app.extensions import db
+    from app.services import classification
+
+    app = server.app.wsgi()
+    with app.app_context():
+        # Drop pooled connections inherited from the master without closing its sockets.
+        db.engine.dispose(close=False)
+    # Metrics recorded in the master belong to the master's snapshot.
+    instrumentation.registry.reset()
+    if app.config["METRICS_ENABLED"]:
+        # A file left under this pid by an earlier run must not be overwritten.
+        instrumentation.retire(app, os.getpid())
+    if app.config["CLASSIFICATION_ASYNC"]:
+        classification.worker.start(app)
+
+
+def worker_exit(server, worker):
+    from app import instrumentation
+
+    app = server.app.wsgi()
+    if app.config["METRICS_ENABLED"]:
+        instrumentation.flush(app, force=True)
+
+
+def child_exit(server, worker):
+    from app import instrumentation
+
+    app = server.app.wsgi()
+    if app.config["METRICS_ENABLED"]:
+        instrumentation.retire(app, worker.pid)
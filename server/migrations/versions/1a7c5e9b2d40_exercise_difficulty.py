@@ -0,0 +1,26 @@
+"""exercise difficulty
+
+Revision ID: 1a7c5e9b2d40
+Revises: 8d6f1b3e4a27
+Create Date: 2026-10-18 12:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '1a7c5e9b2d40'
+down_revision = '8d6f1b3e4a27'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('exercise_content', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('difficulty', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('exercise_content', schema=None) as batch_op:
+        batch_op.drop_column('difficulty')
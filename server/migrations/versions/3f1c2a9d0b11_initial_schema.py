@@ -0,0 +1,136 @@
+"""initial schema
+
+Revision ID: 3f1c2a9d0b11
+Revises: 
+Create Date: 2026-10-18 09:15:00.000000
+
+Databases created with db.create_all() before migrations existed can be
+brought under Alembic with `flask db stamp 3f1c2a9d0b11` followed by
+`flask db upgrade`.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f1c2a9d0b11'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('exercise_content',
+    sa.Column('exercise_id', sa.String(length=36), nullable=False),
+    sa.Column('title', sa.String(length=100), nullable=False),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('video_link', sa.String(length=255), nullable=True),
+    sa.Column('recommended_for_part', sa.String(length=20), nullable=False),
+    sa.Column('is_approved', sa.Boolean(), nullable=False),
+    sa.PrimaryKeyConstraint('exercise_id')
+    )
+    op.create_table('tests',
+    sa.Column('test_id', sa.String(length=36), nullable=False),
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.PrimaryKeyConstraint('test_id')
+    )
+    op.create_table('users',
+    sa.Column('user_id', sa.String(length=36), nullable=False),
+    sa.Column('student_number', sa.String(length=20), nullable=True),
+    sa.Column('first_name', sa.String(length=50), nullable=True),
+    sa.Column('last_name', sa.String(length=50), nullable=True),
+    sa.Column('email', sa.String(length=255), nullable=False),
+    sa.Column('faculty', sa.String(length=100), nullable=True),
+    sa.Column('course', sa.String(length=100), nullable=True),
+    sa.Column('role', sa.String(length=20), nullable=False),
+    sa.Column('password_hash', sa.String(length=255), nullable=False),
+    sa.PrimaryKeyConstraint('user_id'),
+    sa.UniqueConstraint('email'),
+    sa.UniqueConstraint('student_number')
+    )
+    op.create_table('questions',
+    sa.Column('question_id', sa.String(length=36), nullable=False),
+    sa.Column('test_id', sa.String(length=36), nullable=False),
+    sa.Column('part', sa.String(length=20), nullable=False),
+    sa.Column('question_text', sa.Text(), nullable=False),
+    sa.Column('question_type', sa.String(length=50), nullable=False),
+    sa.ForeignKeyConstraint(['test_id'], ['tests.test_id'], ),
+    sa.PrimaryKeyConstraint('question_id')
+    )
+    op.create_table('student_follow_ups',
+    sa.Column('followup_id', sa.String(length=36), nullable=False),
+    sa.Column('student_id', sa.String(length=36), nullable=False),
+    sa.Column('staff_id', sa.String(length=36), nullable=False),
+    sa.Column('notes', sa.Text(), nullable=True),
+    sa.Column('flagged_date', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['staff_id'], ['users.user_id'], ),
+    sa.ForeignKeyConstraint(['student_id'], ['users.user_id'], ),
+    sa.PrimaryKeyConstraint('followup_id')
+    )
+    op.create_table('student_surveys',
+    sa.Column('survey_id', sa.String(length=36), nullable=False),
+    sa.Column('user_id', sa.String(length=36), nullable=False),
+    sa.Column('survey_data', sa.JSON(), nullable=False),
+    sa.Column('submission_date', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.user_id'], ),
+    sa.PrimaryKeyConstraint('survey_id'),
+    sa.UniqueConstraint('user_id')
+    )
+    op.create_table('student_test_sessions',
+    sa.Column('session_id', sa.String(length=36), nullable=False),
+    sa.Column('user_id', sa.String(length=36), nullable=False),
+    sa.Column('test_id', sa.String(length=36), nullable=False),
+    sa.Column('start_time', sa.DateTime(), nullable=False),
+    sa.Column('end_time', sa.DateTime(), nullable=True),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.ForeignKeyConstraint(['test_id'], ['tests.test_id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.user_id'], ),
+    sa.PrimaryKeyConstraint('session_id')
+    )
+    op.create_table('answer_options',
+    sa.Column('option_id', sa.String(length=36), nullable=False),
+    sa.Column('question_id', sa.String(length=36), nullable=False),
+    sa.Column('option_text', sa.Text(), nullable=False),
+    sa.Column('is_correct', sa.Boolean(), nullable=False),
+    sa.ForeignKeyConstraint(['question_id'], ['questions.question_id'], ),
+    sa.PrimaryKeyConstraint('option_id')
+    )
+    op.create_table('test_results',
+    sa.Column('result_id', sa.String(length=36), nullable=False),
+    sa.Column('session_id', sa.String(length=36), nullable=False),
+    sa.Column('numbers_score', sa.Integer(), nullable=True),
+    sa.Column('logic_score', sa.Integer(), nullable=True),
+    sa.Column('shapes_score', sa.Integer(), nullable=True),
+    sa.Column('disability_likelihood', sa.String(length=20), nullable=False),
+    sa.Column('outcome_message', sa.String(length=255), nullable=False),
+    sa.Column('staff_breakdown', sa.JSON(), nullable=False),
+    sa.ForeignKeyConstraint(['session_id'], ['student_test_sessions.session_id'], ),
+    sa.PrimaryKeyConstraint('result_id'),
+    sa.UniqueConstraint('session_id')
+    )
+    op.create_table('student_answers',
+    sa.Column('answer_id', sa.String(length=36), nullable=False),
+    sa.Column('session_id', sa.String(length=36), nullable=False),
+    sa.Column('question_id', sa.String(length=36), nullable=False),
+    sa.Column('selected_option_id', sa.String(length=36), nullable=True),
+    sa.Column('free_text_answer', sa.Text(), nullable=True),
+    sa.ForeignKeyConstraint(['question_id'], ['questions.question_id'], ),
+    sa.ForeignKeyConstraint(['selected_option_id'], ['answer_options.option_id'], ),
+    sa.ForeignKeyConstraint(['session_id'], ['student_test_sessions.session_id'], ),
+    sa.PrimaryKeyConstraint('answer_id')
+    )
+
+
+def downgrade():
+    op.drop_table('student_answers')
+    op.drop_table('test_results')
+    op.drop_table('answer_options')
+    op.drop_table('student_test_sessions')
+    op.drop_table('student_surveys')
+    op.drop_table('student_follow_ups')
+    op.drop_table('questions')
+    op.drop_table('users')
+    op.drop_table('tests')
+    op.drop_table('exercise_content')
@@ -0,0 +1,44 @@
+"""score distributions by cohort
+
+Revision ID: 4c8a2e6f1d93
+Revises: 6b2e0d8f3c51
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4c8a2e6f1d93'
+down_revision = '6b2e0d8f3c51'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.drop_table('score_distributions')
+    op.create_table('score_distributions',
+    sa.Column('test_id', sa.String(length=36), nullable=False),
+    sa.Column('part', sa.String(length=20), nullable=False),
+    sa.Column('faculty', sa.String(length=100), nullable=False),
+    sa.Column('course', sa.String(length=100), nullable=False),
+    sa.Column('disability_likelihood', sa.String(length=20), nullable=False),
+    sa.Column('period', sa.String(length=10), nullable=False),
+    sa.Column('score', sa.Integer(), nullable=False),
+    sa.Column('result_count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('test_id', 'part', 'faculty', 'course', 'disability_likelihood', 'period', 'score')
+    )
+    # The old counters cannot be split by cohort; repopulate with `flask reports rebuild`.
+
+
+def downgrade():
+    op.drop_table('score_distributions')
+    op.create_table('score_distributions',
+    sa.Column('test_id', sa.String(length=36), nullable=False),
+    sa.Column('part', sa.String(length=20), nullable=False),
+    sa.Column('score', sa.Integer(), nullable=False),
+    sa.Column('result_count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('test_id', 'part', 'score')
+    )
+    # Repopulate with `flask reports rebuild` after downgrading the code as well.
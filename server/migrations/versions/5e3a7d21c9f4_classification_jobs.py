@@ -0,0 +1,38 @@
+"""classification job queue
+
+Revision ID: 5e3a7d21c9f4
+Revises: c2d9f04e6a18
+Create Date: 2026-10-18 10:05:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5e3a7d21c9f4'
+down_revision = 'c2d9f04e6a18'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('classification_jobs',
+    sa.Column('job_id', sa.String(length=36), nullable=False),
+    sa.Column('session_id', sa.String(length=36), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('last_error', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('claimed_at', sa.DateTime(), nullable=True),
+    sa.Column('completed_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['session_id'], ['student_test_sessions.session_id'], ),
+    sa.PrimaryKeyConstraint('job_id'),
+    sa.UniqueConstraint('session_id')
+    )
+    op.create_index('ix_classification_jobs_status_created_at', 'classification_jobs', ['status', 'created_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_classification_jobs_status_created_at', table_name='classification_jobs')
+    op.drop_table('classification_jobs')
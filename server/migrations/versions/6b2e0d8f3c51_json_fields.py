@@ -0,0 +1,40 @@
+"""extracted JSON fields
+
+Revision ID: 6b2e0d8f3c51
+Revises: 1a7c5e9b2d40
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6b2e0d8f3c51'
+down_revision = '1a7c5e9b2d40'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('json_fields',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('source', sa.String(length=20), nullable=False),
+    sa.Column('row_id', sa.String(length=36), nullable=False),
+    sa.Column('user_id', sa.String(length=36), nullable=False),
+    sa.Column('field', sa.String(length=64), nullable=False),
+    sa.Column('value_text', sa.Text(), nullable=True),
+    sa.Column('value_number', sa.Float(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_json_fields_source_field_text', 'json_fields', ['source', 'field', 'value_text', 'user_id'], unique=False)
+    op.create_index('ix_json_fields_source_field_number', 'json_fields', ['source', 'field', 'value_number', 'user_id'], unique=False)
+    op.create_index('ix_json_fields_source_row_id', 'json_fields', ['source', 'row_id'], unique=False)
+    # Existing surveys and results are extracted with `flask json-fields rebuild`.
+
+
+def downgrade():
+    op.drop_index('ix_json_fields_source_row_id', table_name='json_fields')
+    op.drop_index('ix_json_fields_source_field_number', table_name='json_fields')
+    op.drop_index('ix_json_fields_source_field_text', table_name='json_fields')
+    op.drop_table('json_fields')
@@ -0,0 +1,69 @@
+"""scoring, autosave and reporting tables
+
+Revision ID: 7b4e8c1d2a36
+Revises: 3f1c2a9d0b11
+Create Date: 2026-10-18 09:16:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7b4e8c1d2a36'
+down_revision = '3f1c2a9d0b11'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('tests', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('content_version', sa.Integer(), nullable=False, server_default=sa.text('1')))
+
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('username', sa.String(length=50), nullable=True))
+        batch_op.create_unique_constraint('uq_users_username', ['username'])
+
+    # Keep only the latest answer per question before enforcing one answer per question.
+    op.execute(
+        "DELETE FROM student_answers WHERE rowid NOT IN ("
+        "SELECT MAX(rowid) FROM student_answers GROUP BY session_id, question_id)"
+    )
+    with op.batch_alter_table('student_answers', schema=None) as batch_op:
+        batch_op.create_unique_constraint('uq_student_answers_session_question', ['session_id', 'question_id'])
+
+    op.create_table('result_rollups',
+    sa.Column('test_id', sa.String(length=36), nullable=False),
+    sa.Column('part', sa.String(length=20), nullable=False),
+    sa.Column('faculty', sa.String(length=100), nullable=False),
+    sa.Column('course', sa.String(length=100), nullable=False),
+    sa.Column('disability_likelihood', sa.String(length=20), nullable=False),
+    sa.Column('period', sa.String(length=10), nullable=False),
+    sa.Column('result_count', sa.Integer(), nullable=False),
+    sa.Column('score_sum', sa.Integer(), nullable=False),
+    sa.Column('max_score_sum', sa.Integer(), nullable=False),
+    sa.Column('pass_count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('test_id', 'part', 'faculty', 'course', 'disability_likelihood', 'period')
+    )
+    op.create_table('score_distributions',
+    sa.Column('test_id', sa.String(length=36), nullable=False),
+    sa.Column('part', sa.String(length=20), nullable=False),
+    sa.Column('score', sa.Integer(), nullable=False),
+    sa.Column('result_count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('test_id', 'part', 'score')
+    )
+
+
+def downgrade():
+    op.drop_table('score_distributions')
+    op.drop_table('result_rollups')
+
+    with op.batch_alter_table('student_answers', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_student_answers_session_question', type_='unique')
+
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_users_username', type_='unique')
+        batch_op.drop_column('username')
+
+    with op.batch_alter_table('tests', schema=None) as batch_op:
+        batch_op.drop_column('content_version')
@@ -0,0 +1,27 @@
+"""keyset indexes for the staff listings
+
+Revision ID: 8d6f1b3e4a27
+Revises: 5e3a7d21c9f4
+Create Date: 2026-10-18 11:20:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '8d6f1b3e4a27'
+down_revision = '5e3a7d21c9f4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_student_test_sessions_end_time_session_id', 'student_test_sessions', ['end_time', 'session_id'], unique=False)
+    op.create_index('ix_student_follow_ups_flagged_date_followup_id', 'student_follow_ups', ['flagged_date', 'followup_id'], unique=False)
+    op.create_index('ix_student_surveys_submission_date_survey_id', 'student_surveys', ['submission_date', 'survey_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_student_surveys_submission_date_survey_id', table_name='student_surveys')
+    op.drop_index('ix_student_follow_ups_flagged_date_followup_id', table_name='student_follow_ups')
+    op.drop_index('ix_student_test_sessions_end_time_session_id', table_name='student_test_sessions')
@@ -0,0 +1,26 @@
+"""classification job backoff
+
+Revision ID: b5d2e8a4c7f1
+Revises: 9e1d7c3b5a62
+Create Date: 2026-10-20 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b5d2e8a4c7f1'
+down_revision = '9e1d7c3b5a62'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('classification_jobs', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('not_before', sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('classification_jobs', schema=None) as batch_op:
+        batch_op.drop_column('not_before')
@@ -0,0 +1,38 @@
+"""indexes on the columns the app filters and joins on
+
+Revision ID: c2d9f04e6a18
+Revises: 7b4e8c1d2a36
+Create Date: 2026-10-18 09:17:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'c2d9f04e6a18'
+down_revision = '7b4e8c1d2a36'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_users_faculty_course', 'users', ['faculty', 'course'], unique=False)
+    op.create_index('ix_questions_test_id_part', 'questions', ['test_id', 'part'], unique=False)
+    op.create_index('ix_answer_options_question_id_is_correct', 'answer_options', ['question_id', 'is_correct'], unique=False)
+    op.create_index('ix_student_test_sessions_user_id_start_time', 'student_test_sessions', ['user_id', 'start_time'], unique=False)
+    op.create_index('ix_student_test_sessions_test_id_status', 'student_test_sessions', ['test_id', 'status'], unique=False)
+    # student_answers.session_id is covered by uq_student_answers_session_question.
+    op.create_index('ix_student_answers_question_id', 'student_answers', ['question_id'], unique=False)
+    op.create_index('ix_student_follow_ups_student_id_flagged_date', 'student_follow_ups', ['student_id', 'flagged_date'], unique=False)
+    op.create_index('ix_student_follow_ups_staff_id', 'student_follow_ups', ['staff_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_student_follow_ups_staff_id', table_name='student_follow_ups')
+    op.drop_index('ix_student_follow_ups_student_id_flagged_date', table_name='student_follow_ups')
+    op.drop_index('ix_student_answers_question_id', table_name='student_answers')
+    op.drop_index('ix_student_test_sessions_test_id_status', table_name='student_test_sessions')
+    op.drop_index('ix_student_test_sessions_user_id_start_time', table_name='student_test_sessions')
+    op.drop_index('ix_answer_options_question_id_is_correct', table_name='answer_options')
+    op.drop_index('ix_questions_test_id_part', table_name='questions')
+    op.drop_index('ix_users_faculty_course', table_name='users')
@@ -0,0 +1,40 @@
+"""user created_at for the students listing keyset
+
+Revision ID: d7a3f5c1e9b8
+Revises: b5d2e8a4c7f1
+Create Date: 2026-10-20 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd7a3f5c1e9b8'
+down_revision = 'b5d2e8a4c7f1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('created_at', sa.DateTime(), nullable=True))
+
+    # Existing accounts are dated by their first test sitting, or by the upgrade if they never sat one.
+    # The fallback is written in SQLAlchemy's DateTime format so keyset comparisons stay in order.
+    op.execute("""
+        UPDATE users SET created_at = COALESCE(
+            (SELECT MIN(start_time) FROM student_test_sessions WHERE student_test_sessions.user_id = users.user_id),
+            strftime('%Y-%m-%d %H:%M:%S.000000', 'now')
+        )
+    """)
+
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.alter_column('created_at', existing_type=sa.DateTime(), nullable=False)
+        batch_op.create_index('ix_users_role_created_at_user_id', ['role', 'created_at', 'user_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_index('ix_users_role_created_at_user_id')
+        batch_op.drop_column('created_at')
@@ -0,0 +1,39 @@
+"""keep the JSON type of extracted fields
+
+Revision ID: e4b8c2a6d0f3
+Revises: d7a3f5c1e9b8
+Create Date: 2026-10-20 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e4b8c2a6d0f3'
+down_revision = 'd7a3f5c1e9b8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('json_fields', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('value_type', sa.String(length=10), nullable=True))
+
+    # Booleans were stored as 1/0 and cannot be told apart from numbers here;
+    # run `flask json-fields rebuild` after upgrading to restore their types.
+    op.execute("""
+        UPDATE json_fields SET value_type = CASE
+            WHEN value_text IS NOT NULL THEN 'text'
+            WHEN value_number = CAST(value_number AS INTEGER) THEN 'integer'
+            ELSE 'real'
+        END
+    """)
+
+    with op.batch_alter_table('json_fields', schema=None) as batch_op:
+        batch_op.alter_column('value_type', existing_type=sa.String(length=10), nullable=False)
+
+
+def downgrade():
+    with op.batch_alter_table('json_fields', schema=None) as batch_op:
+        batch_op.drop_column('value_type')
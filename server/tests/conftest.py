@@ -0,0 +1,88 @@
+"""
+Shared fixtures. Every test gets its own app on a scratch SQLite database in
+tmp_path, with every file the app shares between workers (stamps, metrics,
+admission buckets, event log, archive) next to it. Settings are patched on
+Config before create_app reads it.
+"""
+import pytest
+
+from app import create_app
+from app.config import Config
+from app.extensions import db
+from app.models.model import User, Test, Question, AnswerOption
+from app.services import tokens
+
+PARTS = ("Numbers", "Logic", "Shapes")
+
+
+@pytest.fixture
+def make_app(tmp_path, monkeypatch):
+    def make(**overrides):
+        db_path = str(tmp_path / "app.db")
+        settings = {
+            "DB_PATH": db_path,
+            "SQLALCHEMY_DATABASE_URI": f"sqlite:///{db_path}",
+            "STORAGE_PROFILE": "development",
+            "TOKEN_REVOCATION_STAMP": str(tmp_path / "revoked_tokens.stamp"),
+            "USER_INDEX_STAMP": str(tmp_path / "user_index.stamp"),
+            "EXERCISE_INDEX_STAMP": str(tmp_path / "exercise_index.stamp"),
+            "METRICS_DIR": str(tmp_path / "metrics"),
+            "ADMISSION_BUCKET_FILE": str(tmp_path / "admission.buckets"),
+            "EVENT_LOG": str(tmp_path / "events.jsonl"),
+            "ARCHIVE_DB_PATH": str(tmp_path / "archive.db"),
+            # Tests drive classification themselves and hash inline.
+            "CLASSIFICATION_AUTOSTART": False,
+            "PASSWORD_HASH_WORKERS": 0,
+        }
+        settings.update(overrides)
+        for name, value in settings.items():
+            monkeypatch.setattr(Config, name, value, raising=False)
+        return create_app()
+    return make
+
+
+@pytest.fixture
+def app(make_app):
+    return make_app()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def staff_headers(app):
+    with app.app_context():
+        staff = User(email="staff@dut.ac.za", password_hash="x", role="staff")
+        db.session.add(staff)
+        db.session.commit()
+        return {"Authorization": f"Bearer {tokens.issue_token(staff)}"}
+
+
+@pytest.fixture
+def student_test(app):
+    """
+    A student and a test with three two-option questions per part. Returns
+    (user_id, test_id, [(question_id, correct_option_id, wrong_option_id), ...]).
+    """
+    with app.app_context():
+        student = User(email="12345678@dut4life.ac.za", password_hash="x", faculty="Engineering", course="CS")
+        test = Test(name="Screening")
+        db.session.add_all([student, test])
+        db.session.flush()
+        questions = []
+        for part in PARTS:
+            for i in range(3):
+                question = Question(test_id=test.test_id, part=part, question_text=f"{part} {i}",
+                                    question_type="multiple_choice")
+                question.answer_options = [AnswerOption(option_text="right", is_correct=True),
+                                           AnswerOption(option_text="wrong", is_correct=False)]
+                db.session.add(question)
+                questions.append(question)
+        db.session.commit()
+        keyed = []
+        for question in questions:
+            options = {option.is_correct: option.option_id for option in question.answer_options}
+            keyed.append((question.question_id, options[True], options[False]))
+        return student.user_id, test.test_id, keyed
@@ -0,0 +1,92 @@
+import os
+import runpy
+import threading
+import time
+
+import pytest
+
+from app import admission
+from app.config import Config
+
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app", "config.py")
+
+
+def _config(monkeypatch, **env):
+    for name, value in env.items():
+        monkeypatch.setenv(name, str(value))
+    return runpy.run_path(CONFIG_PATH)["Config"]
+
+
+def test_gate_queues_then_sheds():
+    gate = admission.Gate("write", limit=1, queue_size=1)
+    assert gate.acquire(timeout=1) is None
+
+    # One request may wait for the slot; the next one is shed at once.
+    waited = []
+    waiter = threading.Thread(target=lambda: waited.append(gate.acquire(timeout=5)))
+    waiter.start()
+    while gate.waiting == 0:
+        time.sleep(0.01)
+    assert gate.acquire(timeout=1) == "queue_full"
+
+    gate.release()
+    waiter.join()
+    assert waited == [None]
+    assert gate.acquire(timeout=0.05) == "queue_timeout"
+
+
+def test_ip_rate_limit_returns_429_with_retry_after(make_app):
+    client = make_app(ADMISSION_IP_BURST=2, ADMISSION_IP_RATE=0.01).test_client()
+    assert [client.get("/api/tests").status_code for _ in range(2)] == [200, 200]
+
+    response = client.get("/api/tests")
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+
+
+@pytest.mark.parametrize("proxy_hops", [0, 1])
+def test_spoofed_forwarded_for_shares_the_bucket(make_app, proxy_hops):
+    client = make_app(ADMISSION_IP_BURST=2, ADMISSION_IP_RATE=0.01, ADMISSION_PROXY_HOPS=proxy_hops).test_client()
+    # The client invents the left entries; the trusted proxy appends the real address.
+    statuses = [
+        client.get("/api/tests", headers={"X-Forwarded-For": f"10.0.0.{i}, 203.0.113.7"}).status_code
+        for i in range(3)
+    ]
+    assert statuses == [200, 200, 429]
+
+
+def test_clients_behind_the_proxy_get_their_own_buckets(make_app):
+    client = make_app(ADMISSION_IP_BURST=1, ADMISSION_IP_RATE=0.01, ADMISSION_PROXY_HOPS=1).test_client()
+    statuses = [
+        client.get("/api/tests", headers={"X-Forwarded-For": f"203.0.113.{i}"}).status_code
+        for i in range(3)
+    ]
+    assert statuses == [200, 200, 200]
+
+
+def test_full_class_is_shed_without_blocking_reads(make_app):
+    limits = dict(Config.ADMISSION_LIMITS, staff=0)
+    queues = dict(Config.ADMISSION_QUEUE, staff=0)
+    app = make_app(ADMISSION_LIMITS=limits, ADMISSION_QUEUE=queues)
+    client = app.test_client()
+
+    response = client.get("/api/staff/students")
+    assert response.status_code == 503
+    assert int(response.headers["Retry-After"]) >= 1
+    assert client.get("/api/tests").status_code == 200
+
+
+@pytest.mark.parametrize("threads, hash_workers", [(8, 1), (8, 2), (16, 2), (32, 4)])
+def test_gated_classes_leave_a_quarter_of_the_threads(monkeypatch, threads, hash_workers):
+    config = _config(monkeypatch, GUNICORN_THREADS=threads, PASSWORD_HASH_WORKERS=hash_workers)
+    limits, queues = config.ADMISSION_LIMITS, config.ADMISSION_QUEUE
+
+    held = sum(limits[name] + queues[name] for name in ("auth", "write", "staff"))
+    assert held == threads * 3 // 4
+    assert limits["read"] == threads
+
+
+@pytest.mark.parametrize("threads, hash_workers", [(4, 4), (8, 4), (16, 2)])
+def test_auth_limit_keeps_every_hashing_worker_busy(monkeypatch, threads, hash_workers):
+    config = _config(monkeypatch, GUNICORN_THREADS=threads, PASSWORD_HASH_WORKERS=hash_workers)
+    assert config.ADMISSION_LIMITS["auth"] >= hash_workers
@@ -0,0 +1,106 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.extensions import db
+from app.models.model import ClassificationJob, StudentTestSession
+from app.services import classification, scoring
+
+
+@pytest.fixture
+def worker(app, monkeypatch):
+    """
+    A dispatcher that the test drives by hand: claims and runs happen only
+    when the test calls them, never on a background thread.
+    """
+    worker = classification.ClassificationWorker()
+    worker._app = app
+    monkeypatch.setattr(worker, "start", lambda app: None)
+    monkeypatch.setattr(classification, "worker", worker)
+    return worker
+
+
+def _submit(client, student_test):
+    user_id, test_id, questions = student_test
+    session_id = client.post("/api/sessions/start", json={"user_id": user_id, "test_id": test_id}).json["session_id"]
+    answers = [{"question_id": question_id, "selected_option_id": right} for question_id, right, _ in questions]
+    response = client.post("/api/sessions/submit", json={"session_id": session_id, "answers": answers})
+    assert response.status_code == 202
+    assert response.json["status_url"] == f"/api/sessions/{session_id}/result"
+    return session_id
+
+
+def _claim(app, worker):
+    with app.app_context():
+        return worker._claim()
+
+
+def _job(app, session_id):
+    with app.app_context():
+        job = ClassificationJob.query.filter_by(session_id=session_id).one()
+        db.session.expunge(job)
+        return job
+
+
+def test_submitted_session_is_classified(app, client, worker, student_test):
+    session_id = _submit(client, student_test)
+    assert client.get(f"/api/sessions/{session_id}/result").status_code == 202
+
+    row = _claim(app, worker)
+    assert row.session_id == session_id and row.attempts == 1
+    assert _job(app, session_id).status == "running"
+    worker._run(row.job_id, row.session_id, row.attempts)
+
+    assert _job(app, session_id).status == "completed"
+    response = client.get(f"/api/sessions/{session_id}/result")
+    assert response.status_code == 200
+    assert response.json["scores"] == {"numbers": 3, "logic": 3, "shapes": 3}
+
+
+def test_nothing_to_claim_when_queue_is_empty(app, worker):
+    assert _claim(app, worker) is None
+
+
+def test_failed_attempts_back_off_until_max_attempts(app, client, worker, student_test, monkeypatch):
+    monkeypatch.setitem(app.config, "CLASSIFICATION_MAX_ATTEMPTS", 2)
+    monkeypatch.setitem(app.config, "CLASSIFICATION_RETRY_BACKOFF", 60)
+    monkeypatch.setattr(scoring, "get_answer_key", lambda test_id: (_ for _ in ()).throw(RuntimeError("model crashed")))
+    session_id = _submit(client, student_test)
+
+    row = _claim(app, worker)
+    worker._run(row.job_id, row.session_id, row.attempts)
+    job = _job(app, session_id)
+    assert job.status == "queued" and job.last_error == "model crashed"
+    assert job.not_before > datetime.utcnow() + timedelta(seconds=50)
+
+    # Not claimable again until the backoff has passed.
+    assert _claim(app, worker) is None
+    with app.app_context():
+        db.session.get(ClassificationJob, row.job_id).not_before = datetime.utcnow() - timedelta(seconds=1)
+        db.session.commit()
+
+    row = _claim(app, worker)
+    assert row.attempts == 2
+    worker._run(row.job_id, row.session_id, row.attempts)
+
+    assert _job(app, session_id).status == "failed"
+    with app.app_context():
+        assert db.session.get(StudentTestSession, session_id).status == "failed"
+    response = client.get(f"/api/sessions/{session_id}/result")
+    assert response.status_code == 500
+    assert response.json["status"] == "failed"
+
+
+def test_expired_lease_is_claimed_again(app, client, worker, student_test):
+    session_id = _submit(client, student_test)
+    row = _claim(app, worker)
+    # The worker that claimed it died without finishing.
+    assert _claim(app, worker) is None
+
+    with app.app_context():
+        job = db.session.get(ClassificationJob, row.job_id)
+        job.claimed_at -= timedelta(seconds=app.config["CLASSIFICATION_LEASE_SECONDS"] + 1)
+        db.session.commit()
+
+    row = _claim(app, worker)
+    assert row.session_id == session_id and row.attempts == 2
@@ -0,0 +1,77 @@
+import base64
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.extensions import db
+from app.models.model import User
+
+
+@pytest.fixture
+def app(make_app):
+    # Pages are walked quickly with one staff token, and results are scored inline.
+    return make_app(ADMISSION_ENABLED=False, CLASSIFICATION_ASYNC=False)
+
+
+def _walk(client, headers, path, **params):
+    items, cursor, pages = [], None, 0
+    while True:
+        query = dict(params, cursor=cursor) if cursor else params
+        response = client.get(path, query_string=query, headers=headers)
+        assert response.status_code == 200, response.json
+        items += response.json["items"]
+        cursor = response.json["next_cursor"]
+        pages += 1
+        if cursor is None:
+            return items, pages
+
+
+def _cursor(values):
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip("=")
+
+
+def test_students_page_newest_first_across_equal_timestamps(app, client, staff_headers):
+    registered = datetime(2026, 2, 1, 9, 0)
+    with app.app_context():
+        for i in range(23):
+            # Groups of five share a registration time, so pages split ties.
+            db.session.add(User(email=f"{i:08d}@dut4life.ac.za", password_hash="x",
+                                created_at=registered + timedelta(minutes=i // 5)))
+        db.session.commit()
+
+    items, pages = _walk(client, staff_headers, "/api/staff/students", limit=4)
+
+    assert pages == 6
+    assert len(items) == len({item["user_id"] for item in items}) == 23
+    keys = [(item["created_at"], item["user_id"]) for item in items]
+    assert keys == sorted(keys, reverse=True)
+
+
+def test_results_pages_cover_every_result_once(app, client, staff_headers, student_test):
+    user_id, test_id, questions = student_test
+    answers = [{"question_id": question_id, "selected_option_id": right} for question_id, right, _ in questions]
+    for _ in range(12):
+        session_id = client.post("/api/sessions/start", json={"user_id": user_id, "test_id": test_id}).json["session_id"]
+        assert client.post("/api/sessions/submit", json={"session_id": session_id, "answers": answers}).status_code == 200
+
+    items, pages = _walk(client, staff_headers, "/api/staff/results", limit=5)
+
+    assert pages == 3
+    assert len({item["session_id"] for item in items}) == 12
+    end_times = [item["end_time"] for item in items]
+    assert end_times == sorted(end_times, reverse=True)
+
+
+@pytest.mark.parametrize("cursor", [
+    "not base64!",
+    _cursor({"created_at": "2026-01-01"}),
+    _cursor(["2026-01-01T00:00:00"]),
+    _cursor([1, "user"]),
+    _cursor(["2026-01-01T00:00:00", 5]),
+    _cursor(["yesterday", "user"]),
+])
+def test_malformed_cursor_is_rejected(client, staff_headers, cursor):
+    response = client.get("/api/staff/students", query_string={"cursor": cursor}, headers=staff_headers)
+    assert response.status_code == 400
+    assert response.json == {"error": "Invalid cursor"}
@@ -0,0 +1,51 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def flask_db(tmp_path):
+    """
+    Runs `flask db ...` against a scratch production-profile database, as
+    deployments do; the development profile would create the schema itself.
+    """
+    env = dict(
+        os.environ,
+        FLASK_APP="main.py",
+        STORAGE_PROFILE="production",
+        DB_PATH=str(tmp_path / "app.db"),
+        ARCHIVE_DB_PATH=str(tmp_path / "archive.db"),
+        METRICS_DIR=str(tmp_path / "metrics"),
+    )
+
+    def run(*args):
+        result = subprocess.run(
+            [sys.executable, "-m", "flask", "db", *args],
+            cwd=SERVER_DIR, env=env, capture_output=True, text=True,
+        )
+        assert result.returncode == 0, result.stderr
+        return result.stdout + result.stderr
+    return run
+
+
+def test_upgrade_matches_models(flask_db):
+    flask_db("upgrade")
+    assert "No new upgrade operations detected" in flask_db("check")
+
+
+def test_single_head(flask_db):
+    heads = [line for line in flask_db("heads").splitlines() if "(head)" in line]
+    assert len(heads) == 1
+
+
+def test_downgrade_to_base_and_back(flask_db):
+    flask_db("upgrade")
+    flask_db("downgrade", "base")
+    assert "(head)" not in flask_db("current")
+    flask_db("upgrade")
+    assert "(head)" in flask_db("current")
+    assert "No new upgrade operations detected" in flask_db("check")
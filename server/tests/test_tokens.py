@@ -0,0 +1,68 @@
+import datetime
+
+import jwt
+
+from app.extensions import db
+from app.models.model import RevokedToken, User
+from app.services import passwords, stamps, tokens
+
+
+def _jti(app, token):
+    return jwt.decode(token, app.config["SECRET_KEY"], algorithms=["HS256"])["jti"]
+
+
+def test_logout_revokes_token(client, staff_headers):
+    assert client.get("/api/staff/results", headers=staff_headers).status_code == 200
+    assert client.post("/api/auth/logout", headers=staff_headers).status_code == 200
+    assert client.get("/api/staff/results", headers=staff_headers).status_code == 401
+
+
+def test_revocation_by_another_worker_reaches_cached_token(app, client, staff_headers):
+    # The first request verifies the token and caches it in this worker.
+    assert client.get("/api/staff/results", headers=staff_headers).status_code == 200
+
+    # Another worker's logout: the row and the stamp, but not this worker's cache.
+    token = staff_headers["Authorization"].split()[1]
+    with app.app_context():
+        db.session.add(RevokedToken(
+            jti=_jti(app, token), expires_at=datetime.datetime.utcnow() + datetime.timedelta(hours=1)
+        ))
+        db.session.commit()
+        stamps.bump(app.config["TOKEN_REVOCATION_STAMP"])
+
+    assert client.get("/api/staff/results", headers=staff_headers).status_code == 401
+
+
+def test_back_to_back_revocations_reach_other_workers(app):
+    with app.app_context():
+        user = User(email="staff@dut.ac.za", password_hash="x", role="staff")
+        db.session.add(user)
+        db.session.commit()
+        other_worker = tokens.Denylist()
+        # Faster than any filesystem timestamp: each revocation must still be seen.
+        for _ in range(20):
+            token = tokens.issue_token(user)
+            jti = _jti(app, token)
+            assert jti not in other_worker
+            assert tokens.revoke(token)
+            assert jti in other_worker
+
+
+def test_stamp_changes_on_every_bump(tmp_path):
+    path = str(tmp_path / "stamp")
+    assert stamps.read(path) is None
+    seen = set()
+    for _ in range(5):
+        stamps.bump(path)
+        seen.add(stamps.read(path))
+    assert len(seen) == 5
+
+
+def test_unknown_user_login_still_hashes(client, monkeypatch):
+    checked = []
+    monkeypatch.setattr(passwords, "verify_dummy", lambda password: checked.append(password) or False)
+
+    response = client.post("/api/auth/login", json={"email": "nobody@dut4life.ac.za", "password": "Secret@123"})
+
+    assert response.status_code == 401
+    assert checked == ["Secret@123"]